@@ -54,9 +54,10 @@ class APILoggingMiddleware(MiddlewareMixin):
             pass
         
         # Fix user detection
-        user = None
+        user_id = None
         if hasattr(request, 'user') and request.user.is_authenticated:
-            user = request.user
+            # By id: request.user may be a lazily loaded IdentityUser
+            user_id = request.user.pk
         
         # Debug prints
         print(f'[API DEBUG] {request.method} {request.get_full_path()}')
@@ -66,7 +67,7 @@ class APILoggingMiddleware(MiddlewareMixin):
         print(f'[API DEBUG] Response Data: {response_data}')
         
         APILog.objects.create(
-            user=user,
+            user_id=user_id,
             method=request.method,
             endpoint=request.get_full_path(),
             request_data=request_data,
@@ -1,3 +1,27 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import AppVersion
+
+
+@override_settings(PUBLIC_CACHE_MAX_AGE_SECONDS=120)
+class LatestVersionConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _latest(self, **headers):
+        return APIClient().get('/api/app-version/latest/', {'platform': 'ANDROID'}, **headers)
+
+    def test_public_validators_shared_by_every_client(self):
+        # Errors are not cacheable
+        self.assertFalse(self._latest().has_header('ETag'))
+
+        AppVersion.objects.create(version_number='1.0.0', version_code=100)
+        response = self._latest()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=120', response['Cache-Control'])
+
+        response = self._latest(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
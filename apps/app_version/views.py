@@ -5,7 +5,10 @@ from rest_framework.permissions import AllowAny
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 
+from server.conditional import conditional_get
+from server.runtime_config import get_config
 from .models import AppVersion, VersionCheckLog
 from .serializers import (
     VersionCheckRequestSerializer,
@@ -82,10 +85,7 @@ class CheckAppVersionView(APIView):
         current_version_code = AppVersion.calculate_version_code(current_version)
 
         # Get latest active version for the platform
-        latest_version_obj = AppVersion.objects.filter(
-            platform__in=[platform, 'BOTH'],
-            is_active=True
-        ).order_by('-version_code').first()
+        latest_version_obj = get_config('latest_app_versions').get(platform)
 
         # Initialize response data
         response_data = {
@@ -222,6 +222,7 @@ class LatestVersionView(APIView):
         operation_description="Get latest app version information for a platform",
         tags=['App Version']
     )
+    @method_decorator(conditional_get(['latest_app_versions'], public=True))
     def get(self, request):
         platform = request.query_params.get('platform', '').upper()
 
@@ -232,10 +233,7 @@ class LatestVersionView(APIView):
             )
 
         # Get latest active version
-        latest_version = AppVersion.objects.filter(
-            platform__in=[platform, 'BOTH'],
-            is_active=True
-        ).order_by('-version_code').first()
+        latest_version = get_config('latest_app_versions').get(platform)
 
         if not latest_version:
             return Response(
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
-from .models import User, EmailOTP
+from .models import User, EmailOTP, OutboundEmail
 
 
 @admin.register(User)
@@ -38,6 +38,28 @@ class UserAdmin(BaseUserAdmin):
 
 @admin.register(EmailOTP)
 class EmailOTPAdmin(admin.ModelAdmin):
-    list_display = ['email', 'otp', 'created_at', 'is_used']
+    list_display = ['email', 'otp', 'created_at', 'expires_at', 'is_used', 'verified_at']
     list_filter = ['is_used', 'created_at']
-    search_fields = ['email']
\ No newline at end of file
+    search_fields = ['email']
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['to_email', 'subject', 'priority', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'priority', 'created_at']
+    search_fields = ['to_email', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        from django.utils import timezone
+        from .email_outbox import wake_sender
+
+        updated = queryset.exclude(status='SENT').update(
+            status='PENDING',
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            expires_at=None
+        )
+        wake_sender()
+        self.message_user(request, f'{updated} emails queued for another attempt.')
+    retry_now.short_description = 'Retry selected emails now'
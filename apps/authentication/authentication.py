@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.functional import LazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    """Drop the cached user so the next request reloads it"""
+    cache.delete(user_cache_key(user_id))
+
+
+def _identity_property(name):
+    """Read from the loaded user once there is one, from the cached identity before that"""
+    def fget(self):
+        if self._wrapped is not empty:
+            return getattr(self._wrapped, name)
+        return self._identity[name]
+    return property(fget)
+
+
+class IdentityUser(LazyObject):
+    """
+    request.user for JWT requests: id, role and is_active come from the cached identity,
+    hr_profile_id from the token, anything else (including every write) loads the User row,
+    with its HRProfile, on first use.
+    Setting an attribute loads the row too, so a save never writes cached values back.
+    """
+
+    def __init__(self, identity, user_model, claims=None):
+        self.__dict__['_identity'] = identity
+        self.__dict__['_user_model'] = user_model
+        self.__dict__['_claims'] = claims or {}
+        super().__init__()
+
+    def _setup(self):
+        self._wrapped = self._user_model.objects.select_related('hr_profile').get(pk=self._identity['pk'])
+
+    pk = _identity_property('pk')
+    id = _identity_property('pk')
+    role = _identity_property('role')
+    is_active = _identity_property('is_active')
+
+    @property
+    def hr_profile_id(self):
+        """HRProfile id from the token claim; tokens issued without it load the row"""
+        if self._claims.get('hr_profile_id'):
+            return self._claims['hr_profile_id']
+        try:
+            return self.hr_profile.pk
+        except ObjectDoesNotExist:
+            return None
+
+    def __bool__(self):
+        return True
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves request.user from a short-TTL cache of the user's
+    identity (id, role, is_active and the password hash digest for revocation), not the
+    model instance. Views reading other fields load the row lazily; saves to User
+    invalidate the entry.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = user_cache_key(user_id)
+        identity = cache.get(key)
+
+        if identity is None:
+            user = self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values(
+                'pk', 'role', 'is_active', 'password'
+            ).first()
+            if user is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+            identity = {
+                'pk': user['pk'],
+                'role': user['role'],
+                'is_active': user['is_active'],
+                'password_digest': get_md5_hash_password(user['password']),
+            }
+            cache.set(key, identity, getattr(settings, 'AUTH_USER_CACHE_SECONDS', 60))
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not identity['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != identity['password_digest']:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return IdentityUser(identity, self.user_model, {'hr_profile_id': validated_token.get('hr_profile_id')})
@@ -0,0 +1,232 @@
+import logging
+import smtplib
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Emails claimed per query by the sender
+OUTBOX_BATCH_SIZE = 50
+
+# How long a claimed email is reserved before another sender may retry it
+SENDING_LEASE_SECONDS = 300
+
+
+def queue_email(to_email, subject, body, html_body='', priority=None, from_email=None, expires_at=None):
+    """Add an email to the outbox and wake the background sender once the transaction commits"""
+    from .models import OutboundEmail
+
+    email = OutboundEmail.objects.create(
+        to_email=to_email,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        subject=subject,
+        body=body,
+        html_body=html_body or '',
+        priority=OutboundEmail.PRIORITY_NORMAL if priority is None else priority,
+        expires_at=expires_at
+    )
+    transaction.on_commit(wake_sender)
+    return email
+
+
+def _retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base ... capped at EMAIL_OUTBOX_MAX_BACKOFF_SECONDS"""
+    base = getattr(settings, 'EMAIL_OUTBOX_BACKOFF_SECONDS', 30)
+    cap = getattr(settings, 'EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def claim_due_emails(limit=OUTBOX_BATCH_SIZE):
+    """Reserve the next due emails (OTPs first) so no other sender picks them up"""
+    from .models import OutboundEmail
+
+    now = timezone.now()
+
+    # Emails that can no longer be useful are dropped instead of sent late
+    OutboundEmail.objects.filter(
+        status__in=['PENDING', 'SENDING'],
+        expires_at__lte=now
+    ).update(status='FAILED', last_error='Expired before it could be sent')
+
+    # A SENDING row whose lease ran out belongs to a sender that died mid-batch
+    candidate_ids = list(
+        OutboundEmail.objects.filter(
+            status__in=['PENDING', 'SENDING'],
+            next_attempt_at__lte=now
+        ).order_by('priority', 'next_attempt_at').values_list('id', flat=True)[:limit]
+    )
+    if not candidate_ids:
+        return []
+
+    lease_until = now + timedelta(seconds=SENDING_LEASE_SECONDS)
+    OutboundEmail.objects.filter(
+        id__in=candidate_ids,
+        status__in=['PENDING', 'SENDING'],
+        next_attempt_at__lte=now
+    ).update(status='SENDING', next_attempt_at=lease_until)
+
+    return list(
+        OutboundEmail.objects.filter(
+            id__in=candidate_ids,
+            status='SENDING',
+            next_attempt_at=lease_until
+        ).order_by('priority', 'created_at')
+    )
+
+
+class EmailSender:
+    """Sends outbox emails over one SMTP connection, kept open while mail keeps coming"""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.connection = None
+        self.last_used = 0
+
+    def _open(self):
+        if self.connection is None:
+            self.connection = get_connection(self.backend, fail_silently=False)
+            self.connection.open()
+        self.last_used = time.monotonic()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def close_if_idle(self):
+        idle = getattr(settings, 'EMAIL_OUTBOX_IDLE_SECONDS', 60)
+        if self.connection is not None and time.monotonic() - self.last_used > idle:
+            self.close()
+
+    def _send(self, email):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email or settings.DEFAULT_FROM_EMAIL,
+            to=[email.to_email],
+            connection=self._open()
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+        message.send()
+
+    def send(self, email):
+        """Send one email, reconnecting once if the server dropped the idle connection"""
+        try:
+            self._send(email)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            self.close()
+            self._send(email)
+
+    def drain(self):
+        """Send every due email; returns (sent, failed)"""
+        from .models import OutboundEmail
+
+        max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+        sent = failed = 0
+
+        while True:
+            emails = claim_due_emails()
+            if not emails:
+                break
+
+            for email in emails:
+                email.attempts += 1
+                try:
+                    self.send(email)
+                except Exception as e:
+                    self.close()
+                    failed += 1
+                    email.last_error = str(e)
+                    if email.attempts >= max_attempts:
+                        email.status = 'FAILED'
+                        logger.error(f'Giving up on email to {email.to_email} after {email.attempts} attempts: {e}')
+                    else:
+                        email.status = 'PENDING'
+                        email.next_attempt_at = timezone.now() + _retry_delay(email.attempts)
+                        logger.warning(f'Email to {email.to_email} failed (attempt {email.attempts}), retrying: {e}')
+                    OutboundEmail.objects.filter(pk=email.pk).update(
+                        status=email.status,
+                        attempts=email.attempts,
+                        next_attempt_at=email.next_attempt_at,
+                        last_error=email.last_error
+                    )
+                    continue
+
+                sent += 1
+                OutboundEmail.objects.filter(pk=email.pk).update(
+                    status='SENT',
+                    attempts=email.attempts,
+                    sent_at=timezone.now(),
+                    last_error=''
+                )
+
+        return sent, failed
+
+
+class OutboxWorker(threading.Thread):
+    """Daemon thread draining the outbox whenever woken, and on a slow poll for retries"""
+
+    def __init__(self):
+        super().__init__(name='email-outbox', daemon=True)
+        self.sender = EmailSender()
+        self.wakeup = threading.Event()
+
+    def run(self):
+        poll = getattr(settings, 'EMAIL_OUTBOX_POLL_SECONDS', 15)
+        while True:
+            self.wakeup.wait(timeout=poll)
+            self.wakeup.clear()
+            try:
+                close_old_connections()
+                self.sender.drain()
+                self.sender.close_if_idle()
+            except Exception as e:
+                self.sender.close()
+                logger.error(f'Email outbox worker error: {e}', exc_info=True)
+            finally:
+                close_old_connections()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def wake_sender():
+    """Wake the outbox worker of this process, starting it on first use"""
+    global _worker
+    if not getattr(settings, 'EMAIL_OUTBOX_ASYNC', True):
+        # Synchronous mode (tests, one-off scripts): send right here
+        sender = EmailSender()
+        try:
+            sender.drain()
+        finally:
+            sender.close()
+        return
+
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = OutboxWorker()
+            _worker.start()
+    _worker.wakeup.set()
+
+
+def purge_sent_emails(days=None):
+    """Delete sent outbox rows older than EMAIL_OUTBOX_RETENTION_DAYS"""
+    from .models import OutboundEmail
+
+    days = days if days is not None else getattr(settings, 'EMAIL_OUTBOX_RETENTION_DAYS', 7)
+    deleted, _ = OutboundEmail.objects.filter(
+        status='SENT',
+        sent_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from apps.authentication.email_outbox import EmailSender, purge_sent_emails
+
+
+class Command(BaseCommand):
+    help = 'Send every due email in the outbox over one SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--purge',
+            action='store_true',
+            help='Also delete sent emails older than EMAIL_OUTBOX_RETENTION_DAYS'
+        )
+
+    def handle(self, *args, **kwargs):
+        sender = EmailSender()
+        try:
+            sent, failed = sender.drain()
+        finally:
+            sender.close()
+
+        self.stdout.write(self.style.SUCCESS(f'{sent} emails sent, {failed} failed'))
+
+        if kwargs['purge']:
+            self.stdout.write(self.style.SUCCESS(f'{purge_sent_emails()} sent emails purged'))
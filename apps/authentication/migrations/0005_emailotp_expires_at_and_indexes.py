@@ -0,0 +1,42 @@
+# Generated by Django 4.2.27 on 2026-10-19 03:40
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def populate_expires_at(apps, schema_editor):
+    EmailOTP = apps.get_model('authentication', 'EmailOTP')
+    EmailOTP.objects.filter(expires_at__isnull=True).update(
+        expires_at=F('created_at') + timedelta(minutes=10)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailotp',
+            name='expires_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(populate_expires_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='emailotp',
+            name='expires_at',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='emailotp',
+            index=models.Index(fields=['email', 'is_used', 'otp'], name='authenticat_email_47d751_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailotp',
+            index=models.Index(fields=['expires_at'], name='authenticat_expires_3b0348_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_emailotp_expires_at_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailotp',
+            name='verified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
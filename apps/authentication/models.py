@@ -69,16 +69,72 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.first_name or self.email
 
 class EmailOTP(models.Model):
+    VALIDITY_MINUTES = 10
+
     email = models.EmailField()
     otp = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
+    # Set only by a successful verification; is_used is also set when a newer OTP replaces this one
+    verified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # generate_otp (email, is_used) and verification (email, is_used, otp)
+            models.Index(fields=['email', 'is_used', 'otp']),
+            # Expiry sweeper
+            models.Index(fields=['expires_at']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.expires_at is None:
+            self.expires_at = timezone.now() + timedelta(minutes=self.VALIDITY_MINUTES)
+        super().save(*args, **kwargs)
     
     def is_expired(self):
-        return timezone.now() > self.created_at + timedelta(minutes=10)
+        return timezone.now() > self.expires_at
     
     @classmethod
     def generate_otp(cls, email):
         otp = str(random.randint(100000, 999999))
         cls.objects.filter(email=email, is_used=False).update(is_used=True)
-        return cls.objects.create(email=email, otp=otp)
\ No newline at end of file
+        return cls.objects.create(email=email, otp=otp)
+
+class OutboundEmail(models.Model):
+    """Email waiting in the outbox for the background sender"""
+
+    PRIORITY_OTP = 0
+    PRIORITY_NORMAL = 10
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=255, blank=True, default='')
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, default='')
+
+    priority = models.PositiveSmallIntegerField(default=PRIORITY_NORMAL, help_text="Lower is sent first")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="Next retry, or lease expiry while sending")
+    expires_at = models.DateTimeField(null=True, blank=True, help_text="Give up if still unsent by then")
+    last_error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} ({self.status})"
@@ -0,0 +1,136 @@
+import hmac
+import logging
+import secrets
+import threading
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Expired OTP rows deleted per query by the sweeper
+OTP_PURGE_BATCH_SIZE = 1000
+
+
+class OTPStore(ABC):
+    """Where signup OTPs live: the EmailOTP table, or the cache for high-volume signups"""
+
+    @abstractmethod
+    def issue(self, email) -> str:
+        """Create a new OTP for email, invalidating earlier ones"""
+
+    @abstractmethod
+    def verify(self, email, otp) -> bool:
+        """Consume a valid, unexpired OTP; True if it matched"""
+
+    @abstractmethod
+    def is_verified(self, email) -> bool:
+        """Whether an OTP was verified for email (checked when the account is created)"""
+
+
+class DatabaseOTPStore(OTPStore):
+    """OTPs stored as EmailOTP rows"""
+
+    def issue(self, email):
+        from .models import EmailOTP
+        return EmailOTP.generate_otp(email).otp
+
+    def verify(self, email, otp):
+        from .models import EmailOTP
+
+        # One indexed conditional UPDATE: matches, is unused and unexpired, and is consumed atomically
+        now = timezone.now()
+        return EmailOTP.objects.filter(
+            email=email,
+            is_used=False,
+            otp=otp,
+            expires_at__gt=now
+        ).update(is_used=True, verified_at=now) == 1
+
+    def is_verified(self, email):
+        from .models import EmailOTP
+        # Not is_used: issuing a new OTP marks the earlier ones used without verifying them
+        return EmailOTP.objects.filter(email=email, verified_at__isnull=False).exists()
+
+
+class CacheOTPStore(OTPStore):
+    """
+    OTPs kept only in the cache, so signups write nothing to the database.
+    Needs a cache shared by all workers (Redis/Memcached) outside development.
+    """
+
+    def _otp_key(self, email):
+        return f'otp:{email.lower()}'
+
+    def _verified_key(self, email):
+        return f'otp_verified:{email.lower()}'
+
+    def issue(self, email):
+        from .models import EmailOTP
+
+        otp = f'{secrets.randbelow(900000) + 100000}'
+        cache.set(self._otp_key(email), otp, EmailOTP.VALIDITY_MINUTES * 60)
+        return otp
+
+    def verify(self, email, otp):
+        key = self._otp_key(email)
+        expected = cache.get(key)
+
+        # Constant-time compare so response timing does not leak matching digits
+        if expected is None or not hmac.compare_digest(str(expected), str(otp)):
+            return False
+
+        cache.delete(key)
+        cache.set(
+            self._verified_key(email),
+            True,
+            getattr(settings, 'OTP_VERIFIED_TTL_HOURS', 24) * 3600
+        )
+        return True
+
+    def is_verified(self, email):
+        return bool(cache.get(self._verified_key(email)))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_otp_store() -> OTPStore:
+    """Return the store configured by OTP_STORE"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store_class = getattr(
+                    settings, 'OTP_STORE',
+                    'apps.authentication.otp_store.DatabaseOTPStore'
+                )
+                _store = import_string(store_class)()
+    return _store
+
+
+def purge_expired_otps(batch_size=OTP_PURGE_BATCH_SIZE):
+    """
+    Delete EmailOTP rows expired for longer than OTP_VERIFIED_TTL_HOURS, in batches.
+    Verified OTPs are kept that long because account creation checks for them.
+    """
+    from .models import EmailOTP
+
+    cutoff = timezone.now() - timedelta(hours=getattr(settings, 'OTP_VERIFIED_TTL_HOURS', 24))
+    deleted = 0
+
+    while True:
+        ids = list(
+            EmailOTP.objects.filter(expires_at__lt=cutoff).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        deleted += EmailOTP.objects.filter(id__in=ids).delete()[0]
+
+    if deleted:
+        logger.info(f'Purged {deleted} expired OTPs')
+    return deleted
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import User, EmailOTP
+from .models import User
+from .otp_store import get_otp_store
 from .utils import send_otp_email
 
 # Login Serializer (Swagger ke liye)
@@ -18,9 +19,9 @@ class SendOTPSerializer(serializers.Serializer):
     
     def create(self, validated_data):
         email = validated_data['email']
-        otp_instance = EmailOTP.generate_otp(email)
-        send_otp_email(email, otp_instance.otp)
-        return otp_instance
+        otp = get_otp_store().issue(email)
+        send_otp_email(email, otp)
+        return {'email': email}
 
 class VerifyOTPSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -30,14 +31,10 @@ class VerifyOTPSerializer(serializers.Serializer):
         email = attrs.get('email')
         otp = attrs.get('otp')
         
-        otp_instance = EmailOTP.objects.filter(
-            email=email, otp=otp, is_used=False
-        ).first()
-        
-        if not otp_instance or otp_instance.is_expired():
+        # Checks expiry and marks the OTP used in one step
+        if not get_otp_store().verify(email, otp):
             raise serializers.ValidationError('Invalid or expired OTP')
         
-        attrs['otp_instance'] = otp_instance
         return attrs
 
 class CreateAccountSerializer(serializers.Serializer):
@@ -58,12 +55,7 @@ class CreateAccountSerializer(serializers.Serializer):
             raise serializers.ValidationError("Passwords don't match")
         
         # Check if OTP was verified for this email
-        verified_otp = EmailOTP.objects.filter(
-            email=attrs['email'], 
-            is_used=True
-        ).order_by('-created_at').first()
-        
-        if not verified_otp:
+        if not get_otp_store().is_verified(attrs['email']):
             raise serializers.ValidationError('Email not verified. Please verify OTP first.')
         
         return attrs
@@ -1,4 +1,5 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -9,6 +10,19 @@ User = get_user_model()
 # Store the previous role value to detect changes
 _user_role_cache = {}
 
+# Previous (role, device token of an active user) to move FCM role topic subscriptions
+_user_topic_cache = {}
+
+
+def schedule_role_topic_sync(token, role, old_token=None, old_role=None):
+    """Update FCM role topic subscriptions in the background once the user is saved"""
+    from apps.notifications.services import WorkfinaFCMService
+    from server.scheduler import run_in_background
+
+    transaction.on_commit(lambda: run_in_background(
+        WorkfinaFCMService.sync_role_topic, token, role, old_token, old_role
+    ))
+
 
 @receiver(pre_save, sender=User)
 def cache_user_role(sender, instance, **kwargs):
@@ -17,6 +31,7 @@ def cache_user_role(sender, instance, **kwargs):
         try:
             old_user = User.objects.get(pk=instance.pk)
             _user_role_cache[instance.pk] = old_user.role
+            _user_topic_cache[instance.pk] = (old_user.role, old_user.fcm_token if old_user.is_active else None)
         except User.DoesNotExist:
             _user_role_cache[instance.pk] = ''
     else:
@@ -141,4 +156,44 @@ def create_profile_step_reminder_on_role_update(sender, instance, created, **kwa
 
     # Clean up cache
     if instance.pk in _user_role_cache:
-        del _user_role_cache[instance.pk]
\ No newline at end of file
+        del _user_role_cache[instance.pk]
+
+
+@receiver(post_save, sender=User)
+def sync_role_topic_subscription(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep the device token on its role topic: moved on role or token changes, and
+    unsubscribed when the token is cleared (logout) or the user is deactivated
+    """
+    old_role, old_token = _user_topic_cache.pop(instance.pk, ('', None))
+    if raw:
+        return
+
+    token = instance.fcm_token if instance.is_active else None
+    if (old_token or token) and (old_role, old_token) != (instance.role, token):
+        schedule_role_topic_sync(token, instance.role, old_token, old_role)
+
+
+def _invalidate_user_cache(user_id):
+    """Drop the cached auth user now and again after commit, so a concurrent request cannot re-cache stale data"""
+    from .authentication import invalidate_cached_user
+
+    invalidate_cached_user(user_id)
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_auth_user(sender, instance, **kwargs):
+    """Role changes, deactivation and deletion take effect on the next request"""
+    _invalidate_user_cache(instance.pk)
+
+
+@receiver(post_save, sender='token_blacklist.BlacklistedToken')
+def record_blacklisted_token(sender, instance, created, **kwargs):
+    """Keep the in-memory blacklist filters in step with new blacklist entries"""
+    if created:
+        from .token_blacklist import blacklist_filter
+
+        jti = instance.token.jti
+        transaction.on_commit(lambda: blacklist_filter.add(jti))
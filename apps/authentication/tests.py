@@ -1,3 +1,225 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
 
-# Create your tests here.
+from .models import EmailOTP
+from .otp_store import CacheOTPStore, DatabaseOTPStore, OTPStore, purge_expired_otps
+from .token_blacklist import BlacklistFilter, filter_enabled
+from .tokens import WorkfinaRefreshToken
+
+User = get_user_model()
+
+
+class TokenBlacklistFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='hr@example.com', password='x', role='hr')
+
+    def _blacklist(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            token.blacklist()
+
+    def test_filter_disabled_with_per_process_cache(self):
+        self.assertFalse(filter_enabled())
+
+    @override_settings(TOKEN_BLACKLIST_FILTER_ENABLED=True)
+    def test_blacklisted_token_rejected(self):
+        token = WorkfinaRefreshToken.for_user(self.user)
+        WorkfinaRefreshToken(str(token))
+        self._blacklist(token)
+        with self.assertRaises(TokenError):
+            WorkfinaRefreshToken(str(token))
+
+    def test_other_process_catches_up_before_trusting_a_miss(self):
+        token = WorkfinaRefreshToken.for_user(self.user)
+        other = BlacklistFilter()
+        other.rebuild()
+        self.assertFalse(other.might_contain(token['jti']))
+
+        # Blacklisted through this process's filter; the other one only sees the counter move
+        self._blacklist(token)
+        with self.assertNumQueries(1):
+            self.assertTrue(other.might_contain(token['jti']))
+        with self.assertNumQueries(0):
+            self.assertTrue(other.might_contain(token['jti']))
+
+    def test_lost_counter_still_catches_up(self):
+        token = WorkfinaRefreshToken.for_user(self.user)
+        other = BlacklistFilter()
+        other.rebuild()
+
+        with self.captureOnCommitCallbacks(execute=False):
+            token.blacklist()
+        cache.clear()
+        self.assertTrue(other.might_contain(token['jti']))
+
+    def test_unrelated_token_not_matched(self):
+        blacklisted = WorkfinaRefreshToken.for_user(self.user)
+        self._blacklist(blacklisted)
+        other = WorkfinaRefreshToken.for_user(self.user)
+
+        bloom = BlacklistFilter()
+        self.assertTrue(bloom.might_contain(blacklisted['jti']))
+        self.assertFalse(bloom.might_contain(other['jti']))
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='c@example.com', password='x', role='candidate')
+        self.client = APIClient()
+        token = WorkfinaRefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+
+    def _user_queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        return response, [q for q in queries.captured_queries if 'authentication_user' in q['sql']]
+
+    def test_identity_served_from_cache(self):
+        self.client.get('/api/content/dashboard/')
+        response, user_queries = self._user_queries('/api/content/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries, [])
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.client.get('/api/content/dashboard/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/content/dashboard/').status_code, 401)
+
+    @mock.patch('server.scheduler.run_in_background')
+    def test_fcm_token_update_does_not_write_back_cached_fields(self, run_in_background):
+        self.client.get('/api/content/dashboard/')
+        # Written elsewhere without invalidating this process's identity cache
+        User.objects.filter(pk=self.user.pk).update(is_email_verified=True, role='hr')
+
+        response = self.client.post('/api/auth/update-fcm-token/', {'token': 'device-1'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.fcm_token, 'device-1')
+        self.assertTrue(self.user.is_email_verified)
+        self.assertEqual(self.user.role, 'hr')
+
+    def test_hr_profile_id_read_from_token(self):
+        hr_user = User.objects.create_user(email='hr@example.com', password='x', role='hr')
+        token = WorkfinaRefreshToken.for_user(hr_user)
+        self.assertEqual(token['hr_profile_id'], str(hr_user.hr_profile.pk))
+        self.assertNotIn('candidate_id', token.payload)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        self.client.get('/api/candidates/unlocked/')
+        response, user_queries = self._user_queries('/api/candidates/unlocked/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries, [])
+
+        # Issued before the claim existed: falls back to loading the profile
+        del token['hr_profile_id']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        response, user_queries = self._user_queries('/api/candidates/unlocked/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(user_queries), 1)
+
+
+@mock.patch('server.scheduler.run_in_background')
+class RoleTopicSubscriptionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='c@example.com', password='x', role='candidate')
+        self.client = APIClient()
+        self.refresh = WorkfinaRefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def _topic_syncs(self, run_in_background):
+        from apps.notifications.services import WorkfinaFCMService
+        return [call.args[1:] for call in run_in_background.call_args_list
+                if call.args[0] == WorkfinaFCMService.sync_role_topic]
+
+    def _register_device(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/auth/update-fcm-token/', {'token': 'device-1'}, format='json')
+
+    def test_new_token_subscribed(self, run_in_background):
+        self._register_device()
+        self.assertEqual(self._topic_syncs(run_in_background), [('device-1', 'candidate', None, 'candidate')])
+
+    def test_logout_unsubscribes_and_forgets_token(self, run_in_background):
+        self._register_device()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/auth/logout/', {'refresh': str(self.refresh)}, format='json')
+
+        self.assertEqual(self._topic_syncs(run_in_background)[-1], (None, 'candidate', 'device-1', 'candidate'))
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.fcm_token)
+
+    def test_deactivation_unsubscribes(self, run_in_background):
+        self._register_device()
+        self.user.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.assertEqual(self._topic_syncs(run_in_background)[-1], (None, 'candidate', 'device-1', 'candidate'))
+
+
+class OTPStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _check_store(self, store):
+        otp = store.issue('new@example.com')
+        self.assertFalse(store.is_verified('new@example.com'))
+        # Issued OTPs are 100000-999999
+        self.assertFalse(store.verify('new@example.com', '000000'))
+
+        self.assertTrue(store.verify('new@example.com', otp))
+        self.assertFalse(store.verify('new@example.com', otp))
+        self.assertTrue(store.is_verified('new@example.com'))
+
+    def test_store_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            OTPStore()
+
+    def test_database_store(self):
+        self._check_store(DatabaseOTPStore())
+
+    def test_cache_store(self):
+        self._check_store(CacheOTPStore())
+
+    def test_rerequested_otp_is_not_verified(self):
+        for store in (DatabaseOTPStore(), CacheOTPStore()):
+            first = store.issue('new@example.com')
+            second = store.issue('new@example.com')
+            self.assertFalse(store.is_verified('new@example.com'))
+
+            if first != second:
+                self.assertFalse(store.verify('new@example.com', first))
+            self.assertTrue(store.verify('new@example.com', second))
+            self.assertTrue(store.is_verified('new@example.com'))
+            cache.clear()
+            EmailOTP.objects.all().delete()
+
+    def test_expired_otp_rejected(self):
+        store = DatabaseOTPStore()
+        otp = store.issue('new@example.com')
+        EmailOTP.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(store.verify('new@example.com', otp))
+
+    def test_sweeper_keeps_otps_account_creation_still_needs(self):
+        recent = EmailOTP.objects.create(email='a@example.com', otp='123456', is_used=True)
+        EmailOTP.objects.create(
+            email='b@example.com',
+            otp='123456',
+            expires_at=timezone.now() - timedelta(days=2)
+        )
+
+        self.assertEqual(purge_expired_otps(batch_size=1), 1)
+        self.assertEqual(list(EmailOTP.objects.values_list('id', flat=True)), [recent.id])
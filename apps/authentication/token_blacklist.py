@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Max
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Expired outstanding tokens deleted per query by the purge
+TOKEN_PURGE_BATCH_SIZE = 1000
+
+# Counter in the shared cache bumped whenever a token is blacklisted
+BLACKLIST_VERSION_KEY = 'token_blacklist_version'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter: no false negatives, false positives at roughly error_rate"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.capacity = capacity
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        # Double hashing gives hash_count independent-enough positions from one digest
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position // 8] |= 1 << (position % 8)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(value))
+
+
+class BlacklistFilter:
+    """
+    Per-process Bloom filter of blacklisted refresh token JTIs, used only as a fast
+    "definitely not blacklisted" answer: a possible hit is always confirmed in the DB.
+
+    A miss is only trusted once the filter has caught up with the version counter in
+    the shared cache. When the counter moved, the BlacklistedToken rows added since the
+    filter last looked (by id) are folded in with one indexed query; full rebuilds
+    happen only on first use, when the filter is full, and on the periodic job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._version = None
+        self._last_id = 0
+
+    def _shared_version(self):
+        version = cache.get(BLACKLIST_VERSION_KEY)
+        if version is None:
+            # Starting from the clock means an evicted counter cannot repeat an old value
+            cache.add(BLACKLIST_VERSION_KEY, time.time_ns(), None)
+            version = cache.get(BLACKLIST_VERSION_KEY)
+        return version
+
+    def rebuild(self):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        # Read the version first: anything blacklisted after this is caught up later
+        version = self._shared_version()
+        last_id = BlacklistedToken.objects.aggregate(last=Max('id'))['last'] or 0
+        jtis = list(
+            BlacklistedToken.objects.filter(
+                id__lte=last_id,
+                token__expires_at__gt=timezone.now()
+            ).values_list('token__jti', flat=True)
+        )
+
+        # Headroom so tokens blacklisted before the next rebuild keep the error rate down
+        bloom = BloomFilter(
+            capacity=max(len(jtis) * 2, 1024),
+            error_rate=getattr(settings, 'TOKEN_BLACKLIST_FILTER_ERROR_RATE', 0.001)
+        )
+        for jti in jtis:
+            bloom.add(jti)
+
+        with self._lock:
+            self._filter = bloom
+            self._version = version
+            self._last_id = last_id
+
+        logger.info(f'Token blacklist filter rebuilt with {len(jtis)} JTIs')
+        return len(jtis)
+
+    def _catch_up(self, version):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        rows = list(
+            BlacklistedToken.objects.filter(id__gt=self._last_id).order_by('id').values_list('id', 'token__jti')
+        )
+        with self._lock:
+            for row_id, jti in rows:
+                self._filter.add(jti)
+                self._last_id = max(self._last_id, row_id)
+            self._version = version
+
+    def might_contain(self, jti):
+        """False only when jti is certainly not blacklisted"""
+        bloom = self._filter
+        if bloom is None or bloom.count >= bloom.capacity:
+            self.rebuild()
+        else:
+            version = self._shared_version()
+            if version != self._version:
+                self._catch_up(version)
+        return jti in self._filter
+
+    def add(self, jti):
+        """Record a blacklisting (after commit) so every process catches up before trusting a miss"""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+        cache.add(BLACKLIST_VERSION_KEY, time.time_ns(), None)
+        try:
+            cache.incr(BLACKLIST_VERSION_KEY)
+        except ValueError:
+            cache.set(BLACKLIST_VERSION_KEY, time.time_ns(), None)
+
+
+def filter_enabled():
+    """
+    The filter's misses are only safe when its version counter is shared by every worker,
+    so with a per-process cache (LocMemCache) every refresh uses the plain DB lookup
+    """
+    enabled = getattr(settings, 'TOKEN_BLACKLIST_FILTER_ENABLED', None)
+    if enabled is None:
+        enabled = not isinstance(caches['default'], LocMemCache)
+    return enabled
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def purge_expired_tokens(batch_size=TOKEN_PURGE_BATCH_SIZE):
+    """Delete expired outstanding tokens (and their blacklist entries) in batches"""
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+    now = timezone.now()
+    deleted_outstanding = 0
+    deleted_blacklisted = 0
+
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+
+        # An expired token fails verification on its own, its blacklist row is dead weight
+        deleted_blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+        deleted_outstanding += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+
+    logger.info(f'Purged {deleted_outstanding} expired outstanding tokens and {deleted_blacklisted} blacklist entries')
+    return {'outstanding': deleted_outstanding, 'blacklisted': deleted_blacklisted}
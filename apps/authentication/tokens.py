@@ -0,0 +1,48 @@
+import logging
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+from .token_blacklist import blacklist_filter, filter_enabled
+
+logger = logging.getLogger(__name__)
+
+
+def identity_claims(user):
+    """Role and HR profile id carried in our tokens; request.user.hr_profile_id reads the latter"""
+    from apps.recruiters.models import HRProfile
+
+    # Created with the user, so never missing from a token issued later (candidate
+    # profiles are created after signup, so a claim for them would be stale)
+    hr_profile_id = None
+    if user.role == 'hr':
+        hr_profile_id = HRProfile.objects.filter(user=user).values_list('id', flat=True).first()
+
+    return {
+        'role': user.role or '',
+        'hr_profile_id': str(hr_profile_id) if hr_profile_id else None,
+    }
+
+
+class WorkfinaRefreshToken(RefreshToken):
+    """Refresh token with identity claims (copied into every access token derived from it)"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in identity_claims(user).items():
+            token[claim] = value
+        return token
+
+    def check_blacklist(self):
+        # The Bloom filter only skips the lookup for JTIs it can rule out; any possible
+        # hit, or any doubt about the filter, goes to the database
+        if filter_enabled():
+            try:
+                if not blacklist_filter.might_contain(self.payload['jti']):
+                    return
+            except Exception as e:
+                logger.warning(f'Token blacklist filter unavailable, checking the database: {e}')
+        super().check_blacklist()
+
+
+class WorkfinaTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = WorkfinaRefreshToken
@@ -1,14 +1,19 @@
-from django.core.mail import send_mail
+import logging
+from datetime import timedelta
 from django.conf import settings
 from django.template.loader import render_to_string
+from django.utils import timezone
 from django.utils.html import strip_tags
+from .email_outbox import queue_email
+
+logger = logging.getLogger(__name__)
+
 
 def send_otp_email(email, otp):
+    from .models import EmailOTP, OutboundEmail
+
     subject = 'WorkFina - Email Verification Code'
     
-    # Log OTP for debugging
-    print(f'[OTP DEBUG] Sending OTP {otp} to {email}')
-    
     # HTML template render
     html_message = render_to_string('auth/otp_email.html', {
         'otp': otp,
@@ -18,16 +23,16 @@ def send_otp_email(email, otp):
     # Plain text version
     plain_message = strip_tags(html_message)
     
-    from_email = settings.EMAIL_HOST_USER
-    recipient_list = [email]
-    
-    send_mail(
+    # Sent by the outbox worker over a pooled SMTP connection, ahead of other mail
+    queue_email(
+        to_email=email,
         subject=subject,
-        message=plain_message,
-        from_email=from_email,
-        recipient_list=recipient_list,
-        html_message=html_message,
-        fail_silently=False
+        body=plain_message,
+        html_body=html_message,
+        from_email=settings.EMAIL_HOST_USER,
+        priority=OutboundEmail.PRIORITY_OTP,
+        expires_at=timezone.now() + timedelta(minutes=EmailOTP.VALIDITY_MINUTES)
     )
     
-    print(f'[OTP DEBUG] OTP successfully sent to {email}')
\ No newline at end of file
+    # Never log the OTP itself
+    logger.info(f'OTP email queued for {email}')
@@ -3,10 +3,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import WorkfinaRefreshToken, WorkfinaTokenRefreshSerializer
 from drf_yasg.utils import swagger_auto_schema
 from .serializers import LoginSerializer
-from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 
 from .serializers import (
     SendOTPSerializer,
@@ -14,7 +13,7 @@ from .serializers import (
     CreateAccountSerializer,
     LoginSerializer,   
 )
-from .models import EmailOTP
+from .models import EmailOTP, User
 
 
 
@@ -42,10 +41,6 @@ class VerifyOTPView(APIView):
     def post(self, request):
         serializer = VerifyOTPSerializer(data=request.data)
         if serializer.is_valid():
-            otp_instance = serializer.validated_data['otp_instance']
-            otp_instance.is_used = True
-            otp_instance.save()
-
             return Response(
                 {'message': 'OTP verified successfully'},
                 status=status.HTTP_200_OK
@@ -62,7 +57,7 @@ class CreateAccountView(APIView):
         serializer = CreateAccountSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = WorkfinaRefreshToken.for_user(user)
 
             return Response({
                 'refresh': str(refresh),
@@ -91,7 +86,7 @@ class LoginView(APIView):
         user = authenticate(username=email, password=password)
 
         if user and user.is_email_verified:
-            refresh = RefreshToken.for_user(user)
+            refresh = WorkfinaRefreshToken.for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -115,7 +110,8 @@ class UpdateRoleView(APIView):
     permission_classes = [IsAuthenticated]
 
     def patch(self, request):
-        user = request.user
+        # Fresh row: request.user may come from the identity cache
+        user = User.objects.get(pk=request.user.pk)
         role = request.data.get('role')
         
         if role not in ['candidate', 'hr']:
@@ -124,11 +120,18 @@ class UpdateRoleView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # The device's role topic subscription follows in signals.sync_role_topic_subscription
         user.role = role
-        user.save()
-        
+        user.save(update_fields=['role'])
+
+        # Fresh tokens so the role/profile claims match the new role
+        refresh = WorkfinaRefreshToken.for_user(user)
         return Response(
-            {'message': 'Role updated successfully'},
+            {
+                'message': 'Role updated successfully',
+                'refresh': str(refresh),
+                'access': str(refresh.access_token)
+            },
             status=status.HTTP_200_OK
         )
 
@@ -145,7 +148,7 @@ class RefreshTokenView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            serializer = TokenRefreshSerializer(data={'refresh': refresh_token})
+            serializer = WorkfinaTokenRefreshSerializer(data={'refresh': refresh_token})
             if serializer.is_valid():
                 return Response(serializer.validated_data, status=status.HTTP_200_OK)
             else:
@@ -166,9 +169,15 @@ class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        # Forget the device token, which also unsubscribes it from its role topic (signals.py)
+        user = User.objects.get(pk=request.user.pk)
+        if user.fcm_token:
+            user.fcm_token = None
+            user.save(update_fields=['fcm_token'])
+
         try:
             refresh_token = request.data.get('refresh')
-            token = RefreshToken(refresh_token)
+            token = WorkfinaRefreshToken(refresh_token)
             token.blacklist()
             return Response(
                 {'message': 'Logged out successfully'},
@@ -187,9 +196,11 @@ class UpdateFCMTokenView(APIView):
         try:
             token = request.data.get('token')
             if token:
-                user = request.user
-                user.fcm_token = token
-                user.save()
+                user = User.objects.get(pk=request.user.pk)
+                # Saving moves the device to its role topic for broadcasts (signals.py)
+                if token != user.fcm_token:
+                    user.fcm_token = token
+                    user.save(update_fields=['fcm_token'])
                 return Response({'success': True}, status=status.HTTP_200_OK)
             return Response({'error': 'Token required'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
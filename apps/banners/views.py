@@ -1,11 +1,14 @@
+from django.utils.decorators import method_decorator
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from .models import Banner, RecruiterBanner
+from server.conditional import conditional_get
+from server.runtime_config import get_config
 from .serializers import BannerSerializer, RecruiterBannerSerializer
 
 class ActiveBannerView(APIView):
+    @method_decorator(conditional_get(['active_banner']))
     def get(self, request):
-        banner = Banner.objects.filter(is_active=True).first()
+        banner = get_config('active_banner')
         if not banner:
             return Response(None)
         serializer = BannerSerializer(banner, context={'request': request})
@@ -13,9 +16,10 @@ class ActiveBannerView(APIView):
 
 
 class ActiveRecruiterBannerView(APIView):
+    @method_decorator(conditional_get(['recruiter_banners']))
     def get(self, request):
-        banners = RecruiterBanner.objects.filter(is_active=True)
-        if not banners.exists():
+        banners = get_config('recruiter_banners')
+        if not banners:
             return Response([])
         serializer = RecruiterBannerSerializer(banners, many=True, context={'request': request})
         return Response(serializer.data)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django import forms    
 from .models import *
+from .taxonomy import taxonomy_changed
 
 class WorkExperienceInline(admin.TabularInline):
     model = WorkExperience
@@ -80,6 +81,7 @@ class PendingFilterOptionAdmin(admin.ModelAdmin):
 
     def approve_locations(self, request, queryset):
         count = queryset.update(is_active=True)
+        taxonomy_changed()
         self.message_user(request, f'{count} location(s) approved successfully!', level='success')
     approve_locations.short_description = '✅ Approve selected locations'
 
@@ -444,6 +446,7 @@ class FilterOptionAdmin(admin.ModelAdmin):
     
     def reject_options(self, request, queryset):
         count = queryset.filter(is_approved=False).update(is_active=False, is_approved=False)
+        taxonomy_changed()
         self.message_user(request, f'{count} option(s) rejected.')
     reject_options.short_description = '❌ Reject selected options'
 
@@ -472,4 +475,14 @@ class ProfileTipAdmin(admin.ModelAdmin):
         })
     )
     
-    readonly_fields = ['created_at', 'updated_at']
\ No newline at end of file
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(TaxonomySnapshot)
+class TaxonomySnapshotAdmin(admin.ModelAdmin):
+    list_display = ['version', 'category_count', 'option_count', 'created_at']
+    readonly_fields = ['version', 'category_count', 'option_count', 'created_at']
+    exclude = ['document', 'changes']
+
+    def has_add_permission(self, request):
+        # Snapshots are built when filter categories or options change
+        return False
@@ -9,7 +9,9 @@ class CandidatesConfig(AppConfig):
     def ready(self):
         import apps.candidates.signals
 
-        # Start scheduler only in main process (not in migrations/shell)
+        # Start scheduler only in the runserver main process (not in migrations/shell).
+        # Deployed web workers never set RUN_MAIN: the daily jobs run in one
+        # `manage.py run_scheduler` process instead.
         if os.environ.get('RUN_MAIN') == 'true':
             from server.scheduler import get_scheduler, start_daily_jobs
             get_scheduler()
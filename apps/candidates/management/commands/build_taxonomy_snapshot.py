@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from apps.candidates.taxonomy import build_taxonomy_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Build the taxonomy snapshot served to the apps for offline filtering (no-op if unchanged)'
+
+    def handle(self, *args, **options):
+        snapshot = build_taxonomy_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f'Taxonomy snapshot v{snapshot.version}: {snapshot.category_count} categories, {snapshot.option_count} options'
+        ))
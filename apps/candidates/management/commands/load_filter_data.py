@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from apps.candidates.models import FilterCategory, FilterOption
+from apps.candidates.taxonomy import build_taxonomy_snapshot
 import json
 import os
 
@@ -247,3 +248,7 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(f'  Cities: {city_count}'))
         self.stdout.write('\n' + '='*50)
         self.stdout.write(self.style.SUCCESS('\n🎉 All filter data loaded successfully!'))
+
+        # The command exits before the debounced background rebuild would run
+        snapshot = build_taxonomy_snapshot()
+        self.stdout.write(self.style.SUCCESS(f'Taxonomy snapshot: v{snapshot.version}'))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from apps.candidates.models import FilterCategory, FilterOption
+from apps.candidates.taxonomy import build_taxonomy_snapshot
 import json
 
 class Command(BaseCommand):
@@ -68,4 +69,8 @@ class Command(BaseCommand):
                 if city_created:
                     self.stdout.write(f'  - Added city: {city_name}')
         
-        self.stdout.write(self.style.SUCCESS('Successfully loaded all locations!'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS('Successfully loaded all locations!'))
+
+        # The command exits before the debounced background rebuild would run
+        snapshot = build_taxonomy_snapshot()
+        self.stdout.write(self.style.SUCCESS(f'Taxonomy snapshot: v{snapshot.version}'))
\ No newline at end of file
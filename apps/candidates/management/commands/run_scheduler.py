@@ -0,0 +1,46 @@
+import signal
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from server.scheduler import (
+    SCHEDULER_LOCK_SECONDS,
+    acquire_scheduler_lock,
+    get_scheduler,
+    release_scheduler_lock,
+    renew_scheduler_lock,
+    start_daily_jobs
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the daily jobs (subscription expiry, reminders, retention, purges) in this process. '
+        'Web workers never start them: run exactly one of these next to gunicorn. '
+        'A second instance refuses to start while the first holds the lock in the shared cache.'
+    )
+
+    def handle(self, *args, **kwargs):
+        if not acquire_scheduler_lock():
+            raise CommandError('Another process is already running the scheduler')
+
+        sched = get_scheduler()
+        sched.add_job(
+            renew_scheduler_lock,
+            'interval',
+            seconds=SCHEDULER_LOCK_SECONDS // 3,
+            id='scheduler_lock_heartbeat',
+            replace_existing=True
+        )
+        start_daily_jobs()
+        # Stopped by the process manager: release the lock so a replacement starts at once
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+        self.stdout.write(self.style.SUCCESS('Scheduler running, press Ctrl+C to stop'))
+
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sched.shutdown()
+            release_scheduler_lock()
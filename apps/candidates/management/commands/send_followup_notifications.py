@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from apps.candidates.models import CandidateFollowup
-from apps.notifications.models import UserNotification, NotificationTemplate, NotificationLog
+from apps.notifications.models import UserNotification, NotificationLog
+from apps.notifications.template_cache import get_template
 from server.fcm_utils import SimpleFCM
 from datetime import timedelta
 
@@ -21,18 +22,12 @@ class Command(BaseCommand):
             followup_date__gte=now
         ).select_related('hr_user', 'candidate', 'hr_user__user')
 
-        notifications_sent = 0
+        # Resolve the template once for the whole run
+        compiled = get_template('FOLLOWUP_REMINDER', 'HR')
+        template = compiled.template if compiled else None
 
+        pending = []
         for followup in followups:
-            # Check if notification was already sent for this follow-up
-            existing_notification = UserNotification.objects.filter(
-                user=followup.hr_user.user,
-                data_payload__followup_id=str(followup.id)
-            ).exists()
-
-            if existing_notification:
-                continue  # Skip if already notified
-
             # Format the follow-up date and time
             followup_time = followup.followup_date.strftime("%-d %B %Y at %-I:%M %p")
             candidate_name = followup.candidate.masked_name
@@ -42,11 +37,6 @@ class Command(BaseCommand):
             notification_body = f"Follow-up reminder for {candidate_name} scheduled at {followup_time}"
 
             try:
-                template = NotificationTemplate.objects.filter(
-                    notification_type='FOLLOWUP_REMINDER',
-                    is_active=True
-                ).first()
-
                 if template:
                     notification_title = template.title.format(
                         candidate_name=candidate_name,
@@ -60,10 +50,10 @@ class Command(BaseCommand):
             except Exception:
                 pass  # Use default title and body
 
-            # Create notification for HR user
-            notification = UserNotification.objects.create(
+            # Notification for HR user, keyed so each follow-up is notified once
+            notification = UserNotification(
                 user=followup.hr_user.user,
-                template=template if 'template' in locals() else None,
+                template=template,
                 title=notification_title,
                 body=notification_body,
                 data_payload={
@@ -73,16 +63,30 @@ class Command(BaseCommand):
                     'candidate_name': candidate_name,
                     'followup_time': followup_time,
                     'notes': followup.notes
-                }
+                },
+                dedupe_key=f'followup_reminder:{followup.id}'
             )
+            pending.append((followup, notification))
+
+        # Skip follow-ups already notified (one query for the whole batch)
+        created_ids = {notification.id for notification in UserNotification.create_if_absent(
+            [notification for _, notification in pending]
+        )}
+
+        logs = []
+        for followup, notification in pending:
+            if notification.id not in created_ids:
+                continue  # Skip if already notified
+
+            candidate_name = followup.candidate.masked_name
 
             # Send FCM push notification
             hr_user = followup.hr_user.user
             if hasattr(hr_user, 'fcm_token') and hr_user.fcm_token:
                 result = SimpleFCM.send_to_token(
                     token=hr_user.fcm_token,
-                    title=notification_title,
-                    body=notification_body,
+                    title=notification.title,
+                    body=notification.body,
                     data={
                         'type': 'FOLLOWUP_REMINDER',
                         'followup_id': str(followup.id),
@@ -98,27 +102,29 @@ class Command(BaseCommand):
                     notification.status = 'FAILED'
                     notification.error_message = result.get('error', 'Unknown error')
 
-                notification.save()
+                notification.save(update_fields=['status', 'fcm_message_id', 'error_message'])
 
             # Create notification log
-            NotificationLog.objects.create(
+            logs.append(NotificationLog(
                 log_type='REMINDER_SCHEDULED',
-                user=followup.hr_user.user,
+                user=hr_user,
                 notification=notification,
-                message=f"Follow-up reminder sent to {followup.hr_user.user.email} for candidate {candidate_name}",
+                message=f"Follow-up reminder sent to {hr_user.email} for candidate {candidate_name}",
                 metadata={
                     'followup_id': str(followup.id),
                     'candidate_id': str(followup.candidate.id)
                 }
-            )
+            ))
 
-            notifications_sent += 1
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'Sent follow-up notification to {followup.hr_user.user.email} for {candidate_name}'
+                    f'Sent follow-up notification to {hr_user.email} for {candidate_name}'
                 )
             )
 
+        NotificationLog.objects.bulk_create(logs)
+        notifications_sent = len(logs)
+
         if notifications_sent > 0:
             self.stdout.write(
                 self.style.SUCCESS(
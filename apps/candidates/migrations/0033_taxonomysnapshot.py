@@ -0,0 +1,30 @@
+# Generated by Django 4.2.27 on 2026-10-19 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0032_remove_workexperience_gap_reason_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaxonomySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(unique=True)),
+                ('document', models.BinaryField(help_text='gzip-compressed JSON of the whole taxonomy')),
+                ('changes', models.BinaryField(help_text='gzip-compressed JSON of the changes since the previous version')),
+                ('category_count', models.PositiveIntegerField(default=0)),
+                ('option_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Taxonomy Snapshot',
+                'verbose_name_plural': 'Taxonomy Snapshots',
+                'ordering': ['-version'],
+            },
+        ),
+    ]
@@ -454,4 +454,25 @@ class ProfileTip(models.Model):
         verbose_name_plural = "Profile Tips"
     
     def __str__(self):
-        return f"{self.title} (Order: {self.display_order})"
\ No newline at end of file
+        return f"{self.title} (Order: {self.display_order})"
+
+class TaxonomySnapshot(models.Model):
+    """
+    Pre-serialized, gzip-compressed copy of the active filter taxonomy (categories and
+    options, including states and cities) for offline use by the apps, plus the change
+    set from the previous version so clients can sync deltas (apps/candidates/taxonomy.py).
+    """
+    version = models.PositiveIntegerField(unique=True)
+    document = models.BinaryField(help_text="gzip-compressed JSON of the whole taxonomy")
+    changes = models.BinaryField(help_text="gzip-compressed JSON of the changes since the previous version")
+    category_count = models.PositiveIntegerField(default=0)
+    option_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-version']
+        verbose_name = "Taxonomy Snapshot"
+        verbose_name_plural = "Taxonomy Snapshots"
+
+    def __str__(self):
+        return f"Taxonomy v{self.version} ({self.option_count} options)"
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from .models import Candidate, ProfileTip, UnlockHistory, FilterCategory, FilterOption, CandidateNote, CandidateFollowup, WorkExperience, Education, CareerGap
 from django.utils import timezone
@@ -505,6 +506,14 @@ class FullCandidateSerializer(serializers.ModelSerializer):
 
 
 
+class BulkUnlockSerializer(serializers.Serializer):
+    candidate_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        min_length=1,
+        max_length=getattr(settings, 'BULK_UNLOCK_MAX_CANDIDATES', 50)
+    )
+
+
 class UnlockHistorySerializer(serializers.ModelSerializer):
     candidate_name = serializers.CharField(source='candidate.masked_name', read_only=True)
     hr_email = serializers.CharField(source='hr_user.user.email', read_only=True)
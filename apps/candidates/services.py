@@ -0,0 +1,251 @@
+import logging
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from .models import Candidate, UnlockHistory
+from .serializers import FullCandidateSerializer
+
+logger = logging.getLogger(__name__)
+
+# Credits charged for one candidate unlock
+UNLOCK_CREDITS_REQUIRED = 10
+
+# Runtime config generation bumped when an HR profile unlocks candidates (per-HR unlock counts)
+HR_UNLOCKS_STAMP = 'hr_unlocks:{}'
+
+
+class InsufficientCredits(Exception):
+    pass
+
+
+def full_profile_queryset():
+    """Candidates with everything FullCandidateSerializer reads loaded up front"""
+    return Candidate.objects.select_related(
+        'user', 'role', 'religion', 'country', 'state', 'city'
+    ).prefetch_related('work_experiences', 'career_gaps', 'educations')
+
+
+def send_unlock_notification(user_id, title, body, data):
+    """Push the credit update for an unlock; runs in the background after commit"""
+    from django.contrib.auth import get_user_model
+    from apps.notifications.services import WorkfinaFCMService
+
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if not user:
+        return
+
+    result = WorkfinaFCMService.send_to_user(
+        user=user,
+        title=title,
+        body=body,
+        notification_type='CREDIT_UPDATE',
+        data=data
+    )
+    logger.info(f'Sent unlock notification to user {user_id}: {result}')
+
+
+def _queue_unlock_notification(user_id, title, body, data):
+    from server.scheduler import run_in_background
+    transaction.on_commit(lambda: run_in_background(send_unlock_notification, user_id, title, body, data))
+
+
+def unlock_candidate_for_hr(hr_profile, candidate_id, credits_required=UNLOCK_CREDITS_REQUIRED):
+    """
+    Unlock one candidate for an HR profile. Returns (payload, http_status).
+
+    The entitlement decision comes from the cached snapshot; the unlock history row,
+    the credit deduction and its wallet transaction are written in one transaction.
+    A concurrent duplicate unlock hits the unique (hr_user, candidate) constraint and
+    is rolled back without charging. The push is sent after commit, off the request path.
+    """
+    from apps.subscriptions.entitlements import get_entitlements, can_unlock, refresh_entitlements
+    from apps.wallet.ledger import debit_credits
+    from apps.wallet.models import Wallet
+
+    candidate = full_profile_queryset().filter(id=candidate_id, is_active=True).first()
+    if not candidate:
+        return {'error': 'Candidate not found'}, status.HTTP_404_NOT_FOUND
+
+    already_unlocked = {
+        'success': True,
+        'message': 'Already unlocked',
+        'candidate': None,
+        'already_unlocked': True
+    }
+
+    entitlements = get_entitlements(hr_profile)
+    if not entitlements['wallet_id'] or not can_unlock(entitlements, credits_required):
+        # The cached snapshot may predate a top-up or a new subscription
+        entitlements = refresh_entitlements(hr_profile)
+    if not entitlements['wallet_id'] or not can_unlock(entitlements, credits_required):
+        # Nothing to charge for a candidate unlocked earlier, whatever the wallet holds now
+        if UnlockHistory.objects.filter(hr_user=hr_profile, candidate=candidate).exists():
+            already_unlocked['candidate'] = FullCandidateSerializer(candidate).data
+            return already_unlocked, status.HTTP_200_OK
+        if not entitlements['wallet_id']:
+            return {'error': 'Wallet not found. Please contact support.'}, status.HTTP_400_BAD_REQUEST
+        return {
+            'error': f'Insufficient credits. You need {credits_required} credits but have {entitlements["balance"]}.',
+            'required_credits': credits_required,
+            'current_balance': entitlements['balance']
+        }, status.HTTP_400_BAD_REQUEST
+
+    # The ledger refreshes balance/total_spent, so the wallet row need not be fetched first
+    wallet = Wallet(pk=entitlements['wallet_id'], hr_profile_id=hr_profile.pk)
+
+    try:
+        with transaction.atomic():
+            UnlockHistory.objects.create(
+                hr_user=hr_profile,
+                candidate=candidate,
+                credits_used=credits_required
+            )
+            entry = debit_credits(
+                wallet,
+                credits_required,
+                description=f'Unlocked candidate: {candidate.masked_name}'
+            )
+            if entry is None:
+                raise InsufficientCredits
+    except IntegrityError:
+        already_unlocked['candidate'] = FullCandidateSerializer(candidate).data
+        return already_unlocked, status.HTTP_200_OK
+    except InsufficientCredits:
+        # Spent concurrently between the snapshot check and the deduction
+        wallet.refresh_from_db(fields=['balance'])
+        return {
+            'error': 'Failed to deduct credits. Please try again.',
+            'retryable': True,
+            'required_credits': credits_required,
+            'current_balance': wallet.balance
+        }, status.HTTP_400_BAD_REQUEST
+
+    old_balance = wallet.balance + (credits_required if entry.funded_by == 'WALLET' else 0)
+    notification_data = {
+        'candidate_id': str(candidate.id),
+        'candidate_name': candidate.masked_name,
+        'credits_used': credits_required,
+        'old_balance': old_balance,
+        'new_balance': wallet.balance,
+        'action': 'unlock_profile'
+    }
+
+    _queue_unlock_notification(
+        hr_profile.user_id,
+        f"Profile Unlocked! 🔓",
+        f"You unlocked {candidate.masked_name}'s profile for {credits_required} credits. Balance: {wallet.balance}",
+        notification_data
+    )
+
+    return {
+        'success': True,
+        'message': 'Profile unlocked successfully',
+        'candidate': FullCandidateSerializer(candidate).data,
+        'credits_used': credits_required,
+        'remaining_balance': wallet.balance,
+        'already_unlocked': False
+    }, status.HTTP_200_OK
+
+
+def bulk_unlock_candidates_for_hr(hr_profile, candidate_ids, credits_required=UNLOCK_CREDITS_REQUIRED):
+    """
+    Unlock several candidates at once. Returns (payload, http_status).
+
+    Entitlement is checked once for the whole batch, the credits are deducted with one
+    conditional UPDATE and the UnlockHistory/WalletTransaction rows are bulk-created in
+    the same transaction: either every requested candidate is unlocked or none is.
+    Candidates already unlocked are returned without charging; one summary push is sent.
+    """
+    from apps.subscriptions.entitlements import get_entitlements, can_unlock, refresh_entitlements
+    from apps.wallet.ledger import debit_credits_many
+    from apps.wallet.models import Wallet
+    from server.runtime_config import bump_on_commit
+
+    candidate_ids = list(dict.fromkeys(str(candidate_id) for candidate_id in candidate_ids))
+    candidates = {
+        str(candidate.id): candidate
+        for candidate in full_profile_queryset().filter(id__in=candidate_ids, is_active=True)
+    }
+    not_found = [candidate_id for candidate_id in candidate_ids if candidate_id not in candidates]
+
+    already_unlocked = {
+        str(candidate_id) for candidate_id in UnlockHistory.objects.filter(
+            hr_user=hr_profile,
+            candidate_id__in=list(candidates)
+        ).values_list('candidate_id', flat=True)
+    }
+    to_unlock = [candidates[candidate_id] for candidate_id in candidate_ids
+                 if candidate_id in candidates and candidate_id not in already_unlocked]
+    total_credits = credits_required * len(to_unlock)
+
+    entitlements = get_entitlements(hr_profile)
+    if not entitlements['wallet_id'] or not can_unlock(entitlements, total_credits):
+        # The cached snapshot may predate a top-up or a new subscription
+        entitlements = refresh_entitlements(hr_profile)
+    if not entitlements['wallet_id']:
+        return {'error': 'Wallet not found. Please contact support.'}, status.HTTP_400_BAD_REQUEST
+
+    wallet = Wallet(pk=entitlements['wallet_id'], hr_profile_id=hr_profile.pk, balance=entitlements['balance'])
+
+    if to_unlock:
+        if not can_unlock(entitlements, total_credits):
+            return {
+                'error': f'Insufficient credits. You need {total_credits} credits to unlock {len(to_unlock)} candidates but have {entitlements["balance"]}.',
+                'required_credits': total_credits,
+                'current_balance': entitlements['balance']
+            }, status.HTTP_400_BAD_REQUEST
+
+        try:
+            with transaction.atomic():
+                UnlockHistory.objects.bulk_create([
+                    UnlockHistory(hr_user=hr_profile, candidate=candidate, credits_used=credits_required)
+                    for candidate in to_unlock
+                ])
+                entries = debit_credits_many(
+                    wallet,
+                    credits_required,
+                    [f'Unlocked candidate: {candidate.masked_name}' for candidate in to_unlock]
+                )
+                if entries is None:
+                    raise InsufficientCredits
+                # bulk_create skips post_save, so retire this HR's unlock counts here
+                bump_on_commit(HR_UNLOCKS_STAMP.format(hr_profile.pk))
+        except IntegrityError:
+            return {
+                'error': 'Some of these candidates were unlocked by another request. Please try again.'
+            }, status.HTTP_409_CONFLICT
+        except InsufficientCredits:
+            wallet.refresh_from_db(fields=['balance'])
+            return {
+                'error': 'Failed to deduct credits. Please try again.',
+                'retryable': True,
+                'required_credits': total_credits,
+                'current_balance': wallet.balance
+            }, status.HTTP_400_BAD_REQUEST
+
+        old_balance = wallet.balance + (total_credits if entries[0].funded_by == 'WALLET' else 0)
+        plural = 's' if len(to_unlock) > 1 else ''
+        _queue_unlock_notification(
+            hr_profile.user_id,
+            f"{len(to_unlock)} Profile{plural} Unlocked! 🔓",
+            f"You unlocked {len(to_unlock)} profile{plural} for {total_credits} credits. Balance: {wallet.balance}",
+            {
+                'candidate_ids': [str(candidate.id) for candidate in to_unlock],
+                'credits_used': total_credits,
+                'old_balance': old_balance,
+                'new_balance': wallet.balance,
+                'action': 'bulk_unlock_profiles'
+            }
+        )
+
+    found = [candidates[candidate_id] for candidate_id in candidate_ids if candidate_id in candidates]
+    return {
+        'success': True,
+        'message': f'{len(to_unlock)} profiles unlocked successfully',
+        'candidates': FullCandidateSerializer(found, many=True).data,
+        'unlocked': [str(candidate.id) for candidate in to_unlock],
+        'already_unlocked': [candidate_id for candidate_id in candidate_ids if candidate_id in already_unlocked],
+        'not_found': not_found,
+        'credits_used': total_credits,
+        'remaining_balance': wallet.balance
+    }, status.HTTP_200_OK
+
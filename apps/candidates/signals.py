@@ -1,7 +1,8 @@
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
+from django.db import transaction
 from django.utils import timezone
-from .models import Candidate, CandidateFollowup
+from .models import Candidate, CandidateFollowup, UnlockHistory, FilterCategory, FilterOption
 from apps.notifications.models import UserNotification, NotificationTemplate, NotificationLog, ProfileStepReminder
 
 # Cache previous step values to detect changes
@@ -195,4 +196,23 @@ def schedule_followup_reminder(sender, instance, created, **kwargs):
 def cancel_followup_reminder(sender, instance, **kwargs):
     """Cancel scheduled notification when followup is deleted"""
     from server.scheduler import cancel_followup_notification
-    cancel_followup_notification(instance.id)
\ No newline at end of file
+    cancel_followup_notification(instance.id)
+
+
+@receiver(post_save, sender=UnlockHistory)
+@receiver(post_delete, sender=UnlockHistory)
+def bump_hr_unlocks_stamp(sender, instance, **kwargs):
+    """Unlock counts in get_filter_categories are per HR, so move that HR's version stamp"""
+    from server.runtime_config import bump_on_commit
+    from .services import HR_UNLOCKS_STAMP
+    bump_on_commit(HR_UNLOCKS_STAMP.format(instance.hr_user_id))
+
+
+@receiver(post_save, sender=FilterCategory)
+@receiver(post_delete, sender=FilterCategory)
+@receiver(post_save, sender=FilterOption)
+@receiver(post_delete, sender=FilterOption)
+def rebuild_taxonomy_snapshot(sender, instance, **kwargs):
+    """Precompute the taxonomy snapshot and deltas once the change is committed"""
+    from .taxonomy import schedule_taxonomy_snapshot
+    transaction.on_commit(schedule_taxonomy_snapshot)
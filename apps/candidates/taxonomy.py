@@ -0,0 +1,225 @@
+import gzip
+import json
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Cached gzip delta document from since_version to the current version
+DELTA_CACHE_KEY = 'taxonomy_delta:{}:{}'
+
+# (rows, removed ids) keys of a change set
+CHANGE_KINDS = (('categories', 'removed_categories'), ('options', 'removed_options'))
+
+
+def _compress(data):
+    return gzip.compress(json.dumps(data, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+def _decompress(blob):
+    return json.loads(gzip.decompress(bytes(blob)))
+
+
+def collect_taxonomy():
+    """
+    Active categories and their active, approved options as rows keyed by id, in display order.
+    Icons are relative media URLs since the document is shared by every host.
+    """
+    from .models import FilterCategory, FilterOption
+
+    def icon_url(model, name):
+        return model._meta.get_field('icon').storage.url(name) if name else None
+
+    categories = {}
+    for row in FilterCategory.objects.filter(is_active=True).order_by('display_order', 'name').values(
+        'id', 'name', 'slug', 'icon', 'display_order', 'bento_grid', 'dashboard_display', 'inner_filter'
+    ):
+        row['id'] = str(row['id'])
+        row['icon'] = icon_url(FilterCategory, row['icon'])
+        categories[row['id']] = row
+
+    options = {}
+    for row in FilterOption.objects.filter(
+        category__is_active=True,
+        is_active=True,
+        is_approved=True
+    ).order_by('category__display_order', 'display_order', 'name').values(
+        'id', 'category_id', 'name', 'slug', 'parent_id', 'icon', 'display_order'
+    ):
+        row['id'] = str(row['id'])
+        row['category_id'] = str(row['category_id'])
+        row['parent_id'] = str(row['parent_id']) if row['parent_id'] else None
+        row['icon'] = icon_url(FilterOption, row['icon'])
+        options[row['id']] = row
+
+    return categories, options
+
+
+def _index(document):
+    return (
+        {row['id']: row for row in document['categories']},
+        {row['id']: row for row in document['options']},
+    )
+
+
+def diff_taxonomy(old, new):
+    """Change set from old to new ((categories, options) dicts): added/changed rows and removed ids"""
+    changes = {}
+    for (kind, removed_kind), old_rows, new_rows in zip(CHANGE_KINDS, old, new):
+        changes[kind] = [row for row_id, row in new_rows.items() if old_rows.get(row_id) != row]
+        changes[removed_kind] = [row_id for row_id in old_rows if row_id not in new_rows]
+    return changes
+
+
+def merge_changes(older, newer):
+    """One change set equivalent to applying older and then newer"""
+    merged = {}
+    for kind, removed_kind in CHANGE_KINDS:
+        rows = {row['id']: row for row in older[kind]}
+        removed = set(older[removed_kind])
+        for row_id in newer[removed_kind]:
+            rows.pop(row_id, None)
+            removed.add(row_id)
+        for row in newer[kind]:
+            rows[row['id']] = row
+            removed.discard(row['id'])
+        merged[kind] = list(rows.values())
+        merged[removed_kind] = sorted(removed)
+    return merged
+
+
+def _empty_changes():
+    return {key: [] for kinds in CHANGE_KINDS for key in kinds}
+
+
+def _delta_document(changes, since_version, version):
+    return {'version': version, 'since_version': since_version, **changes}
+
+
+def build_taxonomy_snapshot():
+    """
+    Store a new snapshot if the taxonomy changed since the latest one, and return the latest.
+    Builds are serialised on the latest row, so each change set is against its predecessor;
+    with no row to lock yet, concurrent first builds race on the unique version instead.
+    """
+    from .models import TaxonomySnapshot
+
+    try:
+        return _build_taxonomy_snapshot()
+    except IntegrityError:
+        # Another build stored this version first, from the same or a newer taxonomy
+        logger.info('Taxonomy snapshot built concurrently, using the stored one')
+        return TaxonomySnapshot.objects.order_by('-version').first()
+
+
+def _build_taxonomy_snapshot():
+    from .models import TaxonomySnapshot
+
+    with transaction.atomic():
+        previous = TaxonomySnapshot.objects.select_for_update().order_by('-version').first()
+        categories, options = collect_taxonomy()
+        old = _index(_decompress(previous.document)) if previous else ({}, {})
+
+        changes = diff_taxonomy(old, (categories, options))
+        if previous and not any(changes.values()):
+            return previous
+
+        version = previous.version + 1 if previous else 1
+        snapshot = TaxonomySnapshot.objects.create(
+            version=version,
+            document=_compress({
+                'version': version,
+                'generated_at': timezone.now().isoformat(),
+                'categories': list(categories.values()),
+                'options': list(options.values()),
+            }),
+            changes=_compress(changes),
+            category_count=len(categories),
+            option_count=len(options)
+        )
+
+        retention = getattr(settings, 'TAXONOMY_SNAPSHOT_RETENTION', 50)
+        TaxonomySnapshot.objects.filter(version__lte=version - retention).delete()
+
+    transaction.on_commit(lambda: precompute_deltas(version))
+    logger.info(f'Taxonomy snapshot v{version}: {len(categories)} categories, {len(options)} options')
+    return snapshot
+
+
+def precompute_deltas(version):
+    """Cache the delta from every retained version to version, walking the change sets newest first"""
+    from .models import TaxonomySnapshot
+
+    timeout = getattr(settings, 'TAXONOMY_DELTA_CACHE_SECONDS', 86400)
+    merged = _empty_changes()
+    for since_version, changes in TaxonomySnapshot.objects.filter(
+        version__lte=version
+    ).order_by('-version').values_list('version', 'changes').iterator():
+        # merged holds the changes after since_version up to version
+        cache.set(
+            DELTA_CACHE_KEY.format(since_version, version),
+            _compress(_delta_document(merged, since_version, version)),
+            timeout
+        )
+        merged = merge_changes(_decompress(changes), merged)
+
+
+def latest_snapshot():
+    """Latest snapshot without its change set, built on first use"""
+    from .models import TaxonomySnapshot
+
+    snapshot = TaxonomySnapshot.objects.defer('changes').order_by('-version').first()
+    return snapshot or build_taxonomy_snapshot()
+
+
+def taxonomy_delta_since(since_version, version):
+    """
+    gzip delta document from since_version to version, or None when since_version is
+    unknown or older than the retained snapshots (the client must download the snapshot).
+    """
+    from .models import TaxonomySnapshot
+
+    key = DELTA_CACHE_KEY.format(since_version, version)
+    blob = cache.get(key)
+    if blob is not None:
+        return blob
+
+    if since_version > version or not TaxonomySnapshot.objects.filter(version=since_version).exists():
+        return None
+
+    merged = _empty_changes()
+    for changes in TaxonomySnapshot.objects.filter(
+        version__gt=since_version,
+        version__lte=version
+    ).order_by('version').values_list('changes', flat=True).iterator():
+        merged = merge_changes(merged, _decompress(changes))
+
+    blob = _compress(_delta_document(merged, since_version, version))
+    cache.set(key, blob, getattr(settings, 'TAXONOMY_DELTA_CACHE_SECONDS', 86400))
+    return blob
+
+
+def schedule_taxonomy_snapshot():
+    """Rebuild the snapshot in the background once a burst of taxonomy writes has settled"""
+    from server.scheduler import get_scheduler
+
+    get_scheduler().add_job(
+        build_taxonomy_snapshot,
+        'date',
+        run_date=timezone.now() + timedelta(seconds=getattr(settings, 'TAXONOMY_SNAPSHOT_DELAY_SECONDS', 5)),
+        id='build_taxonomy_snapshot',
+        replace_existing=True,
+        misfire_grace_time=None
+    )
+
+
+def taxonomy_changed():
+    """For writes that skip post_save (queryset.update): retire ETags and rebuild the snapshot"""
+    from server.runtime_config import bump_on_commit
+
+    bump_on_commit('filter_taxonomy')
+    transaction.on_commit(schedule_taxonomy_snapshot)
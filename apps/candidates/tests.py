@@ -1,3 +1,240 @@
+import hashlib
+import json
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from apps.authentication.tokens import WorkfinaRefreshToken
+from apps.subscriptions.entitlements import get_entitlements
+from apps.wallet.models import Wallet, WalletTransaction
+from .models import Candidate, FilterCategory, TaxonomySnapshot, UnlockHistory
+from .services import bulk_unlock_candidates_for_hr, unlock_candidate_for_hr
+from .taxonomy import build_taxonomy_snapshot, merge_changes
+
+User = get_user_model()
+
+
+def create_candidate(index):
+    user = User.objects.create_user(email=f'candidate{index}@example.com', password='x', role='candidate')
+    return Candidate.objects.create(
+        user=user,
+        first_name='Test',
+        last_name=f'Candidate{index}',
+        masked_name=f'T*** C{index}',
+        phone='9999999999',
+        age=25,
+        experience_years=2,
+        street_address='Street',
+        is_available_for_hiring=True
+    )
+
+
+class UnlockTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('server.scheduler.run_in_background')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.hr_user = User.objects.create_user(email='hr@example.com', password='x', role='hr')
+        self.hr_profile = self.hr_user.hr_profile
+        self.wallet = Wallet.objects.create(hr_profile=self.hr_profile, balance=20)
+        self.candidates = [create_candidate(index) for index in range(3)]
+
+    def _set_balance_behind_cache(self, balance):
+        """Balance changed by a write this process's cached snapshot does not know about"""
+        get_entitlements(self.hr_profile)
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=balance)
+
+
+class UnlockCandidateTests(UnlockTestCase):
+    def test_unlock_charges_once(self):
+        candidate = self.candidates[0]
+        payload, http_status = unlock_candidate_for_hr(self.hr_profile, candidate.id)
+        self.assertEqual(http_status, 200)
+        self.assertFalse(payload['already_unlocked'])
+        self.assertEqual(payload['remaining_balance'], 10)
+
+        payload, http_status = unlock_candidate_for_hr(self.hr_profile, candidate.id)
+        self.assertTrue(payload['already_unlocked'])
+        self.assertEqual(WalletTransaction.objects.count(), 1)
+
+    def test_cached_denial_rechecked_against_database(self):
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=0)
+        self._set_balance_behind_cache(50)
+
+        payload, http_status = unlock_candidate_for_hr(self.hr_profile, self.candidates[0].id)
+        self.assertEqual(http_status, 200)
+        self.assertEqual(payload['remaining_balance'], 40)
+
+    def test_insufficient_credits_refused(self):
+        self._set_balance_behind_cache(5)
+
+        payload, http_status = unlock_candidate_for_hr(self.hr_profile, self.candidates[0].id)
+        self.assertEqual(http_status, 400)
+        self.assertEqual(payload['current_balance'], 5)
+        self.assertFalse(UnlockHistory.objects.exists())
+
+    def test_already_unlocked_without_wallet(self):
+        candidate = self.candidates[0]
+        unlock_candidate_for_hr(self.hr_profile, candidate.id)
+        self.wallet.delete()
+
+        payload, http_status = unlock_candidate_for_hr(self.hr_profile, candidate.id)
+        self.assertEqual(http_status, 200)
+        self.assertTrue(payload['already_unlocked'])
+
+        payload, http_status = unlock_candidate_for_hr(self.hr_profile, self.candidates[1].id)
+        self.assertEqual(http_status, 400)
+        self.assertEqual(payload['error'], 'Wallet not found. Please contact support.')
+
+
+class BulkUnlockTests(UnlockTestCase):
+    def test_bulk_unlock_is_all_or_nothing(self):
+        ids = [candidate.id for candidate in self.candidates]
+        payload, http_status = bulk_unlock_candidates_for_hr(self.hr_profile, ids)
+        self.assertEqual(http_status, 400)
+        self.assertFalse(UnlockHistory.objects.exists())
+        self.assertFalse(WalletTransaction.objects.exists())
+
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=30)
+        payload, http_status = bulk_unlock_candidates_for_hr(self.hr_profile, ids)
+        self.assertEqual(http_status, 200)
+        self.assertEqual(len(payload['unlocked']), 3)
+        self.assertEqual(UnlockHistory.objects.count(), 3)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, 0)
+
+    def test_already_unlocked_not_charged_again(self):
+        unlock_candidate_for_hr(self.hr_profile, self.candidates[0].id)
+
+        payload, http_status = bulk_unlock_candidates_for_hr(
+            self.hr_profile, [self.candidates[0].id, self.candidates[1].id]
+        )
+        self.assertEqual(http_status, 200)
+        self.assertEqual(payload['already_unlocked'], [str(self.candidates[0].id)])
+        self.assertEqual(payload['credits_used'], 10)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, 0)
+
+    def test_concurrent_duplicate_rolls_back_whole_batch(self):
+        ids = [self.candidates[0].id, self.candidates[1].id]
+        # Another request unlocks a candidate after this one read the unlock history
+        original_bulk_create = UnlockHistory.objects.bulk_create
+
+        def bulk_create(objs, *args, **kwargs):
+            UnlockHistory.objects.create(hr_user=self.hr_profile, candidate=self.candidates[1], credits_used=10)
+            return original_bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(UnlockHistory.objects, 'bulk_create', bulk_create):
+            payload, http_status = bulk_unlock_candidates_for_hr(self.hr_profile, ids)
+        self.assertEqual(http_status, 409)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, 20)
+        self.assertFalse(WalletTransaction.objects.exists())
+
+
+class IdempotentUnlockTests(UnlockTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        token = WorkfinaRefreshToken.for_user(self.hr_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+
+    def _unlock(self, candidate, key='key-1'):
+        return self.client.post(f'/api/candidates/{candidate.id}/unlock/', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_original_response(self):
+        first = self._unlock(self.candidates[0])
+        retry = self._unlock(self.candidates[0])
+
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(WalletTransaction.objects.count(), 1)
+
+    def test_key_reused_for_other_request_rejected(self):
+        self._unlock(self.candidates[0])
+        self.assertEqual(self._unlock(self.candidates[1]).status_code, 422)
+
+    def test_in_flight_key_conflicts_and_is_not_stored(self):
+        digest = hashlib.sha256(b'key-1').hexdigest()
+        lock_key = f'idempotency:unlock_candidate:{self.hr_user.pk}:{digest}:lock'
+        cache.add(lock_key, True)
+        self.assertEqual(self._unlock(self.candidates[0]).status_code, 409)
+
+        cache.delete(lock_key)
+        response = self._unlock(self.candidates[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+
+    def test_lost_deduction_race_can_be_retried(self):
+        with mock.patch('apps.wallet.ledger.debit_credits', return_value=None):
+            response = self._unlock(self.candidates[0])
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.data['retryable'])
+
+        response = self._unlock(self.candidates[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['already_unlocked'])
+
+
+class TaxonomySyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = FilterCategory.objects.create(name='Department', slug='department')
+        build_taxonomy_snapshot()
+
+    def test_merge_keeps_latest_state_of_each_row(self):
+        older = {'categories': [{'id': 'a'}], 'removed_categories': ['b'], 'options': [], 'removed_options': []}
+        newer = {'categories': [{'id': 'b'}], 'removed_categories': ['a'], 'options': [], 'removed_options': []}
+
+        merged = merge_changes(older, newer)
+        self.assertEqual(merged['categories'], [{'id': 'b'}])
+        self.assertEqual(merged['removed_categories'], ['a'])
+
+    def test_delta_since_previous_version(self):
+        self.category.name = 'Departments'
+        self.category.save()
+        other = FilterCategory.objects.create(name='Religion', slug='religion')
+        self.assertEqual(build_taxonomy_snapshot().version, 2)
+
+        response = self.client.get('/api/candidates/taxonomy/delta/', {'since_version': 1})
+        self.assertEqual(response.status_code, 200)
+        delta = json.loads(response.content)
+        self.assertEqual(
+            sorted(row['name'] for row in delta['categories']),
+            ['Departments', 'Religion']
+        )
+        self.assertEqual(delta['removed_categories'], [])
+        self.assertEqual(response['X-Taxonomy-Version'], '2')
+
+    def test_unknown_and_future_versions(self):
+        response = self.client.get('/api/candidates/taxonomy/delta/', {'since_version': 0})
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.data['full_sync_required'])
+
+        response = self.client.get('/api/candidates/taxonomy/delta/', {'since_version': 5})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unchanged_snapshot_answers_not_modified(self):
+        response = self.client.get('/api/candidates/taxonomy/')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/api/candidates/taxonomy/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        FilterCategory.objects.create(name='Religion', slug='religion')
+        build_taxonomy_snapshot()
+        response = self.client.get('/api/candidates/taxonomy/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_concurrent_first_builds_share_one_version(self):
+        # Nothing to lock yet: this build does not see the version another worker just stored
+        with mock.patch.object(TaxonomySnapshot.objects, 'select_for_update', TaxonomySnapshot.objects.none):
+            snapshot = build_taxonomy_snapshot()
+        self.assertEqual(snapshot.version, 1)
+        self.assertEqual(TaxonomySnapshot.objects.count(), 1)
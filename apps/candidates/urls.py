@@ -11,6 +11,7 @@ urlpatterns = [
     path('availability/update/', update_candidate_availability, name='update-candidate-availability'),
     path('list/', CandidateListView.as_view(), name='candidate-list'),
     path('<uuid:candidate_id>/unlock/', unlock_candidate, name='unlock-candidate'),
+    path('unlock/bulk/', bulk_unlock_candidates, name='bulk-unlock-candidates'),
     path('unlocked/', get_unlocked_candidates, name='unlocked-candidates'),
     path('filter-options/', get_filter_options, name='candidate-filter-options'),
     path('filter-categories/', get_filter_categories, name='filter-categories'),
@@ -27,6 +28,9 @@ urlpatterns = [
     path('save-step/', save_candidate_step, name='save-candidate-step'),
     path('public/filter-options/', get_public_filter_options, name='public-filter-options'),
     path('profile-tips/', get_profile_tips, name='profile-tips'),
+    # Offline taxonomy sync
+    path('taxonomy/', get_taxonomy_snapshot, name='taxonomy-snapshot'),
+    path('taxonomy/delta/', get_taxonomy_delta, name='taxonomy-delta'),
 
 
 
@@ -1,10 +1,11 @@
 from rest_framework import status, generics
 from rest_framework.decorators import api_view, permission_classes,parser_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+import logging
 from datetime import datetime
 from django.utils import timezone
 
@@ -17,12 +18,16 @@ from .serializers import (
     FullCandidateSerializer,
     CandidateNoteSerializer,
     CandidateFollowupSerializer,
-    FilterCategorySerializer
+    FilterCategorySerializer,
+    BulkUnlockSerializer
 )
-from apps.notifications.services import WorkfinaFCMService
+from apps.notifications.services import WorkfinaFCMService, schedule_hr_fanout
 from apps.notifications.models import ProfileStepReminder
-from apps.wallet.models import Wallet
+from server.conditional import conditional_get
+from server.idempotency import idempotent
+from .services import HR_UNLOCKS_STAMP, unlock_candidate_for_hr, bulk_unlock_candidates_for_hr
 
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
@@ -174,7 +179,7 @@ class CandidateListView(generics.ListAPIView):
     def get_serializer(self, *args, **kwargs):
         # Get unlocked candidate IDs for current HR user
         unlocked_ids = UnlockHistory.objects.filter(
-            hr_user=self.request.user.hr_profile
+            hr_user_id=self.request.user.hr_profile_id
         ).values_list('candidate_id', flat=True)
         
         # Use different serializers based on unlock status
@@ -203,8 +208,12 @@ class CandidateListView(generics.ListAPIView):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent('unlock_candidate')
 def unlock_candidate(request, candidate_id):
-    """API to unlock candidate profile using credits - For HR users"""
+    """
+    API to unlock candidate profile using credits - For HR users
+    Retries sending the same Idempotency-Key header get the original response back
+    """
     
     # Only HR users can unlock
     if request.user.role != 'hr':
@@ -212,100 +221,32 @@ def unlock_candidate(request, candidate_id):
             'error': 'Only HR users can unlock candidates'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    try:
-        candidate = Candidate.objects.get(id=candidate_id, is_active=True)
-        
-        # Check if already unlocked
-        if UnlockHistory.objects.filter(hr_user=request.user.hr_profile, candidate=candidate).exists():
-            # Return full data if already unlocked
-            serializer = FullCandidateSerializer(candidate)
-            return Response({
-                'success': True,
-                'message': 'Already unlocked',
-                'candidate': serializer.data,
-                'already_unlocked': True
-            })
+    payload, http_status = unlock_candidate_for_hr(request.user.hr_profile, candidate_id)
+    return Response(payload, status=http_status)
         
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent('bulk_unlock_candidates')
+def bulk_unlock_candidates(request):
+    """
+    API to unlock several candidate profiles in one call - For HR users
+    Body: {"candidate_ids": [...]} (up to BULK_UNLOCK_MAX_CANDIDATES)
+    """
+    if request.user.role != 'hr':
+        return Response({
+            'error': 'Only HR users can unlock candidates'
+        }, status=status.HTTP_403_FORBIDDEN)
 
-        try:
-            wallet = Wallet.objects.get(hr_profile__user=request.user)
-            credits_required = 10
+    serializer = BulkUnlockSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            # Check if user can unlock (checks subscription + wallet)
-            if not wallet.can_unlock(credits_required):
-                return Response({
-                    'error': f'Insufficient credits. You need {credits_required} credits but have {wallet.balance}.',
-                    'required_credits': credits_required,
-                    'current_balance': wallet.balance
-                }, status=status.HTTP_400_BAD_REQUEST)
+    payload, http_status = bulk_unlock_candidates_for_hr(
+        request.user.hr_profile,
+        serializer.validated_data['candidate_ids']
+    )
+    return Response(payload, status=http_status)
 
-            # Deduct credits (handles subscription + wallet automatically)
-            old_balance = wallet.balance
-            if not wallet.deduct_credits(credits_required):
-                return Response({
-                    'error': 'Failed to deduct credits. Please try again.',
-                    'required_credits': credits_required,
-                    'current_balance': wallet.balance
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Create unlock history
-            UnlockHistory.objects.create(
-                hr_user=request.user.hr_profile,
-                candidate=candidate,
-                credits_used=credits_required
-            )
-            
-            # Create wallet transaction
-            from apps.wallet.models import WalletTransaction
-            WalletTransaction.objects.create(
-                wallet=wallet,
-                transaction_type='UNLOCK',
-                credits_used=credits_required,
-                description=f'Unlocked candidate: {candidate.masked_name}'
-            )
-            # Send credit deduction notification
-            try:
-                WorkfinaFCMService.send_to_user(
-                    user=request.user,
-                    title=f"Profile Unlocked! 🔓",
-                    body=f"You unlocked {candidate.masked_name}'s profile for {credits_required} credits. Balance: {wallet.balance}",
-                    notification_type='CREDIT_UPDATE',
-                    data={
-                        'candidate_id': str(candidate.id),
-                        'candidate_name': candidate.masked_name,
-                        'credits_used': credits_required,
-                        'old_balance': old_balance,
-                        'new_balance': wallet.balance,
-                        'action': 'unlock_profile'
-                    }
-                )
-                print(f'[DEBUG] Sent unlock notification to {request.user.email}')
-            except Exception as e:
-                print(f'[DEBUG] Failed to send unlock notification: {str(e)}')
-            
-                       
-            
-            # Return full candidate data
-            serializer = FullCandidateSerializer(candidate)
-            return Response({
-                'success': True,
-                'message': 'Profile unlocked successfully',
-                'candidate': serializer.data,
-                'credits_used': credits_required,
-                'remaining_balance': wallet.balance,
-                'already_unlocked': False
-            })
-            
-        except Wallet.DoesNotExist:
-            return Response({
-                'error': 'Wallet not found. Please contact support.'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-    except Candidate.DoesNotExist:
-        return Response({
-            'error': 'Candidate not found'
-        }, status=status.HTTP_404_NOT_FOUND)
-        
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_unlocked_candidates(request):
@@ -317,7 +258,7 @@ def get_unlocked_candidates(request):
         }, status=status.HTTP_403_FORBIDDEN)
     
     unlocked_histories = UnlockHistory.objects.filter(
-        hr_user=request.user.hr_profile
+        hr_user_id=request.user.hr_profile_id
     ).select_related('candidate')
     
     unlocked_candidates = []
@@ -532,7 +473,7 @@ def get_filter_options(request):
     
     # Get unlocked candidate IDs for current HR user
     unlocked_ids = set(UnlockHistory.objects.filter(
-        hr_user=request.user.hr_profile
+        hr_user_id=request.user.hr_profile_id
     ).values_list('candidate_id', flat=True))
     
     # Map filter_type to correct field name
@@ -731,8 +672,14 @@ def get_filter_options(request):
     
     return Response({'results': results})
 
+def _filter_category_stamps(request):
+    """Version stamps for get_filter_categories: taxonomy, candidate counts and this HR's unlocks"""
+    hr_profile = getattr(request.user, 'hr_profile', None)
+    return ['filter_taxonomy', 'candidates', HR_UNLOCKS_STAMP.format(hr_profile.pk if hr_profile else None)]
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(_filter_category_stamps)
 def get_filter_categories(request):
     """Get all filter categories with subcategories and candidate counts"""
 
@@ -762,7 +709,7 @@ def get_filter_categories(request):
     }
     
     unlocked_ids = set(UnlockHistory.objects.filter(
-        hr_user=request.user.hr_profile
+        hr_user_id=request.user.hr_profile_id
     ).values_list('candidate_id', flat=True))
 
     results = []
@@ -923,7 +870,7 @@ def add_candidate_note(request, candidate_id, note_id=None):
         candidate = Candidate.objects.get(id=candidate_id, is_active=True)
 
         # Check if HR has unlocked this candidate
-        if not UnlockHistory.objects.filter(hr_user=request.user.hr_profile, candidate=candidate).exists():
+        if not UnlockHistory.objects.filter(hr_user_id=request.user.hr_profile_id, candidate=candidate).exists():
             return Response({
                 'error': 'Candidate must be unlocked to manage notes'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -988,7 +935,7 @@ def add_candidate_followup(request, candidate_id, followup_id=None):
         candidate = Candidate.objects.get(id=candidate_id, is_active=True)
 
         # Check if HR has unlocked this candidate
-        if not UnlockHistory.objects.filter(hr_user=request.user.hr_profile, candidate=candidate).exists():
+        if not UnlockHistory.objects.filter(hr_user_id=request.user.hr_profile_id, candidate=candidate).exists():
             return Response({
                 'error': 'Candidate must be unlocked to manage followups'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -1053,7 +1000,7 @@ def get_candidate_notes_followups(request, candidate_id):
         candidate = Candidate.objects.get(id=candidate_id, is_active=True)
         
         # Check if HR has unlocked this candidate
-        if not UnlockHistory.objects.filter(hr_user=request.user.hr_profile, candidate=candidate).exists():
+        if not UnlockHistory.objects.filter(hr_user_id=request.user.hr_profile_id, candidate=candidate).exists():
             return Response({
                 'error': 'Candidate must be unlocked to view notes and followups'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -1522,6 +1469,7 @@ def save_candidate_step(request):
     
 
 @api_view(['GET'])
+@conditional_get(['filter_taxonomy'], public=True)
 def get_public_filter_options(request):
     """Get department and religion options - publicly accessible"""
     
@@ -1603,9 +1551,9 @@ def get_candidate_availability(request):
             # Show prompt only if current date is different from last update date
             should_show_prompt = current_date != last_update_date
 
-        # Get dynamic UI configuration from HiringAvailabilityUI model
-        from apps.candidates.models import HiringAvailabilityUI
-        ui_config = HiringAvailabilityUI.objects.filter(is_active=True).first()
+        # Get dynamic UI configuration from HiringAvailabilityUI model (runtime config cache)
+        from server.runtime_config import get_config
+        ui_config = get_config('hiring_availability_ui')
 
         # Default UI configuration
         default_config = {
@@ -1779,35 +1727,10 @@ def update_candidate_availability(request):
         candidate.save()
 
         # If candidate marked themselves as NOT available (hired/unavailable)
-        # Notify all recruiters who unlocked this candidate
+        # Notify all recruiters who unlocked this candidate, in the background
         if old_availability and not is_available:
-            try:
-                # Get all HR users who unlocked this candidate
-                unlocked_hrs = UnlockHistory.objects.filter(
-                    candidate=candidate
-                ).select_related('hr_user__user')
-
-                # Send notification to each HR
-                for unlock_history in unlocked_hrs:
-                    hr_user = unlock_history.hr_user.user
-                    try:
-                        WorkfinaFCMService.send_to_user(
-                            user=hr_user,
-                            title="Candidate No Longer Available",
-                            body=f"{candidate.masked_name} is no longer available for hiring opportunities.",
-                            notification_type='CANDIDATE_UNAVAILABLE',
-                            data={
-                                'candidate_id': str(candidate.id),
-                                'candidate_name': candidate.masked_name,
-                                'is_available': False,
-                                'action': 'candidate_unavailable'
-                            }
-                        )
-                        print(f'[DEBUG] Sent unavailability notification to HR: {hr_user.email}')
-                    except Exception as e:
-                        print(f'[DEBUG] Failed to send notification to HR {hr_user.email}: {str(e)}')
-            except Exception as e:
-                print(f'[DEBUG] Error notifying HRs about candidate unavailability: {str(e)}')
+            schedule_hr_fanout(WorkfinaFCMService.notify_hrs_about_unavailable_candidate, candidate.id)
+            logger.info(f'Queued unavailability notifications for candidate {candidate.id}')
 
         return Response({
             'success': True,
@@ -1835,7 +1758,7 @@ def update_candidate_hiring_status(request, candidate_id):
         candidate = Candidate.objects.get(id=candidate_id, is_active=True)
         
         # Check if HR has unlocked this candidate
-        if not UnlockHistory.objects.filter(hr_user=request.user.hr_profile, candidate=candidate).exists():
+        if not UnlockHistory.objects.filter(hr_user_id=request.user.hr_profile_id, candidate=candidate).exists():
             return Response({
                 'error': 'Candidate must be unlocked to update hiring status'
             }, status=403)
@@ -1882,12 +1805,9 @@ def update_candidate_hiring_status(request, candidate_id):
             except Exception as e:
                 print(f'[DEBUG] Failed to send hiring notification to candidate: {str(e)}')
             
-            # Notify other HRs who unlocked this candidate
-            try:
-                WorkfinaFCMService.notify_hrs_about_hired_candidate(candidate)
-                print(f'[DEBUG] Notified other HRs about hired candidate {candidate.masked_name}')
-            except Exception as e:
-                print(f'[DEBUG] Failed to notify HRs about hired candidate: {str(e)}')
+            # Notify other HRs who unlocked this candidate, in the background
+            schedule_hr_fanout(WorkfinaFCMService.notify_hrs_about_hired_candidate, candidate.id)
+            logger.info(f'Queued hired notifications to HRs for candidate {candidate.id}')
         
         return Response({
             'success': True,
@@ -1903,6 +1823,7 @@ def update_candidate_hiring_status(request, candidate_id):
     
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(['profile_tips'])
 def get_profile_tips(request):
     """Get active profile tips for candidate dashboard"""
     
@@ -1912,18 +1833,8 @@ def get_profile_tips(request):
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        tips = ProfileTip.objects.filter(is_active=True).order_by('display_order')
-        
-        tips_data = []
-        for tip in tips:
-            tips_data.append({
-                'id': str(tip.id),
-                'title': tip.title,
-                'subtitle': tip.subtitle,
-                'icon_type': tip.icon_type,
-                'instructions': tip.instructions,
-                'display_order': tip.display_order
-            })
+        from server.runtime_config import get_config
+        tips_data = get_config('profile_tips')
         
         return Response({
             'success': True,
@@ -1938,6 +1849,7 @@ def get_profile_tips(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(['filter_taxonomy'])
 def search_countries(request):
     """
     Search countries for autocomplete/autosuggest
@@ -1994,6 +1906,7 @@ def search_countries(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(['filter_taxonomy'])
 def search_states(request):
     """
     Search states for autocomplete/autosuggest
@@ -2060,6 +1973,7 @@ def search_states(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(['filter_taxonomy'])
 def search_cities(request):
     """
     Search cities for autocomplete/autosuggest
@@ -2129,3 +2043,83 @@ def search_cities(request):
             'error': 'City category not found'
         }, status=status.HTTP_404_NOT_FOUND)
 
+
+
+def _gzip_json_response(request, blob):
+    """Send a pre-compressed JSON document as is when the client accepts gzip, decompressed otherwise"""
+    import gzip
+    from django.http import HttpResponse
+    from django.utils.cache import patch_vary_headers
+
+    blob = bytes(blob)
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = HttpResponse(blob, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(blob), content_type='application/json')
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@conditional_get(['taxonomy_snapshot'], public=True)
+def get_taxonomy_snapshot(request):
+    """
+    Whole filter taxonomy (categories and options, including states and cities) as one
+    versioned document, so the apps can sync once and filter offline.
+    Pre-serialized and sent gzip-compressed; keep the version for delta syncs.
+    """
+    from server.runtime_config import get_config
+
+    snapshot = get_config('taxonomy_snapshot')
+    response = _gzip_json_response(request, snapshot.document)
+    response['X-Taxonomy-Version'] = snapshot.version
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@conditional_get(['taxonomy_snapshot'], public=True)
+def get_taxonomy_delta(request):
+    """
+    Taxonomy changes since the version the client holds
+    Query params:
+    - since_version: taxonomy version from the last sync (required)
+
+    Returns:
+    - Added or changed categories/options and the ids of removed (deactivated) ones
+    - 400 when since_version is ahead of the current version
+    - 410 when since_version is no longer retained: download the snapshot again
+    """
+    from server.runtime_config import get_config
+    from .taxonomy import taxonomy_delta_since
+
+    try:
+        since_version = int(request.query_params.get('since_version', ''))
+    except ValueError:
+        return Response({
+            'success': False,
+            'error': 'since_version is required and must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    snapshot = get_config('taxonomy_snapshot')
+    if since_version > snapshot.version:
+        return Response({
+            'success': False,
+            'error': f'since_version is ahead of the current taxonomy version {snapshot.version}',
+            'version': snapshot.version
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    blob = taxonomy_delta_since(since_version, snapshot.version)
+    if blob is None:
+        return Response({
+            'success': False,
+            'error': 'since_version is too old or unknown, download the full taxonomy',
+            'full_sync_required': True,
+            'version': snapshot.version
+        }, status=status.HTTP_410_GONE)
+
+    response = _gzip_json_response(request, blob)
+    response['X-Taxonomy-Version'] = snapshot.version
+    return response
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class ContentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.content'
\ No newline at end of file
+    name = 'apps.content'
+
+    def ready(self):
+        # Connects the runtime config cache's invalidation receivers in every process
+        import server.runtime_config
\ No newline at end of file
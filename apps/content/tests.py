@@ -1,3 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from apps.authentication.tokens import WorkfinaRefreshToken
+from .models import DashboardContent
+
+User = get_user_model()
+
+
+class DashboardConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = self._client('c@example.com')
+
+    def _client(self, email):
+        user = User.objects.create_user(email=email, password='x', role='candidate')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {WorkfinaRefreshToken.for_user(user).access_token}')
+        return client
+
+    def test_not_modified_until_content_changes(self):
+        response = self.client.get('/api/content/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/content/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Only the API log row is written; the view never ran
+        self.assertEqual([q for q in queries.captured_queries if 'api_logs_apilog' not in q['sql']], [])
+        self.assertEqual(response['ETag'], etag)
+
+        DashboardContent.objects.create(screen='CANDIDATE_DASHBOARD')
+        response = self.client.get('/api/content/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_private_etag_not_shared_between_users(self):
+        etag = self.client.get('/api/content/dashboard/')['ETag']
+
+        response = self._client('other@example.com').get('/api/content/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -2,12 +2,13 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import DashboardContent
-from .serializers import DashboardContentSerializer
+from server.conditional import conditional_get
+from server.runtime_config import get_config
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(['dashboard_content'])
 def get_dashboard_content(request):
     """
     Get dashboard content based on user role
@@ -26,20 +27,10 @@ def get_dashboard_content(request):
             'error': 'Invalid user role'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    try:
-        content = DashboardContent.objects.get(
-            screen=screen_type,
-            is_active=True
-        )
-        serializer = DashboardContentSerializer(content)
-        
-        return Response({
-            'success': True,
-            'content': serializer.data
-        })
-        
-    except DashboardContent.DoesNotExist:
-        return Response({
-            'success': True,
-            'content': None
-        })
\ No newline at end of file
+    # Serialized active content per screen, from the runtime config cache
+    content = get_config('dashboard_content').get(screen_type)
+    
+    return Response({
+        'success': True,
+        'content': content
+    })
\ No newline at end of file
@@ -0,0 +1,57 @@
+import logging
+import threading
+from datetime import timedelta
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Seconds to collect inbox opens before writing DELIVERED acks in one UPDATE
+ACK_FLUSH_DELAY_SECONDS = 10
+
+_pending_user_ids = set()
+_lock = threading.Lock()
+
+
+def queue_delivered_ack(user_id):
+    """Queue a SENT -> DELIVERED update for the user's inbox, written off the request path"""
+    with _lock:
+        schedule_flush = not _pending_user_ids
+        _pending_user_ids.add(user_id)
+
+    if schedule_flush:
+        from server.scheduler import get_scheduler
+
+        try:
+            get_scheduler().add_job(
+                flush_delivered_acks,
+                'date',
+                run_date=timezone.now() + timedelta(seconds=ACK_FLUSH_DELAY_SECONDS),
+                id='flush_delivered_acks',
+                replace_existing=True
+            )
+        except Exception as e:
+            logger.error(f'Could not schedule delivered ack flush, flushing now: {str(e)}')
+            flush_delivered_acks()
+
+
+def flush_delivered_acks():
+    """Mark SENT notifications as DELIVERED for every queued user in one query"""
+    from .models import UserNotification
+
+    with _lock:
+        user_ids = list(_pending_user_ids)
+        _pending_user_ids.clear()
+
+    if not user_ids:
+        return 0
+
+    try:
+        count = UserNotification.objects.filter(
+            user_id__in=user_ids,
+            status='SENT'
+        ).update(status='DELIVERED')
+        logger.info(f'Delivered acks flushed: {count} notifications for {len(user_ids)} users')
+        return count
+    except Exception as e:
+        logger.error(f'Error flushing delivered acks: {str(e)}')
+        return 0
@@ -4,6 +4,7 @@ from django.urls import reverse
 from django.http import HttpResponseRedirect
 from django.contrib import messages
 from django.utils import timezone
+from django.db.models import F, Count
 from django.contrib.auth import get_user_model
 from .models import (
     NotificationTemplate,
@@ -11,9 +12,10 @@ from .models import (
     ProfileStepReminder,
     CandidateStatus,
     NotificationLog,
-    StepNotificationDetail
+    StepNotificationDetail,
+    NotificationCounter
 )
-from .services import WorkfinaFCMService
+from .services import WorkfinaFCMService, schedule_hr_fanout
 from django import forms
 
 User = get_user_model()
@@ -40,6 +42,10 @@ class NotificationTemplateAdmin(admin.ModelAdmin):
         ('Settings', {
             'fields': ('is_active', 'auto_trigger', 'delay_minutes')
         }),
+        ('Coalescing', {
+            'fields': ('coalesce_window_minutes', 'coalesce_max_items'),
+            'description': 'Merge bursts of this notification type to the same user into one digest push'
+        }),
         ('Appearance & Sound', {
             'fields': ('play_sound', 'icon'),
             'classes': ('collapse',)
@@ -50,7 +56,7 @@ class NotificationTemplateAdmin(admin.ModelAdmin):
         })
     )
     
-    actions = ['send_test_notification', 'duplicate_template', 'send_to_selected_users']
+    actions = ['send_test_notification', 'duplicate_template', 'send_to_selected_users', 'broadcast_to_recipients']
 
     def send_to_selected_users(self, request, queryset):
         """Send notification to selected template's recipient users"""
@@ -101,6 +107,28 @@ class NotificationTemplateAdmin(admin.ModelAdmin):
             self.message_user(request, f'Error: {str(e)}', level=messages.ERROR)
 
     send_to_selected_users.short_description = 'Send to recipient users (test)'
+
+    def broadcast_to_recipients(self, request, queryset):
+        """Broadcast the template to all its recipients with one FCM topic message"""
+        if queryset.count() != 1:
+            messages.error(request, 'Please select exactly one template.')
+            return
+
+        template = queryset.first()
+        result = WorkfinaFCMService.send_bulk_notification(
+            title=template.title,
+            body=template.body,
+            recipient_type=template.recipient_type,
+            play_sound=template.play_sound,
+            template=template
+        )
+
+        if result.get('error'):
+            self.message_user(request, f'Broadcast failed: {result["error"]}', level=messages.ERROR)
+        else:
+            self.message_user(request, f'Broadcast sent to {result.get("success_count", 0)} {template.recipient_type} users.')
+
+    broadcast_to_recipients.short_description = 'Broadcast to all recipient users'
     
     def title_preview(self, obj):
         return obj.title[:50] + '...' if len(obj.title) > 50 else obj.title
@@ -240,10 +268,13 @@ class UserNotificationAdmin(admin.ModelAdmin):
     
     def mark_as_read(self, request, queryset):
         """Mark notifications as read"""
-        count = queryset.filter(read_at__isnull=True).update(
+        unread = queryset.filter(read_at__isnull=True)
+        read_counts = dict(unread.values_list('user').annotate(count=Count('id')).order_by())
+        count = unread.update(
             read_at=timezone.now(),
             status='READ'
         )
+        NotificationCounter.record_read(read_counts)
         messages.success(request, f'Marked {count} notifications as read.')
     
     mark_as_read.short_description = 'Mark as read'
@@ -274,7 +305,7 @@ class StepNotificationDetailAdmin(admin.ModelAdmin):
 class ProfileStepReminderAdmin(admin.ModelAdmin):
     list_display = [
         'user_email', 'current_step', 'step_completion_status',
-        'is_profile_completed', 'last_step_completed_at'
+        'is_profile_completed', 'last_step_completed_at', 'next_reminder_at'
     ]
     list_filter = [
         'current_step', 'is_profile_completed',
@@ -284,13 +315,17 @@ class ProfileStepReminderAdmin(admin.ModelAdmin):
     readonly_fields = [
         'step1_completed_at', 'step2_completed_at', 'step3_completed_at', 'step4_completed_at',
         'first_reminder_at', 'second_reminder_at', 'final_reminder_at',
-        'last_step_completed_at', 'created_at', 'updated_at'
+        'last_step_completed_at', 'next_reminder_at', 'next_reminder_type',
+        'created_at', 'updated_at'
     ]
 
     fieldsets = (
         ('User Progress', {
             'fields': ('user', 'current_step', 'is_profile_completed')
         }),
+        ('Reminder Schedule', {
+            'fields': ('next_reminder_at', 'next_reminder_type')
+        }),
         ('Step Completion Tracking', {
             'fields': (
                 ('step1_completed', 'step1_completed_at', 'step1_reminder_sent'),
@@ -372,6 +407,11 @@ class ProfileStepReminderAdmin(admin.ModelAdmin):
             final_reminder_sent=False,
             final_reminder_at=None
         )
+        # Reschedule the first reminder (queryset.update skips model save)
+        queryset.filter(is_profile_completed=False).update(
+            next_reminder_at=F('last_step_completed_at') + ProfileStepReminder.REMINDER_SCHEDULE[0][2],
+            next_reminder_type=ProfileStepReminder.REMINDER_SCHEDULE[0][0]
+        )
         messages.success(request, f'Reset reminder status for {queryset.count()} users.')
     
     reset_reminders.short_description = 'Reset reminder status'
@@ -422,7 +462,7 @@ class CandidateStatusAdmin(admin.ModelAdmin):
         
         # Send notification to HR users who have unlocked this candidate
         if obj.status == 'HIRED':
-            WorkfinaFCMService.notify_hrs_about_hired_candidate(obj.candidate)
+            schedule_hr_fanout(WorkfinaFCMService.notify_hrs_about_hired_candidate, obj.candidate_id)
 
 
 # Custom admin actions for bulk notification sending
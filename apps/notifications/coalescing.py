@@ -0,0 +1,216 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Push body length for digests (UserNotification.body is limited to 500 characters)
+DIGEST_BODY_LENGTH = 500
+
+
+def get_coalesce_policy(notification_type, template=None):
+    """Return (window, max_items) for a notification type, or None when it is not coalesced"""
+    if template is not None and template.coalesce_window_minutes:
+        return timedelta(minutes=template.coalesce_window_minutes), template.coalesce_max_items or None
+
+    # Types without a configured template fall back to settings
+    policy = getattr(settings, 'NOTIFICATION_COALESCE_DEFAULTS', {}).get(notification_type)
+    if policy and policy.get('window_minutes'):
+        return timedelta(minutes=policy['window_minutes']), policy.get('max_items')
+    return None
+
+
+def coalesce(user, notification_type, title, body, data=None, template=None):
+    """
+    Hold a notification back if the user already got one of this type within the window.
+    The first notification of a burst is sent normally and opens the window (returns None);
+    later ones are added to the open digest, which is sent as one push when the window ends.
+    """
+    if coalesce_many(notification_type, [(user, title, body, data)], template):
+        return None
+    return {'success': True, 'coalesced': True}
+
+
+def coalesce_many(notification_type, entries, template=None):
+    """
+    Coalesce (user, title, body, data) entries for distinct users in one pass.
+    Returns the entries that should be sent now; the rest were added to open digests.
+    """
+    from .models import NotificationDigest
+
+    policy = get_coalesce_policy(notification_type, template)
+    if policy is None or not entries:
+        return entries
+    window, max_items = policy
+
+    now = timezone.now()
+    with transaction.atomic():
+        open_digests = {
+            digest.user_id: digest
+            for digest in NotificationDigest.objects.select_for_update().filter(
+                user_id__in=[entry[0].id for entry in entries],
+                notification_type=notification_type,
+                is_flushed=False
+            )
+        }
+
+        to_send = []
+        opened = []
+        closed = []
+        held = []
+        flush_now = []
+
+        for user, title, body, data in entries:
+            digest = open_digests.get(user.id)
+
+            if digest is not None and digest.window_ends_at <= now and digest.item_count == 0:
+                # Window ended with nothing held back, close it and start a new burst
+                digest.is_flushed = True
+                digest.flushed_at = now
+                closed.append(digest)
+                digest = None
+
+            if digest is None:
+                # Leading edge of a burst: open a window and send this one as usual
+                opened.append(NotificationDigest(
+                    user=user,
+                    notification_type=notification_type,
+                    template=template,
+                    window_ends_at=now + window
+                ))
+                to_send.append((user, title, body, data))
+                continue
+
+            digest.items.append({
+                'title': title,
+                'body': body,
+                'data': data or {},
+                'created_at': now.isoformat(),
+            })
+            digest.item_count += 1
+            held.append(digest)
+
+            # Full digests, and overdue ones whose flush was lost on restart, go out right away
+            if (max_items and digest.item_count >= max_items) or digest.window_ends_at <= now:
+                flush_now.append(digest.id)
+
+        if closed:
+            NotificationDigest.objects.bulk_update(closed, ['is_flushed', 'flushed_at'])
+        if held:
+            NotificationDigest.objects.bulk_update(held, ['items', 'item_count'])
+        if opened:
+            # A concurrent request may have opened the same window; its digest wins
+            NotificationDigest.objects.bulk_create(opened, ignore_conflicts=True)
+
+        def schedule_flushes():
+            for digest in opened:
+                schedule_digest_flush(digest.id, digest.window_ends_at)
+            for digest_id in flush_now:
+                schedule_digest_flush(digest_id)
+
+        transaction.on_commit(schedule_flushes)
+
+    return to_send
+
+
+def schedule_digest_flush(digest_id, run_date=None):
+    """Flush a digest in the background, now or at the end of its window"""
+    from server.scheduler import get_scheduler
+
+    get_scheduler().add_job(
+        flush_digest,
+        'date',
+        run_date=run_date or timezone.now(),
+        args=[digest_id],
+        id=f'notification_digest_{digest_id}',
+        replace_existing=True,
+        misfire_grace_time=None
+    )
+
+
+def flush_digest(digest_id):
+    """Send one inbox row and push for everything held in a digest"""
+    from .models import NotificationDigest, NotificationTemplate, UserNotification
+    from .services import WorkfinaFCMService
+
+    with transaction.atomic():
+        digest = NotificationDigest.objects.select_for_update().select_related('user', 'template').filter(
+            id=digest_id,
+            is_flushed=False
+        ).first()
+        if digest is None:
+            return None
+
+        digest.is_flushed = True
+        digest.flushed_at = timezone.now()
+
+        notification = None
+        if digest.item_count:
+            items = digest.items
+            if digest.item_count == 1:
+                title, body = items[0]['title'], items[0]['body']
+            else:
+                label = dict(NotificationTemplate.NOTIFICATION_TYPES).get(
+                    digest.notification_type,
+                    digest.notification_type.replace('_', ' ').title()
+                )
+                title = f"{label}: {digest.item_count} new updates"
+                body = ' • '.join(item['body'] for item in reversed(items))
+                if len(body) > DIGEST_BODY_LENGTH:
+                    body = body[:DIGEST_BODY_LENGTH - 1] + '…'
+
+            # Every held notification is kept on the single inbox row
+            notification = UserNotification.objects.create(
+                user=digest.user,
+                template=digest.template,
+                title=title,
+                body=body,
+                data_payload={
+                    'digest': True,
+                    'notification_type': digest.notification_type,
+                    'count': digest.item_count,
+                    'items': items,
+                },
+                scheduled_for=digest.flushed_at
+            )
+            digest.notification = notification
+
+        digest.save(update_fields=['is_flushed', 'flushed_at', 'notification'])
+
+    if notification is None:
+        return None
+
+    # Push without the item list to stay within FCM's data size limit
+    return WorkfinaFCMService.send_notification(notification, data={
+        'digest': True,
+        'notification_type': digest.notification_type,
+        'count': digest.item_count,
+    })
+
+
+def flush_due_digests():
+    """Flush every digest whose window has ended (catches flushes lost on restart)"""
+    from .models import NotificationDigest
+
+    digest_ids = list(
+        NotificationDigest.objects.filter(
+            is_flushed=False,
+            window_ends_at__lte=timezone.now()
+        ).values_list('id', flat=True)
+    )
+
+    for digest_id in digest_ids:
+        try:
+            flush_digest(digest_id)
+        except Exception as e:
+            logger.error(f'Error flushing notification digest {digest_id}: {str(e)}')
+
+    # Sent digests live on as their inbox row, the holding rows are not needed after a day
+    NotificationDigest.objects.filter(
+        is_flushed=True,
+        window_ends_at__lt=timezone.now() - timedelta(days=1)
+    ).delete()
+
+    return len(digest_ids)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from apps.notifications.retention import run_retention, count_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete or archive notifications and logs past their retention policy, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only show how many rows each policy would remove',
+        )
+        parser.add_argument(
+            '--archive',
+            action='store_true',
+            default=None,
+            help='Archive every expired notification to compressed NDJSON before deleting',
+        )
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows per batch')
+        parser.add_argument('--pause', type=float, default=None, help='Seconds to pause between batches')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop (resumable) after this many batches')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            for policy, count in count_expired().items():
+                self.stdout.write(f'{policy}: {count} row(s) past retention')
+            return
+
+        run = run_retention(
+            batch_size=options['batch_size'],
+            pause_seconds=options['pause'],
+            max_batches=options['max_batches'],
+            archive=options['archive'],
+        )
+
+        message = (
+            f'Retention run {run.get_status_display().lower()}: {run.deleted_notifications} notification(s) removed '
+            f'({run.archived_notifications} archived), {run.deleted_logs} log(s) removed in {run.batches} batch(es)'
+        )
+        if run.archive_path:
+            message += f'. Archive: {run.archive_path}'
+        self.stdout.write(self.style.SUCCESS(message))
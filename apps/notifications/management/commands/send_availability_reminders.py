@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from apps.notifications.services import WorkfinaFCMService
+
+
+class Command(BaseCommand):
+    help = 'Send the daily availability reminder to candidates in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report projected recipient and batch volume',
+        )
+        parser.add_argument(
+            '--spread-minutes',
+            type=int,
+            default=None,
+            help='Spread batches over this many minutes (defaults to AVAILABILITY_REMINDER_SPREAD_MINUTES)',
+        )
+
+    def handle(self, *args, **options):
+        result = WorkfinaFCMService.send_daily_availability_reminder(
+            dry_run=options['dry_run'],
+            spread_minutes=options['spread_minutes']
+        )
+
+        if result.get('error'):
+            self.stdout.write(self.style.ERROR(f"Availability reminder failed: {result['error']}"))
+        elif options['dry_run']:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Dry run: {result['recipient_count']} recipient(s) in {result['batch_count']} batch(es) "
+                    f"of up to {result['batch_size']}, spread over {result['spread_minutes']} minute(s) "
+                    f"(~{result['recipients_per_minute']}/min, {result['batch_interval_seconds']:.0f}s between batches)"
+                )
+            )
+        elif 'scheduled_count' in result:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Scheduled {result['scheduled_count']} reminder(s) in {result['batch_count']} batch(es)"
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Sent {result['success_count']} reminder(s), {result['failure_count']} failed"
+                )
+            )
@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from apps.notifications.models import StepNotificationDetail, UserNotification, NotificationLog
+from apps.notifications.models import StepNotificationDetail, UserNotification, NotificationLog, ProfileStepReminder
 from apps.candidates.models import Candidate
 from datetime import timedelta
 
@@ -12,90 +14,84 @@ class Command(BaseCommand):
         now = timezone.now()
         reminders_sent = 0
 
-        # Get all incomplete candidate profiles
-        incomplete_candidates = Candidate.objects.filter(
-            is_profile_completed=False,
-            user__role='candidate'
-        ).select_related('user', 'user__step_reminder')
+        # Load active step configuration once
+        step_details = {
+            detail.step_number: detail
+            for detail in StepNotificationDetail.objects.filter(is_active=True)
+        }
 
-        for candidate in incomplete_candidates:
-            # Get ProfileStepReminder for tracking
-            try:
-                reminder = candidate.user.step_reminder
-            except:
+        for step_num in range(1, 5):
+            step_detail = step_details.get(step_num)
+            if not step_detail:
                 continue
 
-            # Check each step and send reminder if needed
-            steps_to_check = [
-                (1, candidate.step1_completed, reminder.step1_reminder_sent, candidate.created_at),
-                (2, candidate.step2_completed, reminder.step2_reminder_sent, candidate.step1_completed_at or candidate.created_at),
-                (3, candidate.step3_completed, reminder.step3_reminder_sent, candidate.step2_completed_at or candidate.created_at),
-                (4, candidate.step4_completed, reminder.step4_reminder_sent, candidate.step3_completed_at or candidate.created_at),
-            ]
+            # Last action is profile creation for step 1, else previous step completion
+            if step_num == 1:
+                last_action_time = F('created_at')
+            else:
+                last_action_time = Coalesce(f'step{step_num - 1}_completed_at', 'created_at')
 
-            for step_num, is_completed, reminder_sent, last_action_time in steps_to_check:
-                # Skip if already completed or reminder already sent
-                if is_completed or reminder_sent:
-                    continue
+            # Only candidates whose reminder for this step is already due
+            due_candidates = Candidate.objects.filter(
+                is_profile_completed=False,
+                user__role='candidate',
+                **{
+                    f'step{step_num}_completed': False,
+                    f'user__step_reminder__step{step_num}_reminder_sent': False,
+                }
+            ).annotate(
+                last_action_time=last_action_time
+            ).filter(
+                last_action_time__lte=now - timedelta(hours=step_detail.delay_hours)
+            ).select_related('user')
 
-                # Get step notification details
-                try:
-                    step_detail = StepNotificationDetail.objects.get(
-                        step_number=step_num,
-                        is_active=True
-                    )
-                except StepNotificationDetail.DoesNotExist:
-                    continue
+            notifications = []
+            logs = []
+            for candidate in due_candidates:
+                # Send notification to CANDIDATE
+                notification = UserNotification(
+                    user=candidate.user,
+                    title=step_detail.heading,
+                    body=step_detail.description,
+                    data_payload={
+                        'type': 'PROFILE_STEP_REMINDER',
+                        'step_number': step_num,
+                        'heading': step_detail.heading,
+                        'description': step_detail.description
+                    }
+                )
+                notifications.append(notification)
 
-                # Check if enough time has passed since last action
-                time_elapsed = now - last_action_time
-                required_delay = timedelta(hours=step_detail.delay_hours)
+                logs.append(NotificationLog(
+                    log_type='REMINDER_SCHEDULED',
+                    user=candidate.user,
+                    notification=notification,
+                    message=f"Step {step_num} reminder sent to {candidate.user.email}: {step_detail.heading}",
+                    metadata={
+                        'step_number': step_num,
+                        'delay_hours': step_detail.delay_hours,
+                        'candidate_id': str(candidate.id)
+                    }
+                ))
 
-                if time_elapsed >= required_delay:
-                    # Send notification to CANDIDATE
-                    notification = UserNotification.objects.create(
-                        user=candidate.user,
-                        title=step_detail.heading,
-                        body=step_detail.description,
-                        data_payload={
-                            'type': 'PROFILE_STEP_REMINDER',
-                            'step_number': step_num,
-                            'heading': step_detail.heading,
-                            'description': step_detail.description
-                        }
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'Sent step {step_num} reminder to {candidate.user.email}'
                     )
+                )
 
-                    # Mark reminder as sent in ProfileStepReminder
-                    if step_num == 1:
-                        reminder.step1_reminder_sent = True
-                    elif step_num == 2:
-                        reminder.step2_reminder_sent = True
-                    elif step_num == 3:
-                        reminder.step3_reminder_sent = True
-                    elif step_num == 4:
-                        reminder.step4_reminder_sent = True
+            if not notifications:
+                continue
 
-                    reminder.save()
+            UserNotification.bulk_insert(notifications)
+            NotificationLog.objects.bulk_create(logs)
 
-                    # Create log
-                    NotificationLog.objects.create(
-                        log_type='REMINDER_SCHEDULED',
-                        user=candidate.user,
-                        notification=notification,
-                        message=f"Step {step_num} reminder sent to {candidate.user.email}: {step_detail.heading}",
-                        metadata={
-                            'step_number': step_num,
-                            'delay_hours': step_detail.delay_hours,
-                            'candidate_id': str(candidate.id)
-                        }
-                    )
+            # Mark reminder as sent in ProfileStepReminder
+            ProfileStepReminder.objects.filter(
+                user_id__in=[notification.user_id for notification in notifications]
+            ).update(**{f'step{step_num}_reminder_sent': True})
 
-                    reminders_sent += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'Sent step {step_num} reminder to {candidate.user.email}'
-                        )
-                    )
+            reminders_sent += len(notifications)
 
         if reminders_sent > 0:
             self.stdout.write(
@@ -106,4 +102,4 @@ class Command(BaseCommand):
         else:
             self.stdout.write(
                 self.style.WARNING('No step reminders to send at this time')
-            )
\ No newline at end of file
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apps.notifications.services import WorkfinaFCMService
+
+
+class Command(BaseCommand):
+    help = 'Subscribe all stored FCM tokens to their role topics (for broadcasts)'
+
+    def handle(self, *args, **kwargs):
+        results = WorkfinaFCMService.sync_all_role_topics()
+
+        for topic, result in results.items():
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{topic}: {result.get('success_count', 0)} subscribed, {result.get('failure_count', 0)} failed"
+                )
+            )
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.27 on 2026-10-19 03:09
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def populate_next_reminder(apps, schema_editor):
+    ProfileStepReminder = apps.get_model('notifications', 'ProfileStepReminder')
+    pending = ProfileStepReminder.objects.filter(is_profile_completed=False)
+
+    pending.filter(first_reminder_sent=False).update(
+        next_reminder_at=F('last_step_completed_at') + timedelta(hours=24),
+        next_reminder_type='first',
+    )
+    pending.filter(first_reminder_sent=True, second_reminder_sent=False).update(
+        next_reminder_at=F('last_step_completed_at') + timedelta(hours=72),
+        next_reminder_type='second',
+    )
+    pending.filter(first_reminder_sent=True, second_reminder_sent=True, final_reminder_sent=False).update(
+        next_reminder_at=F('last_step_completed_at') + timedelta(days=7),
+        next_reminder_type='final',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_alter_notificationtemplate_notification_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profilestepreminder',
+            name='next_reminder_at',
+            field=models.DateTimeField(blank=True, help_text='When the next profile reminder is due', null=True),
+        ),
+        migrations.AddField(
+            model_name='profilestepreminder',
+            name='next_reminder_type',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='profilestepreminder',
+            index=models.Index(fields=['next_reminder_at'], name='notificatio_next_re_f3bb64_idx'),
+        ),
+        migrations.RunPython(populate_next_reminder, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.27 on 2026-10-19 03:15
+
+from django.db import migrations, models
+
+
+def populate_dedupe_keys(apps, schema_editor):
+    """Key existing follow-up and expiry notifications so they are not re-sent"""
+    UserNotification = apps.get_model('notifications', 'UserNotification')
+
+    seen = set()
+    batch = []
+    notifications = UserNotification.objects.filter(
+        models.Q(data_payload__type='FOLLOWUP_REMINDER') | models.Q(data_payload__action='expiring')
+    ).order_by('created_at').only('id', 'data_payload')
+
+    for notification in notifications.iterator():
+        payload = notification.data_payload or {}
+        if payload.get('followup_id'):
+            key = f"followup_reminder:{payload['followup_id']}"
+        elif payload.get('subscription_id') and payload.get('days_remaining') is not None:
+            key = f"subscription_expiring:{payload['subscription_id']}:{payload['days_remaining']}"
+        else:
+            continue
+
+        if key in seen:
+            continue
+        seen.add(key)
+
+        notification.dedupe_key = key
+        batch.append(notification)
+        if len(batch) >= 500:
+            UserNotification.objects.bulk_update(batch, ['dedupe_key'])
+            batch = []
+
+    if batch:
+        UserNotification.objects.bulk_update(batch, ['dedupe_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_profilestepreminder_next_reminder_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usernotification',
+            name='dedupe_key',
+            field=models.CharField(blank=True, max_length=200, null=True, unique=True),
+        ),
+        migrations.RunPython(populate_dedupe_keys, migrations.RunPython.noop),
+    ]
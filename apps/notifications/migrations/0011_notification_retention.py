@@ -0,0 +1,42 @@
+# Generated by Django 4.2.27 on 2026-10-19 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0010_notificationdailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationRetentionRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('PAUSED', 'Paused (batch limit reached)'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='RUNNING', max_length=20)),
+                ('archive_path', models.CharField(blank=True, default='', max_length=500)),
+                ('current_policy', models.CharField(blank=True, default='', max_length=50)),
+                ('batches', models.PositiveIntegerField(default=0)),
+                ('deleted_notifications', models.PositiveIntegerField(default=0)),
+                ('archived_notifications', models.PositiveIntegerField(default=0)),
+                ('deleted_logs', models.PositiveIntegerField(default=0)),
+                ('progress', models.JSONField(blank=True, default=dict, help_text='Rows removed per policy')),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificationlog',
+            index=models.Index(fields=['created_at'], name='notificatio_created_01830a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['created_at'], name='notificatio_created_edf100_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.27 on 2026-10-19 03:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0011_notification_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationtemplate',
+            name='coalesce_max_items',
+            field=models.PositiveIntegerField(default=20, help_text='Send the digest early once it holds this many notifications'),
+        ),
+        migrations.AddField(
+            model_name='notificationtemplate',
+            name='coalesce_window_minutes',
+            field=models.PositiveIntegerField(default=0, help_text='Merge notifications of this type to the same user within this window into one digest (0 = off)'),
+        ),
+        migrations.CreateModel(
+            name='NotificationDigest',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('notification_type', models.CharField(max_length=50)),
+                ('window_ends_at', models.DateTimeField()),
+                ('items', models.JSONField(blank=True, default=list)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('is_flushed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('flushed_at', models.DateTimeField(blank=True, null=True)),
+                ('notification', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='notifications.usernotification')),
+                ('template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='notifications.notificationtemplate')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_digests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['is_flushed', 'window_ends_at'], name='notificatio_is_flus_bb5e63_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='notificationdigest',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_flushed', False)), fields=('user', 'notification_type'), name='unique_open_notification_digest'),
+        ),
+    ]
@@ -1,5 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q, Count
 from django.contrib.auth import get_user_model
+from collections import defaultdict
 from django.utils import timezone
 from datetime import timedelta
 import uuid
@@ -43,6 +45,10 @@ class NotificationTemplate(models.Model):
     is_active = models.BooleanField(default=True)
     auto_trigger = models.BooleanField(default=False, help_text="Auto send based on user actions")
     delay_minutes = models.PositiveIntegerField(default=0, help_text="Delay before sending (in minutes)")
+
+    # Per-user coalescing of bursts into one digest
+    coalesce_window_minutes = models.PositiveIntegerField(default=0, help_text="Merge notifications of this type to the same user within this window into one digest (0 = off)")
+    coalesce_max_items = models.PositiveIntegerField(default=20, help_text="Send the digest early once it holds this many notifications")
     
     # Sound and visual settings
     play_sound = models.BooleanField(default=True)
@@ -87,18 +93,144 @@ class UserNotification(models.Model):
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     error_message = models.TextField(blank=True, null=True)
+
+    # Idempotency key, e.g. "subscription_expiring:<id>:<days>"; NULL when not deduplicated
+    dedupe_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'read_at', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
         return f"{self.title} → {self.user.email}"
+
+    @classmethod
+    def bulk_insert(cls, notifications):
+        """bulk_create that also keeps the per-user inbox counters in sync"""
+        from .realtime import publish_notifications
+
+        created = cls.objects.bulk_create(notifications)
+        NotificationCounter.record_created(created)
+        publish_notifications(created)
+        return created
+
+    @classmethod
+    def create_if_absent(cls, notifications):
+        """Bulk insert notifications whose dedupe_key is not taken yet, returning the inserted ones"""
+        from .realtime import publish_notifications
+
+        keys = [notification.dedupe_key for notification in notifications if notification.dedupe_key]
+        existing = set(cls.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', flat=True)) if keys else set()
+
+        new_notifications, seen = [], set()
+        for notification in notifications:
+            key = notification.dedupe_key
+            if key and (key in existing or key in seen):
+                continue
+            seen.add(key)
+            new_notifications.append(notification)
+
+        if not new_notifications:
+            return []
+
+        cls.objects.bulk_create(new_notifications, ignore_conflicts=True)
+
+        # Rows that lost a concurrent insert race were skipped by ignore_conflicts
+        inserted_ids = set(cls.objects.filter(
+            id__in=[notification.id for notification in new_notifications]
+        ).values_list('id', flat=True))
+        inserted = [notification for notification in new_notifications if notification.id in inserted_ids]
+        NotificationCounter.record_created(inserted)
+        publish_notifications(inserted)
+        return inserted
     
     def mark_as_read(self):
         if not self.read_at:
             self.read_at = timezone.now()
             self.status = 'READ'
-            self.save()
+            # Conditional update so a concurrent read is only counted once
+            updated = UserNotification.objects.filter(pk=self.pk, read_at__isnull=True).update(
+                read_at=self.read_at,
+                status=self.status
+            )
+            if updated:
+                NotificationCounter.adjust([self.user_id], unread=-1)
+
+
+class NotificationCounter(models.Model):
+    """Denormalized per-user inbox counters, updated atomically with F-expressions"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread_count = models.IntegerField(default=0)
+    total_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_count}/{self.total_count}"
+
+    @classmethod
+    def for_user(cls, user):
+        """
+        Return the user's counters, creating them from the inbox on first use.
+        Until the row exists, deltas from concurrent inserts are skipped, so the
+        counts are taken after creating it and taken again once committed.
+        """
+        counter = cls.objects.filter(pk=user.pk).first()
+        if counter is None:
+            with transaction.atomic():
+                counter, created = cls.objects.get_or_create(user_id=user.pk)
+                if created:
+                    cls.recount(user.pk)
+                    transaction.on_commit(lambda: cls.recount(user.pk))
+            counter.refresh_from_db()
+        return counter
+
+    @classmethod
+    def recount(cls, user_id):
+        """Reset a user's counters from the inbox; concurrent deltas wait on the row lock and apply on top"""
+        with transaction.atomic():
+            if cls.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True).first() is None:
+                return
+            counts = UserNotification.objects.filter(user_id=user_id).aggregate(
+                total=Count('id'),
+                unread=Count('id', filter=Q(read_at__isnull=True))
+            )
+            cls.objects.filter(pk=user_id).update(total_count=counts['total'], unread_count=counts['unread'])
+
+    @classmethod
+    def adjust(cls, user_ids, total=0, unread=0):
+        """Add deltas to the counters of the given users (rows not created yet are skipped)"""
+        if user_ids and (total or unread):
+            cls.objects.filter(user_id__in=user_ids).update(
+                total_count=F('total_count') + total,
+                unread_count=F('unread_count') + unread
+            )
+
+    @classmethod
+    def record_created(cls, notifications, sign=1):
+        """Count newly created (or, with sign=-1, deleted) notifications"""
+        deltas = defaultdict(lambda: [0, 0])
+        for notification in notifications:
+            deltas[notification.user_id][0] += sign
+            if notification.read_at is None:
+                deltas[notification.user_id][1] += sign
+
+        # One UPDATE per distinct delta rather than per user
+        users_by_delta = defaultdict(list)
+        for user_id, delta in deltas.items():
+            users_by_delta[tuple(delta)].append(user_id)
+        for (total, unread), user_ids in users_by_delta.items():
+            cls.adjust(user_ids, total=total, unread=unread)
+
+    @classmethod
+    def record_read(cls, read_counts):
+        """Decrement unread counters from a {user_id: count} mapping"""
+        users_by_count = defaultdict(list)
+        for user_id, count in read_counts.items():
+            users_by_count[count].append(user_id)
+        for count, user_ids in users_by_count.items():
+            cls.adjust(user_ids, unread=-count)
 
 
 class StepNotificationDetail(models.Model):
@@ -122,6 +254,13 @@ class StepNotificationDetail(models.Model):
 
 class ProfileStepReminder(models.Model):
     """Track profile completion reminders for candidates"""
+    # (reminder type, sent flag, delay after last completed step)
+    REMINDER_SCHEDULE = [
+        ('first', 'first_reminder_sent', timedelta(hours=24)),
+        ('second', 'second_reminder_sent', timedelta(hours=72)),
+        ('final', 'final_reminder_sent', timedelta(days=7)),
+    ]
+
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='step_reminder')
     current_step = models.PositiveIntegerField(default=1)
     last_step_completed_at = models.DateTimeField(auto_now_add=True)
@@ -158,14 +297,41 @@ class ProfileStepReminder(models.Model):
 
     is_profile_completed = models.BooleanField(default=False)
 
+    # Denormalized schedule so the reminder job only selects due rows
+    next_reminder_at = models.DateTimeField(null=True, blank=True, help_text="When the next profile reminder is due")
+    next_reminder_type = models.CharField(max_length=10, blank=True, default='')
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['next_reminder_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - Step {self.current_step}"
+
+    def save(self, *args, **kwargs):
+        # Keep the reminder schedule in sync with step and reminder state
+        self.next_reminder_at, self.next_reminder_type = self.get_next_reminder()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'next_reminder_at', 'next_reminder_type'}
+        super().save(*args, **kwargs)
+
+    def get_next_reminder(self):
+        """Return (due_at, reminder_type) of the next unsent reminder"""
+        if self.is_profile_completed:
+            return None, ''
+
+        last_step_at = self.last_step_completed_at or timezone.now()
+        for reminder_type, sent_field, delay in self.REMINDER_SCHEDULE:
+            if not getattr(self, sent_field):
+                return last_step_at + delay, reminder_type
+
+        return None, ''
     
     def update_step(self, new_step):
         """Update user's current step and reset reminders if progressed"""
@@ -260,6 +426,93 @@ class NotificationLog(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
-        return f"{self.get_log_type_display()} - {self.created_at}"
\ No newline at end of file
+        return f"{self.get_log_type_display()} - {self.created_at}"
+
+
+class NotificationDailyStats(models.Model):
+    """Daily rollup of notification volume for historical charts"""
+    date = models.DateField(unique=True)
+    total_count = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    delivered_count = models.PositiveIntegerField(default=0)
+    read_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    type_counts = models.JSONField(default=dict, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name_plural = 'Notification daily stats'
+
+    def __str__(self):
+        return f"{self.date}: {self.total_count} notifications"
+
+
+class NotificationRetentionRun(models.Model):
+    """Progress of a notification retention (purge/archive) run, used to resume and report"""
+    STATUS_CHOICES = [
+        ('RUNNING', 'Running'),
+        ('PAUSED', 'Paused (batch limit reached)'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='RUNNING')
+    archive_path = models.CharField(max_length=500, blank=True, default='')
+    current_policy = models.CharField(max_length=50, blank=True, default='')
+
+    batches = models.PositiveIntegerField(default=0)
+    deleted_notifications = models.PositiveIntegerField(default=0)
+    archived_notifications = models.PositiveIntegerField(default=0)
+    deleted_logs = models.PositiveIntegerField(default=0)
+    progress = models.JSONField(default=dict, blank=True, help_text="Rows removed per policy")
+    error_message = models.TextField(blank=True, null=True)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Retention run {self.started_at:%Y-%m-%d %H:%M} ({self.get_status_display()})"
+
+
+class NotificationDigest(models.Model):
+    """Notifications of one type held back for a user during a coalescing window"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_digests')
+    notification_type = models.CharField(max_length=50)
+    template = models.ForeignKey(NotificationTemplate, on_delete=models.SET_NULL, null=True, blank=True)
+
+    window_ends_at = models.DateTimeField()
+    items = models.JSONField(default=list, blank=True)
+    item_count = models.PositiveIntegerField(default=0)
+
+    is_flushed = models.BooleanField(default=False)
+    notification = models.ForeignKey(UserNotification, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    flushed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'notification_type'],
+                condition=Q(is_flushed=False),
+                name='unique_open_notification_digest'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['is_flushed', 'window_ends_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.notification_type} digest for {self.user_id} ({self.item_count} items)"
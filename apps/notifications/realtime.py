@@ -0,0 +1,217 @@
+import json
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Events queued per open stream, and the most notifications a resume replays before asking for a resync
+EVENT_BUFFER_SIZE = 50
+
+
+def notification_event(notification):
+    """
+    (event_id, event, data) for a new notification. The id is the notification's pk, so
+    Last-Event-ID stays meaningful after a reconnect to another worker or a restart.
+    """
+    return (str(notification.id), 'notification', {
+        'id': str(notification.id),
+        'title': notification.title,
+        'body': notification.body,
+        'status': notification.status,
+        'data_payload': notification.data_payload,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+    })
+
+
+class NotificationBroker(ABC):
+    """Pub/sub interface feeding the notification stream (in-process now, Redis later)"""
+
+    @abstractmethod
+    def publish(self, user_id, event: str, data: dict, event_id=None):
+        """Deliver (event_id, event, data) to the user's open streams"""
+
+    @abstractmethod
+    def subscribe(self, user_id):
+        """Return a subscription with get(timeout) -> (event_id, event, data) or None, and close()"""
+
+    def replay(self, user_id, last_event_id):
+        """
+        Notification events after last_event_id (a notification pk), read from the database,
+        or None if it cannot be resumed (unknown id, or too many missed notifications)
+        """
+        from django.core.exceptions import ValidationError
+        from .models import UserNotification
+
+        notifications = UserNotification.objects.filter(user_id=user_id)
+        try:
+            last = notifications.filter(pk=last_event_id).values('created_at').first()
+        except ValidationError:
+            return None
+        if last is None:
+            return None
+
+        # Rows created in the same instant are sent again rather than risk skipping one
+        missed = list(
+            notifications.filter(created_at__gte=last['created_at']).exclude(pk=last_event_id)
+            .order_by('created_at', 'id')[:EVENT_BUFFER_SIZE + 1]
+        )
+        if len(missed) > EVENT_BUFFER_SIZE:
+            return None
+        return [notification_event(notification) for notification in missed]
+
+    def is_listening(self, user_id) -> bool:
+        """Whether publishing to this user can reach a connected client"""
+        return True
+
+
+class InProcessSubscription:
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=EVENT_BUFFER_SIZE)
+
+    def get(self, timeout=None):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+
+class InProcessBroker(NotificationBroker):
+    """Delivers events to streams connected to this worker process only"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, user_id, event, data, event_id=None):
+        message = (event_id, event, data)
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                logger.warning(f'Notification stream for user {user_id} is not keeping up, dropping event')
+
+    def subscribe(self, user_id):
+        subscription = InProcessSubscription(self, user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def is_listening(self, user_id):
+        return user_id in self._subscriptions
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> NotificationBroker:
+    """Return the broker configured by NOTIFICATION_STREAM_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = getattr(
+                    settings, 'NOTIFICATION_STREAM_BROKER',
+                    'apps.notifications.realtime.InProcessBroker'
+                )
+                _broker = import_string(broker_class)()
+    return _broker
+
+
+def publish_notifications(notifications):
+    """Push new notifications and the updated unread count to connected clients after commit"""
+    notifications = [notification for notification in notifications if get_broker().is_listening(notification.user_id)]
+    if notifications:
+        transaction.on_commit(lambda: _publish_notifications(notifications))
+
+
+def _publish_notifications(notifications):
+    broker = get_broker()
+    for notification in notifications:
+        event_id, event, data = notification_event(notification)
+        broker.publish(notification.user_id, event, data, event_id=event_id)
+
+    for user_id in {notification.user_id for notification in notifications}:
+        publish_unread_count(user_id)
+
+
+def publish_unread_count(user_id):
+    """Push the user's current unread count to connected clients"""
+    from .models import NotificationCounter
+
+    broker = get_broker()
+    if not broker.is_listening(user_id):
+        return
+
+    counter = NotificationCounter.objects.filter(pk=user_id).first()
+    if counter is not None:
+        broker.publish(user_id, 'unread_count', {
+            'unread_count': max(counter.unread_count, 0),
+            'total_count': max(counter.total_count, 0),
+        })
+
+
+class NotificationEventStream:
+    """Iterable SSE body for one client; close() frees the subscription and connection slot"""
+
+    def __init__(self, subscription, initial_events, release, heartbeat_seconds, max_duration_seconds):
+        self.subscription = subscription
+        self.initial_events = initial_events
+        self.release = release
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_duration_seconds = max_duration_seconds
+        self.closed = False
+
+    def __iter__(self):
+        # Ask the client to wait a few seconds before reconnecting
+        yield f'retry: {self.heartbeat_seconds * 1000}\n\n'
+
+        for message in self.initial_events:
+            yield format_event(*message)
+
+        deadline = time.monotonic() + self.max_duration_seconds
+        while not self.closed and time.monotonic() < deadline:
+            message = self.subscription.get(timeout=self.heartbeat_seconds)
+            if message is None:
+                yield ': heartbeat\n\n'
+            else:
+                yield format_event(*message)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.subscription.close()
+            self.release()
+
+
+def format_event(event_id, event, data) -> str:
+    """Serialize one Server-Sent Event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return '\n'.join(lines) + '\n\n'
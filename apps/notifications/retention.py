@@ -0,0 +1,213 @@
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Per notification type (template type, '*' for everything else): days to keep read and unread
+# notifications, and whether expired rows are deleted or archived first.
+# Read notifications were kept 90 days and unread ones indefinitely before these policies;
+# unread notifications are now removed too (after 180 days, sooner for reminder types).
+DEFAULT_RETENTION_POLICIES = {
+    '*': {'read_days': 90, 'unread_days': 180, 'action': 'delete'},
+    'AVAILABILITY_REMINDER': {'read_days': 14, 'unread_days': 30},
+    'PROFILE_STEP_REMINDER': {'read_days': 30, 'unread_days': 60},
+    'FOLLOWUP_REMINDER': {'read_days': 30, 'unread_days': 60},
+}
+
+# Notification logs keep the original 90 days
+DEFAULT_LOG_RETENTION_DAYS = 90
+
+ARCHIVE_FIELDS = [
+    'id', 'user_id', 'template_id', 'title', 'body', 'fcm_message_id', 'data_payload',
+    'status', 'scheduled_for', 'sent_at', 'read_at', 'created_at', 'error_message', 'dedupe_key',
+]
+
+
+def get_retention_policies():
+    """Default policies merged with NOTIFICATION_RETENTION_POLICIES from settings"""
+    policies = {key: dict(value) for key, value in DEFAULT_RETENTION_POLICIES.items()}
+    for key, value in getattr(settings, 'NOTIFICATION_RETENTION_POLICIES', {}).items():
+        policies.setdefault(key, {}).update(value)
+
+    default = policies['*']
+    for key, policy in policies.items():
+        for option in ('read_days', 'unread_days', 'action'):
+            policy.setdefault(option, default[option])
+    return policies
+
+
+def expired_notifications(policy_type, policy, policies, now=None):
+    """Queryset of notifications past retention for one policy"""
+    from .models import UserNotification
+
+    now = now or timezone.now()
+    queryset = UserNotification.objects.filter(
+        Q(read_at__isnull=False, created_at__lt=now - timedelta(days=policy['read_days'])) |
+        Q(read_at__isnull=True, created_at__lt=now - timedelta(days=policy['unread_days']))
+    )
+    if policy_type == '*':
+        return queryset.exclude(template__notification_type__in=[key for key in policies if key != '*'])
+    return queryset.filter(template__notification_type=policy_type)
+
+
+def expired_logs(now=None):
+    from .models import NotificationLog
+
+    now = now or timezone.now()
+    days = getattr(settings, 'NOTIFICATION_LOG_RETENTION_DAYS', DEFAULT_LOG_RETENTION_DAYS)
+    return NotificationLog.objects.filter(created_at__lt=now - timedelta(days=days))
+
+
+def count_expired():
+    """Rows each policy would remove right now (for dry runs)"""
+    policies = get_retention_policies()
+    counts = {
+        policy_type: expired_notifications(policy_type, policy, policies).count()
+        for policy_type, policy in policies.items()
+    }
+    counts['logs'] = expired_logs().count()
+    return counts
+
+
+def _archive_rows(run, rows):
+    if not run.archive_path:
+        archive_dir = getattr(settings, 'NOTIFICATION_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archives', 'notifications'))
+        os.makedirs(archive_dir, exist_ok=True)
+        run.archive_path = os.path.join(archive_dir, f'notifications-{timezone.now():%Y%m%d-%H%M%S}-{run.pk}.ndjson.gz')
+
+    # Appending adds a new gzip member, so a resumed run keeps writing to the same file
+    with gzip.open(run.archive_path, 'at', encoding='utf-8') as archive:
+        for row in rows:
+            archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+
+
+def _purge_notification_batch(run, queryset, archive, batch_size):
+    """Archive (optionally) and delete one batch, returning the number of rows removed"""
+    from .models import UserNotification, NotificationCounter
+    from .signals import counters_adjusted_by_caller
+
+    rows = list(queryset.order_by('created_at').values(*ARCHIVE_FIELDS)[:batch_size])
+    if not rows:
+        return 0
+
+    # Archive before deleting so an interrupted batch is re-archived, never lost
+    if archive:
+        _archive_rows(run, rows)
+
+    with transaction.atomic(), counters_adjusted_by_caller():
+        deleted = UserNotification.objects.filter(id__in=[row['id'] for row in rows])
+        removed = list(deleted.values('user_id', 'read_at'))
+        deleted.delete()
+        NotificationCounter.record_created(
+            [UserNotification(user_id=row['user_id'], read_at=row['read_at']) for row in removed],
+            sign=-1
+        )
+
+    if archive:
+        run.archived_notifications += len(removed)
+    run.deleted_notifications += len(removed)
+    return len(removed)
+
+
+def run_retention(batch_size=None, pause_seconds=None, max_batches=None, archive=None):
+    """
+    Delete or archive expired notifications and logs in bounded batches.
+    Picks up an interrupted or paused run so work and metrics continue where they stopped.
+    """
+    from .models import NotificationRetentionRun, NotificationLog
+
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_RETENTION_BATCH_SIZE', 1000)
+    if pause_seconds is None:
+        pause_seconds = getattr(settings, 'NOTIFICATION_RETENTION_PAUSE_SECONDS', 0.5)
+
+    run = NotificationRetentionRun.objects.filter(status__in=['RUNNING', 'PAUSED']).first()
+    if run is None:
+        run = NotificationRetentionRun.objects.create()
+    else:
+        logger.info(f'Resuming notification retention run {run.pk} after {run.batches} batches')
+    run.status = 'RUNNING'
+
+    policies = get_retention_policies()
+    batches_this_run = 0
+    started = time.monotonic()
+
+    def checkpoint(**fields):
+        for field, value in fields.items():
+            setattr(run, field, value)
+        run.save()
+
+    try:
+        for policy_type, policy in policies.items():
+            archive_policy = archive if archive is not None else policy['action'] == 'archive'
+            queryset = expired_notifications(policy_type, policy, policies)
+            checkpoint(current_policy=policy_type)
+
+            while True:
+                if max_batches is not None and batches_this_run >= max_batches:
+                    checkpoint(status='PAUSED')
+                    logger.info(f'Notification retention paused after {batches_this_run} batches')
+                    return run
+
+                removed = _purge_notification_batch(run, queryset, archive_policy, batch_size)
+                if not removed:
+                    break
+
+                batches_this_run += 1
+                run.batches += 1
+                run.progress[policy_type] = run.progress.get(policy_type, 0) + removed
+                checkpoint()
+
+                elapsed = time.monotonic() - started
+                logger.info(
+                    f'Notification retention [{policy_type}]: batch {run.batches}, removed {removed} '
+                    f'(total {run.deleted_notifications}, {run.deleted_notifications / max(elapsed, 0.001):.0f} rows/s)'
+                )
+
+                # Short pause between batches keeps locks and replication lag small
+                if pause_seconds:
+                    time.sleep(pause_seconds)
+
+        # Logs older than their own retention window, in the same bounded batches
+        checkpoint(current_policy='logs')
+        while True:
+            if max_batches is not None and batches_this_run >= max_batches:
+                checkpoint(status='PAUSED')
+                logger.info(f'Notification retention paused after {batches_this_run} batches')
+                return run
+
+            log_ids = list(expired_logs().order_by('created_at').values_list('id', flat=True)[:batch_size])
+            if not log_ids:
+                break
+
+            deleted, _ = NotificationLog.objects.filter(id__in=log_ids).delete()
+
+            batches_this_run += 1
+            run.batches += 1
+            run.deleted_logs += deleted
+            run.progress['logs'] = run.progress.get('logs', 0) + deleted
+            checkpoint()
+            logger.info(f'Notification retention [logs]: batch {run.batches}, removed {deleted} (total {run.deleted_logs})')
+
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        checkpoint(status='COMPLETED', current_policy='', finished_at=timezone.now())
+        logger.info(
+            f'Notification retention completed: {run.deleted_notifications} notifications '
+            f'({run.archived_notifications} archived), {run.deleted_logs} logs in {run.batches} batches'
+        )
+        return run
+
+    except Exception as e:
+        logger.error(f'Notification retention failed: {str(e)}')
+        checkpoint(status='FAILED', error_message=str(e), finished_at=timezone.now())
+        raise
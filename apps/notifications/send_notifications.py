@@ -60,8 +60,10 @@ class Command(BaseCommand):
         """Process profile completion reminders"""
         sent_count = 0
         
-        # Get all users who need reminders
-        reminders = ProfileStepReminder.objects.filter(is_profile_completed=False)
+        # Get all users whose next reminder is due
+        reminders = ProfileStepReminder.objects.filter(
+            next_reminder_at__lte=timezone.now()
+        ).select_related('user')
         
         for reminder in reminders:
             needs_reminder, reminder_type = reminder.needs_reminder()
@@ -150,22 +152,11 @@ class Command(BaseCommand):
     
     def cleanup_old_notifications(self):
         """Clean up old notifications and logs"""
-        ninety_days_ago = timezone.now() - timedelta(days=90)
-        
-        # Delete old read notifications
-        old_notifications = UserNotification.objects.filter(
-            created_at__lt=ninety_days_ago,
-            status='READ'
-        )
-        count = old_notifications.count()
-        old_notifications.delete()
-        
-        # Delete old logs
-        old_logs = NotificationLog.objects.filter(
-            created_at__lt=ninety_days_ago
-        )
-        log_count = old_logs.count()
-        old_logs.delete()
+        from apps.notifications.retention import run_retention
+
+        run = run_retention()
+        count = run.deleted_notifications
+        log_count = run.deleted_logs
         
         self.stdout.write(f'Cleaned up {count} old notifications and {log_count} old logs')
         
@@ -2,22 +2,37 @@ import logging
 from typing import Dict, List, Optional
 from django.utils import timezone
 from django.contrib.auth import get_user_model
-from django.template import Template, Context
 from datetime import timedelta
 
 # Import your existing FCM utilities
 from server.fcm_utils import SimpleFCM
+from .template_cache import get_template
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Number of due profile reminders processed per batch
+REMINDER_BATCH_SIZE = 200
+
+# FCM accepts at most 500 messages per batch request
+FCM_BATCH_SIZE = 500
+
+# Rows per bulk_create when writing inbox rows for broadcasts
+BULK_INSERT_BATCH_SIZE = 1000
+
+# FCM topic every device of a role is subscribed to
+ROLE_TOPICS = {
+    'candidate': 'role_candidate',
+    'hr': 'role_hr',
+}
+
 
 class WorkfinaFCMService:
     """Workfina-specific FCM notification service"""
     
     @staticmethod
-    def send_notification(notification) -> Dict:
-        """Send individual notification via FCM"""
+    def send_notification(notification, data: Dict = None) -> Dict:
+        """Send individual notification via FCM (data overrides the stored payload in the push)"""
         try:
             from .models import NotificationLog
             
@@ -40,7 +55,7 @@ class WorkfinaFCMService:
                 'notification_id': str(notification.id),
                 'type': notification.template.notification_type if notification.template else 'CUSTOM',
                 'timestamp': str(timezone.now().isoformat()),
-                **notification.data_payload
+                **(notification.data_payload if data is None else data)
             }
             
             # Send via SimpleFCM with sound enabled
@@ -99,22 +114,24 @@ class WorkfinaFCMService:
     def send_to_user(user, title: str, body: str, notification_type: str = 'GENERAL', data: Dict = None) -> Dict:
         """Send custom notification to specific user"""
         try:
-            from .models import UserNotification, NotificationTemplate
+            from .models import UserNotification
             
             # Try to get template if exists
             template = None
-            try:
-                template = NotificationTemplate.objects.get(
-                    notification_type=notification_type,
-                    is_active=True
-                )
+            compiled = get_template(notification_type, (user.role or 'all').upper())
+            if compiled:
+                template = compiled.template
                 # Use template content if provided
                 if not title:
                     title = template.title
                 if not body:
                     body = template.body
-            except NotificationTemplate.DoesNotExist:
-                pass
+            
+            # Bursts of the same type are held back and delivered as one digest
+            from .coalescing import coalesce
+            coalesced = coalesce(user, notification_type, title, body, data, template)
+            if coalesced:
+                return coalesced
             
             # Create notification record
             notification = UserNotification.objects.create(
@@ -137,13 +154,7 @@ class WorkfinaFCMService:
     def send_welcome_message(user) -> Dict:
         """Send welcome message to new users"""
         try:
-            from .models import NotificationTemplate
-            
-            template = NotificationTemplate.objects.filter(
-                notification_type='WELCOME',
-                recipient_type__in=['ALL', user.role.upper()],
-                is_active=True
-            ).first()
+            template = get_template('WELCOME', user.role.upper())
             
             if not template:
                 # Fallback welcome message
@@ -151,9 +162,7 @@ class WorkfinaFCMService:
                 body = f"Hi {user.first_name or user.email}, welcome to Workfina! Complete your profile to get started."
             else:
                 # Use template with user context
-                context = Context({'user_name': user.first_name or user.email, 'user_email': user.email})
-                title = Template(template.title).render(context)
-                body = Template(template.body).render(context)
+                title, body = template.render({'user_name': user.first_name or user.email, 'user_email': user.email})
             
             return WorkfinaFCMService.send_to_user(
                 user=user,
@@ -168,36 +177,33 @@ class WorkfinaFCMService:
             return {'success': False, 'error': str(e)}
     
     @staticmethod
-    def send_profile_step_reminder(user, current_step: int, reminder_type: str = 'general') -> Dict:
+    def send_profile_step_reminder(user, current_step: int, reminder_type: str = 'general', reminder=None) -> Dict:
         """Send profile completion reminder"""
         try:
-            from .models import NotificationTemplate, ProfileStepReminder
+            from .models import ProfileStepReminder
             
-            # Get or create profile reminder tracker
-            reminder_obj, created = ProfileStepReminder.objects.get_or_create(
-                user=user,
-                defaults={'current_step': current_step}
-            )
+            # Get or create profile reminder tracker (batch jobs pass it in)
+            if reminder is not None:
+                reminder_obj, created = reminder, False
+            else:
+                reminder_obj, created = ProfileStepReminder.objects.get_or_create(
+                    user=user,
+                    defaults={'current_step': current_step}
+                )
             
             if not created:
                 reminder_obj.update_step(current_step)
             
             # Get appropriate template
-            template = NotificationTemplate.objects.filter(
-                notification_type='PROFILE_STEP_REMINDER',
-                recipient_type__in=['ALL', 'CANDIDATE'],
-                is_active=True
-            ).first()
+            template = get_template('PROFILE_STEP_REMINDER', 'CANDIDATE')
             
             if template:
-                context = Context({
+                title, body = template.render({
                     'user_name': user.first_name or user.email,
                     'current_step': current_step,
                     'next_step': current_step + 1,
                     'reminder_type': reminder_type
                 })
-                title = Template(template.title).render(context)
-                body = Template(template.body).render(context)
             else:
                 # Fallback messages based on reminder type
                 if reminder_type == 'first':
@@ -243,84 +249,240 @@ class WorkfinaFCMService:
     def notify_hrs_about_hired_candidate(candidate) -> Dict:
         """Notify HR users who unlocked this candidate about hiring"""
         try:
-            from apps.candidates.models import UnlockHistory
-            from .models import NotificationTemplate
+            from apps.candidates.models import Candidate
             
-            # Get HRs who unlocked this candidate
-            unlocked_histories = UnlockHistory.objects.filter(candidate=candidate)
+            if not isinstance(candidate, Candidate):
+                candidate = Candidate.objects.select_related('hiring_status').get(pk=candidate)
             
-            if not unlocked_histories.exists():
-                return {'success': True, 'message': 'No HRs to notify'}
+            # Every HR who unlocked this candidate, in one query
+            hr_users = list(User.objects.filter(hr_profile__unlockhistory__candidate=candidate).distinct())
             
-            # Get template
-            template = NotificationTemplate.objects.filter(
-                notification_type='CANDIDATE_HIRED',
-                recipient_type__in=['ALL', 'HR'],
-                is_active=True
-            ).first()
+            if not hr_users:
+                return {'success': True, 'message': 'No HRs to notify'}
             
-            success_count = 0
-            failure_count = 0
+            # Get template and render it for every HR up front
+            template = get_template('CANDIDATE_HIRED', 'HR')
             
-            for history in unlocked_histories:
-                hr_user = history.hr_user.user
-                
-                if template:
-                    context = Context({
+            if template:
+                company = getattr(candidate.hiring_status, 'company_name', 'Unknown Company') if hasattr(candidate, 'hiring_status') else 'Unknown Company'
+                messages = template.render_many([
+                    {
                         'candidate_name': candidate.masked_name,
                         'hr_name': hr_user.first_name or hr_user.email,
-                        'company': getattr(candidate.hiring_status, 'company_name', 'Unknown Company') if hasattr(candidate, 'hiring_status') else 'Unknown Company'
-                    })
-                    title = Template(template.title).render(context)
-                    body = Template(template.body).render(context)
-                else:
-                    title = f"Candidate Update: {candidate.masked_name} Hired! 🎉"
-                    body = f"Good news! {candidate.masked_name} (whom you unlocked) has been hired. Update your search for similar profiles."
-                
-                result = WorkfinaFCMService.send_to_user(
-                    user=hr_user,
-                    title=title,
-                    body=body,
-                    notification_type='CANDIDATE_HIRED',
-                    data={
-                        'candidate_id': str(candidate.id),
-                        'candidate_name': candidate.masked_name,
-                        'action': 'hired'
+                        'company': company
                     }
-                )
-                
-                if result.get('success'):
-                    success_count += 1
-                else:
-                    failure_count += 1
+                    for hr_user in hr_users
+                ])
+            else:
+                messages = [(
+                    f"Candidate Update: {candidate.masked_name} Hired! 🎉",
+                    f"Good news! {candidate.masked_name} (whom you unlocked) has been hired. Update your search for similar profiles."
+                )] * len(hr_users)
+            
+            data = {
+                'candidate_id': str(candidate.id),
+                'candidate_name': candidate.masked_name,
+                'action': 'hired'
+            }
+            result = WorkfinaFCMService.send_fanout(
+                'CANDIDATE_HIRED',
+                [(hr_user, title, body, data) for hr_user, (title, body) in zip(hr_users, messages)],
+                template=template.template if template else None
+            )
             
-            logger.info(f'Notified HRs about hired candidate {candidate.masked_name}: {success_count} success, {failure_count} failed')
-            return {'success_count': success_count, 'failure_count': failure_count}
+            logger.info(f'Notified HRs about hired candidate {candidate.masked_name}: {result}')
+            return result
             
         except Exception as e:
             logger.error(f'Error notifying HRs about hired candidate: {str(e)}')
             return {'success': False, 'error': str(e)}
     
+    @staticmethod
+    def notify_hrs_about_unavailable_candidate(candidate) -> Dict:
+        """Notify HR users who unlocked this candidate that they are no longer available"""
+        try:
+            from apps.candidates.models import Candidate
+            
+            if not isinstance(candidate, Candidate):
+                candidate = Candidate.objects.get(pk=candidate)
+            
+            # Every HR who unlocked this candidate, in one query
+            hr_users = list(User.objects.filter(hr_profile__unlockhistory__candidate=candidate).distinct())
+            
+            if not hr_users:
+                return {'success': True, 'message': 'No HRs to notify'}
+            
+            title = "Candidate No Longer Available"
+            body = f"{candidate.masked_name} is no longer available for hiring opportunities."
+            data = {
+                'candidate_id': str(candidate.id),
+                'candidate_name': candidate.masked_name,
+                'is_available': False,
+                'action': 'candidate_unavailable'
+            }
+            result = WorkfinaFCMService.send_fanout(
+                'CANDIDATE_UNAVAILABLE',
+                [(hr_user, title, body, data) for hr_user in hr_users]
+            )
+            
+            logger.info(f'Notified HRs about unavailable candidate {candidate.masked_name}: {result}')
+            return result
+            
+        except Exception as e:
+            logger.error(f'Error notifying HRs about unavailable candidate: {str(e)}')
+            return {'success': False, 'error': str(e)}
+    
+    @staticmethod
+    def notify_company_verified(company_id) -> Dict:
+        """Notify every recruiter of a company that it has been verified"""
+        try:
+            from apps.recruiters.models import Company, HRProfile
+            
+            company = Company.objects.get(pk=company_id)
+            hr_profiles = HRProfile.objects.filter(company=company).select_related('user')
+            
+            data = {
+                'type': 'COMPANY_VERIFIED',
+                'action': 'VIEW_CANDIDATES',
+                'company_id': str(company.id)
+            }
+            entries = [
+                (
+                    hr_profile.user,
+                    "Company Verified! 🎉",
+                    f"Congratulations {hr_profile.full_name or 'Recruiter'}! "
+                    f"Your company {company.name} has been verified successfully. "
+                    "You can now browse and connect with qualified candidates. "
+                    "Start exploring talent today!",
+                    data
+                )
+                for hr_profile in hr_profiles
+            ]
+            
+            if not entries:
+                return {'success': True, 'message': 'No recruiters to notify'}
+            
+            result = WorkfinaFCMService.send_fanout('COMPANY_VERIFIED', entries)
+            logger.info(f'Verification notifications for company {company.name}: {result}')
+            return result
+            
+        except Exception as e:
+            logger.error(f'Error sending verification notification: {str(e)}')
+            return {'success': False, 'error': str(e)}
+    
+    @staticmethod
+    def send_fanout(notification_type: str, entries: List, template=None) -> Dict:
+        """Send (user, title, body, data) entries with bulk inbox inserts and batched multicast pushes"""
+        from .coalescing import coalesce_many
+        from .models import UserNotification, NotificationLog
+        
+        # Recipients with an open coalescing window get this added to their digest instead
+        to_send = coalesce_many(notification_type, entries, template)
+        coalesced_count = len(entries) - len(to_send)
+        
+        now = timezone.now()
+        notifications = []
+        
+        for user, title, body, data in to_send:
+            notification = UserNotification(
+                user=user,
+                template=template,
+                title=title,
+                body=body,
+                data_payload=data or {},
+                scheduled_for=now
+            )
+            if not user.fcm_token:
+                notification.status = 'FAILED'
+                notification.error_message = 'User has no FCM token'
+            notifications.append(notification)
+        
+        for start in range(0, len(notifications), BULK_INSERT_BATCH_SIZE):
+            UserNotification.bulk_insert(notifications[start:start + BULK_INSERT_BATCH_SIZE])
+        
+        sent_ids = WorkfinaFCMService.send_batch(
+            notification_type,
+            [notification for notification in notifications if notification.user.fcm_token]
+        )
+        
+        NotificationLog.objects.bulk_create([
+            NotificationLog(
+                log_type='FCM_SENT' if notification.id in sent_ids else 'FCM_ERROR',
+                user=notification.user,
+                notification=notification,
+                message=(
+                    f'Notification sent successfully to {notification.user.email}'
+                    if notification.id in sent_ids else
+                    f'FCM send failed: {notification.error_message or "Unknown error"}'
+                )
+            )
+            for notification in notifications
+        ], batch_size=BULK_INSERT_BATCH_SIZE)
+        
+        return {
+            'success_count': len(sent_ids),
+            'failure_count': len(notifications) - len(sent_ids),
+            'coalesced_count': coalesced_count
+        }
+    
+    @staticmethod
+    def send_batch(notification_type: str, notifications: List) -> set:
+        """
+        Push saved notifications to their owners in FCM batch requests, one message each so
+        every push carries its notification_id (clients mark it read with that id), and
+        record each row as SENT with its fcm_message_id or FAILED.
+        Returns the ids of the notifications that were delivered.
+        """
+        from .models import UserNotification
+        
+        now = timezone.now()
+        sent_ids = set()
+        for start in range(0, len(notifications), FCM_BATCH_SIZE):
+            chunk = notifications[start:start + FCM_BATCH_SIZE]
+            result = SimpleFCM.send_each([
+                (
+                    notification.user.fcm_token,
+                    notification.title,
+                    notification.body,
+                    {
+                        'notification_id': str(notification.id),
+                        'type': notification_type,
+                        'timestamp': now.isoformat(),
+                        **notification.data_payload
+                    }
+                )
+                for notification in chunk
+            ])
+            responses = result.get('responses')
+            for index, notification in enumerate(chunk):
+                if responses and responses[index].success:
+                    notification.status = 'SENT'
+                    notification.sent_at = now
+                    notification.fcm_message_id = responses[index].message_id
+                    sent_ids.add(notification.id)
+                else:
+                    error = responses[index].exception if responses else result.get('error')
+                    notification.status = 'FAILED'
+                    notification.error_message = str(error or 'Unknown FCM error')
+            
+            UserNotification.objects.bulk_update(
+                chunk, ['status', 'sent_at', 'fcm_message_id', 'error_message']
+            )
+        
+        return sent_ids
+    
     @staticmethod
     def send_credit_update_notification(user, credits_added: int, current_balance: int) -> Dict:
         """Notify user about credit updates"""
         try:
-            from .models import NotificationTemplate
-            
-            template = NotificationTemplate.objects.filter(
-                notification_type='CREDIT_UPDATE',
-                recipient_type__in=['ALL', 'HR'],
-                is_active=True
-            ).first()
+            template = get_template('CREDIT_UPDATE', 'HR')
             
             if template:
-                context = Context({
+                title, body = template.render({
                     'user_name': user.first_name or user.email,
                     'credits_added': credits_added,
                     'current_balance': current_balance
                 })
-                title = Template(template.title).render(context)
-                body = Template(template.body).render(context)
             else:
                 title = f"Credits Added! 💰"
                 body = f"Hi {user.first_name or user.email}, {credits_added} credits have been added to your account. Current balance: {current_balance}"
@@ -342,163 +504,307 @@ class WorkfinaFCMService:
             return {'success': False, 'error': str(e)}
     
     @staticmethod
-    def send_bulk_notification(title: str, body: str, recipient_type: str = 'ALL', play_sound: bool = True) -> Dict:
-        """Send bulk notification to multiple users"""
+    def send_bulk_notification(title: str, body: str, recipient_type: str = 'ALL', play_sound: bool = True, template=None) -> Dict:
+        """Send bulk notification to all users of a role with one FCM topic message"""
         try:
             from .models import UserNotification
             
             # Filter users based on recipient type
             if recipient_type == 'CANDIDATE':
                 users = User.objects.filter(role='candidate', is_active=True, fcm_token__isnull=False).exclude(fcm_token='')
+                target = {'topic': ROLE_TOPICS['candidate']}
             elif recipient_type == 'HR':
                 users = User.objects.filter(role='hr', is_active=True, fcm_token__isnull=False).exclude(fcm_token='')
+                target = {'topic': ROLE_TOPICS['hr']}
             else:  # ALL
                 users = User.objects.filter(is_active=True, fcm_token__isnull=False).exclude(fcm_token='')
+                target = {'condition': ' || '.join(f"'{topic}' in topics" for topic in ROLE_TOPICS.values())}
             
-            success_count = 0
-            failure_count = 0
+            data_payload = {'bulk': True, 'recipient_type': recipient_type}
             
-            # Create and send notifications
-            for user in users:
-                try:
-                    notification = UserNotification.objects.create(
-                        user=user,
+            # One push to the role topic reaches every subscribed device
+            result = SimpleFCM.send_to_topic(
+                title=title,
+                body=body,
+                data={
+                    'type': template.notification_type if template else 'CUSTOM',
+                    'timestamp': timezone.now().isoformat(),
+                    **data_payload
+                },
+                play_sound=play_sound,
+                **target
+            )
+            
+            now = timezone.now()
+            if result.get('success'):
+                status_fields = {'status': 'SENT', 'sent_at': now, 'fcm_message_id': result.get('message_id')}
+            else:
+                status_fields = {'status': 'FAILED', 'error_message': result.get('error', 'Unknown FCM error')}
+            
+            # Inbox rows for every recipient, inserted in batches
+            recipient_count = 0
+            user_ids = list(users.values_list('id', flat=True))
+            for start in range(0, len(user_ids), BULK_INSERT_BATCH_SIZE):
+                UserNotification.bulk_insert([
+                    UserNotification(
+                        user_id=user_id,
+                        template=template,
                         title=title,
                         body=body,
-                        data_payload={'bulk': True, 'recipient_type': recipient_type},
-                        scheduled_for=timezone.now()
+                        data_payload=data_payload,
+                        scheduled_for=now,
+                        **status_fields
                     )
-                    
-                    result = WorkfinaFCMService.send_notification(notification)
-                    if result.get('success'):
-                        success_count += 1
-                    else:
-                        failure_count += 1
-                        
-                except Exception as e:
-                    logger.error(f'Error sending bulk notification to {user.email}: {str(e)}')
-                    failure_count += 1
-            
-            logger.info(f'Bulk notification sent: {success_count} success, {failure_count} failed')
-            return {'success_count': success_count, 'failure_count': failure_count}
+                    for user_id in user_ids[start:start + BULK_INSERT_BATCH_SIZE]
+                ])
+                recipient_count += len(user_ids[start:start + BULK_INSERT_BATCH_SIZE])
+            
+            if result.get('success'):
+                logger.info(f'Bulk notification sent to {target}: {recipient_count} recipients')
+                return {'success_count': recipient_count, 'failure_count': 0, 'message_id': result.get('message_id')}
+            
+            logger.error(f'Bulk notification to {target} failed: {result.get("error")}')
+            return {'success_count': 0, 'failure_count': recipient_count, 'error': result.get('error')}
             
         except Exception as e:
             logger.error(f'Error in bulk notification: {str(e)}')
             return {'success': False, 'error': str(e)}
     
+    @staticmethod
+    def sync_role_topic(token: str, role: str, old_token: str = None, old_role: str = None) -> Dict:
+        """Move a device token to the topic of its user's role"""
+        try:
+            old_topic = ROLE_TOPICS.get(old_role)
+            new_topic = ROLE_TOPICS.get(role)
+            
+            if old_token and old_topic and (old_token != token or old_topic != new_topic):
+                SimpleFCM.unsubscribe_from_topic([old_token], old_topic)
+            
+            if token and new_topic:
+                return SimpleFCM.subscribe_to_topic([token], new_topic)
+            return {'success': True}
+            
+        except Exception as e:
+            logger.error(f'Error syncing FCM role topic: {str(e)}')
+            return {'success': False, 'error': str(e)}
+    
+    @staticmethod
+    def sync_all_role_topics() -> Dict:
+        """Subscribe every stored token to its role topic (batched 1000 per request)"""
+        results = {}
+        for role, topic in ROLE_TOPICS.items():
+            tokens = list(
+                User.objects.filter(role=role, is_active=True, fcm_token__isnull=False)
+                .exclude(fcm_token='').values_list('fcm_token', flat=True)
+            )
+            results[topic] = SimpleFCM.subscribe_to_topic(tokens, topic) if tokens else {'success_count': 0, 'failure_count': 0}
+        return results
+    
     @staticmethod
     def check_and_send_profile_reminders():
-        """Check all users who need profile completion reminders (for cron/celery)"""
+        """Send profile completion reminders that are due (for cron/celery)"""
         try:
             from .models import ProfileStepReminder, NotificationLog
 
-            # Get all users who need reminders
-            reminders = ProfileStepReminder.objects.filter(is_profile_completed=False)
+            # Only rows whose next reminder is due, via the indexed schedule column
+            due_ids = list(
+                ProfileStepReminder.objects.filter(
+                    next_reminder_at__lte=timezone.now()
+                ).order_by('next_reminder_at').values_list('pk', flat=True)
+            )
 
             sent_count = 0
 
-            for reminder in reminders:
-                needs_reminder, reminder_type = reminder.needs_reminder()
+            for start in range(0, len(due_ids), REMINDER_BATCH_SIZE):
+                reminders = ProfileStepReminder.objects.filter(
+                    pk__in=due_ids[start:start + REMINDER_BATCH_SIZE]
+                ).select_related('user')
+                logs = []
+
+                for reminder in reminders:
+                    needs_reminder, reminder_type = reminder.needs_reminder()
+
+                    if not needs_reminder:
+                        # Stale schedule (e.g. written by a queryset update), recompute it
+                        reminder.save(update_fields=['next_reminder_at', 'next_reminder_type'])
+                        continue
 
-                if needs_reminder:
                     result = WorkfinaFCMService.send_profile_step_reminder(
                         user=reminder.user,
                         current_step=reminder.current_step,
-                        reminder_type=reminder_type
+                        reminder_type=reminder_type,
+                        reminder=reminder
                     )
 
                     if result.get('success'):
                         sent_count += 1
 
                     # Log the reminder activity
-                    NotificationLog.objects.create(
+                    logs.append(NotificationLog(
                         log_type='REMINDER_SCHEDULED',
                         user=reminder.user,
                         message=f'Profile step reminder ({reminder_type}) sent to step {reminder.current_step}',
                         metadata={'reminder_type': reminder_type, 'step': reminder.current_step}
-                    )
+                    ))
 
-            logger.info(f'Profile reminder check completed: {sent_count} reminders sent')
-            return {'sent_count': sent_count}
+                NotificationLog.objects.bulk_create(logs)
+
+            logger.info(f'Profile reminder check completed: {sent_count} of {len(due_ids)} due reminders sent')
+            return {'sent_count': sent_count, 'due_count': len(due_ids)}
 
         except Exception as e:
             logger.error(f'Error checking profile reminders: {str(e)}')
             return {'error': str(e)}
 
     @staticmethod
-    def send_daily_availability_reminder():
+    def send_daily_availability_reminder(dry_run: bool = False, spread_minutes: Optional[int] = None) -> Dict:
         """Send daily 8 AM availability reminder to all candidates (for cron/celery)"""
         try:
+            from django.conf import settings
             from apps.candidates.models import Candidate
-            from .models import NotificationTemplate, NotificationLog
 
-            # Get all active candidates with completed profiles
-            candidates = Candidate.objects.filter(
-                is_active=True,
-                is_profile_completed=True
-            ).select_related('user')
+            batch_size = getattr(settings, 'AVAILABILITY_REMINDER_BATCH_SIZE', 500)
+            if spread_minutes is None:
+                spread_minutes = getattr(settings, 'AVAILABILITY_REMINDER_SPREAD_MINUTES', 0)
 
-            # Get template if exists
-            template = NotificationTemplate.objects.filter(
-                notification_type='AVAILABILITY_REMINDER',
-                recipient_type__in=['ALL', 'CANDIDATE'],
-                is_active=True
-            ).first()
+            # Active candidates with completed profiles and an FCM token
+            candidate_ids = list(
+                Candidate.objects.filter(
+                    is_active=True,
+                    is_profile_completed=True
+                ).exclude(
+                    user__fcm_token__isnull=True
+                ).exclude(
+                    user__fcm_token=''
+                ).order_by('pk').values_list('pk', flat=True)
+            )
+            batches = [candidate_ids[i:i + batch_size] for i in range(0, len(candidate_ids), batch_size)]
+
+            # Spread batches evenly over the window to avoid a burst of app opens
+            interval = timedelta(minutes=spread_minutes) / len(batches) if spread_minutes and batches else timedelta(0)
+
+            if dry_run:
+                return {
+                    'dry_run': True,
+                    'recipient_count': len(candidate_ids),
+                    'batch_count': len(batches),
+                    'batch_size': batch_size,
+                    'spread_minutes': spread_minutes,
+                    'batch_interval_seconds': interval.total_seconds(),
+                    'recipients_per_minute': round(len(candidate_ids) / spread_minutes, 1) if spread_minutes else len(candidate_ids),
+                }
+
+            if interval:
+                from server.scheduler import schedule_availability_reminder_batch
+
+                run_at = timezone.now()
+                for batch in batches:
+                    schedule_availability_reminder_batch(batch, run_at)
+                    run_at += interval
+
+                logger.info(f'Daily availability reminders scheduled: {len(candidate_ids)} candidates in {len(batches)} batches over {spread_minutes} minutes')
+                return {'scheduled_count': len(candidate_ids), 'batch_count': len(batches)}
 
             success_count = 0
             failure_count = 0
+            for batch in batches:
+                result = WorkfinaFCMService.send_availability_reminder_batch(batch)
+                success_count += result.get('success_count', 0)
+                failure_count += result.get('failure_count', 0)
 
-            for candidate in candidates:
-                user = candidate.user
+            logger.info(f'Daily availability reminders sent: {success_count} success, {failure_count} failed')
+            return {'success_count': success_count, 'failure_count': failure_count}
+
+        except Exception as e:
+            logger.error(f'Error sending daily availability reminders: {str(e)}')
+            return {'success': False, 'error': str(e)}
 
-                # Skip if no FCM token
-                if not user.fcm_token:
-                    continue
+    @staticmethod
+    def send_availability_reminder_batch(candidate_ids: List) -> Dict:
+        """Send one batch of availability reminders with bulk inserts and batched pushes"""
+        try:
+            from apps.candidates.models import Candidate
+            from .models import UserNotification, NotificationLog
 
-                if template:
-                    title = template.title
-                    body = template.body.format(
-                        user_name=user.first_name or user.email,
-                        current_status='Available' if candidate.is_available_for_hiring else 'Not Available'
-                    )
-                else:
-                    title = "Are you still available for hiring?"
-                    body = f"Hi {user.first_name or 'there'}! Please confirm if you're still open to new job opportunities. Update your availability status."
+            candidates = list(Candidate.objects.filter(
+                pk__in=candidate_ids,
+                is_active=True,
+                is_profile_completed=True
+            ).exclude(
+                user__fcm_token__isnull=True
+            ).exclude(
+                user__fcm_token=''
+            ).select_related('user'))
 
-                result = WorkfinaFCMService.send_to_user(
+            # Get template and render it for every candidate up front
+            template = get_template('AVAILABILITY_REMINDER', 'CANDIDATE')
+
+            if template:
+                messages = template.render_many([
+                    {
+                        'user_name': candidate.user.first_name or candidate.user.email,
+                        'current_status': 'Available' if candidate.is_available_for_hiring else 'Not Available'
+                    }
+                    for candidate in candidates
+                ])
+            else:
+                messages = [(
+                    "Are you still available for hiring?",
+                    f"Hi {candidate.user.first_name or 'there'}! Please confirm if you're still open to new job opportunities. Update your availability status."
+                ) for candidate in candidates]
+
+            now = timezone.now()
+            notifications = []
+
+            for candidate, (title, body) in zip(candidates, messages):
+                user = candidate.user
+
+                notification = UserNotification(
                     user=user,
+                    template=template.template if template else None,
                     title=title,
                     body=body,
-                    notification_type='AVAILABILITY_REMINDER',
-                    data={
+                    data_payload={
                         'action': 'availability_check',
                         'current_status': candidate.is_available_for_hiring,
                         'candidate_id': str(candidate.id)
-                    }
+                    },
+                    scheduled_for=now
                 )
+                notifications.append(notification)
 
-                if result.get('success'):
-                    success_count += 1
-                else:
-                    failure_count += 1
+            UserNotification.bulk_insert(notifications)
 
-                # Log the notification
-                NotificationLog.objects.create(
+            sent_set = WorkfinaFCMService.send_batch('AVAILABILITY_REMINDER', notifications)
+            NotificationLog.objects.bulk_create([
+                NotificationLog(
                     log_type='AVAILABILITY_REMINDER',
-                    user=user,
-                    message=f'Daily availability reminder sent to {user.email}',
+                    user=notification.user,
+                    notification=notification,
+                    message=f'Daily availability reminder sent to {notification.user.email}',
                     metadata={
-                        'success': result.get('success', False),
-                        'candidate_id': str(candidate.id)
+                        'success': notification.id in sent_set,
+                        'candidate_id': notification.data_payload['candidate_id']
                     }
                 )
+                for notification in notifications
+            ])
 
-            logger.info(f'Daily availability reminders sent: {success_count} success, {failure_count} failed')
-            return {'success_count': success_count, 'failure_count': failure_count}
+            failure_count = len(notifications) - len(sent_set)
+            logger.info(f'Availability reminder batch sent: {len(sent_set)} success, {failure_count} failed')
+            return {'success_count': len(sent_set), 'failure_count': failure_count}
 
         except Exception as e:
-            logger.error(f'Error sending daily availability reminders: {str(e)}')
-            return {'success': False, 'error': str(e)}
+            logger.error(f'Error sending availability reminder batch: {str(e)}')
+            return {'success': False, 'error': str(e), 'success_count': 0, 'failure_count': len(candidate_ids)}
+
+
+def schedule_hr_fanout(notify, candidate_id):
+    """Run an HR fan-out such as notify_hrs_about_hired_candidate in the background after commit"""
+    from django.db import transaction
+    from server.scheduler import run_in_background
+
+    transaction.on_commit(lambda: run_in_background(notify, candidate_id))
 
 
 # Signal handlers for automatic notifications
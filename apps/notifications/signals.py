@@ -0,0 +1,41 @@
+import threading
+from contextlib import contextmanager
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import NotificationTemplate, UserNotification, NotificationCounter
+from .template_cache import invalidate_templates
+from .realtime import publish_notifications
+
+
+@receiver([post_save, post_delete], sender=NotificationTemplate)
+def invalidate_notification_templates(sender, instance, **kwargs):
+    """Drop compiled notification templates when a template changes"""
+    invalidate_templates()
+
+
+@receiver(post_save, sender=UserNotification)
+def count_created_notification(sender, instance, created, **kwargs):
+    """Keep inbox counters in sync for notifications created one at a time"""
+    if created:
+        NotificationCounter.record_created([instance])
+        publish_notifications([instance])
+
+
+_local = threading.local()
+
+
+@contextmanager
+def counters_adjusted_by_caller():
+    """Skip per-row counter updates on delete; the caller adjusts counters in bulk"""
+    _local.skip_counters = True
+    try:
+        yield
+    finally:
+        _local.skip_counters = False
+
+
+@receiver(post_delete, sender=UserNotification)
+def count_deleted_notification(sender, instance, **kwargs):
+    """Keep inbox counters in sync when notifications are deleted"""
+    if not getattr(_local, 'skip_counters', False):
+        NotificationCounter.record_created([instance], sign=-1)
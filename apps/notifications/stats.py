@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_KEY = 'notifications:stats'
+STATS_REFRESH_LOCK_KEY = 'notifications:stats:refreshing'
+
+# Served as-is for STATS_FRESH_SECONDS, then served stale while one refresh runs in the background
+STATS_FRESH_SECONDS = 60
+STATS_STALE_SECONDS = 15 * 60
+
+STATUS_FIELDS = {
+    'sent_notifications': 'SENT',
+    'delivered_notifications': 'DELIVERED',
+    'read_notifications': 'READ',
+    'failed_notifications': 'FAILED',
+}
+
+
+def _notification_aggregates(queryset, since=None):
+    """Totals, status and template type breakdown of a UserNotification queryset in one query"""
+    from .models import NotificationTemplate
+
+    aggregates = {'total_notifications': Count('id')}
+    if since is not None:
+        aggregates['notifications_last_30_days'] = Count('id', filter=Q(created_at__gte=since))
+    for field, status in STATUS_FIELDS.items():
+        aggregates[field] = Count('id', filter=Q(status=status))
+    for notification_type, _ in NotificationTemplate.NOTIFICATION_TYPES:
+        aggregates[f'type_{notification_type}'] = Count('id', filter=Q(template__notification_type=notification_type))
+
+    result = queryset.aggregate(**aggregates)
+    result['notification_types'] = {
+        notification_type: result.pop(f'type_{notification_type}')
+        for notification_type, _ in NotificationTemplate.NOTIFICATION_TYPES
+    }
+    return result
+
+
+def compute_notification_stats():
+    """Compute dashboard stats with one aggregate query per table"""
+    from django.contrib.auth import get_user_model
+    from .models import UserNotification, NotificationTemplate
+
+    User = get_user_model()
+
+    stats = _notification_aggregates(
+        UserNotification.objects.all(),
+        since=timezone.now() - timedelta(days=30)
+    )
+    stats['active_templates'] = NotificationTemplate.objects.filter(is_active=True).count()
+    stats['users_with_fcm_tokens'] = User.objects.filter(fcm_token__isnull=False).exclude(fcm_token='').count()
+    return stats
+
+
+def _refresh_stats():
+    try:
+        stats = compute_notification_stats()
+        cache.set(STATS_CACHE_KEY, {'stats': stats, 'computed_at': time.time()}, STATS_STALE_SECONDS)
+        return stats
+    finally:
+        cache.delete(STATS_REFRESH_LOCK_KEY)
+
+
+def _refresh_in_background():
+    from django.db import connection
+
+    try:
+        _refresh_stats()
+    except Exception as e:
+        logger.error(f'Error refreshing notification stats: {str(e)}')
+    finally:
+        connection.close()
+
+
+def get_notification_stats():
+    """Return cached stats, refreshing stale ones in the background"""
+    cached = cache.get(STATS_CACHE_KEY)
+
+    if cached is None:
+        cache.add(STATS_REFRESH_LOCK_KEY, True, 60)
+        return _refresh_stats()
+
+    if time.time() - cached['computed_at'] > STATS_FRESH_SECONDS:
+        # Only one worker refreshes; everyone else keeps serving the stale copy
+        if cache.add(STATS_REFRESH_LOCK_KEY, True, 60):
+            threading.Thread(target=_refresh_in_background, daemon=True).start()
+
+    return cached['stats']
+
+
+def rollup_notification_stats(day=None):
+    """Store totals for one day (default yesterday) in NotificationDailyStats"""
+    from .models import UserNotification, NotificationDailyStats
+
+    if day is None:
+        day = timezone.localdate() - timedelta(days=1)
+
+    counts = _notification_aggregates(UserNotification.objects.filter(created_at__date=day))
+    rollup, _ = NotificationDailyStats.objects.update_or_create(
+        date=day,
+        defaults={
+            'total_count': counts['total_notifications'],
+            'sent_count': counts['sent_notifications'],
+            'delivered_count': counts['delivered_notifications'],
+            'read_count': counts['read_notifications'],
+            'failed_count': counts['failed_notifications'],
+            'type_counts': counts['notification_types'],
+        }
+    )
+    return rollup
@@ -0,0 +1,87 @@
+import logging
+import time
+from django.core.cache import cache
+from django.template import Template, Context
+
+logger = logging.getLogger(__name__)
+
+# Shared version stamp so every worker drops its compiled templates on change
+TEMPLATE_CACHE_VERSION_KEY = 'notifications:template_cache_version'
+
+# How often (seconds) a worker checks the shared version stamp
+VERSION_CHECK_INTERVAL = 5
+
+_compiled = {}
+# Cached None means "no active template", so a miss needs its own marker
+_MISSING = object()
+_version = None
+_version_checked_at = 0.0
+
+
+class CompiledNotificationTemplate:
+    """Active NotificationTemplate with pre-compiled title and body"""
+
+    def __init__(self, template):
+        self.template = template
+        self.title_template = Template(template.title)
+        self.body_template = Template(template.body)
+
+    def render(self, context: dict):
+        """Render (title, body) for one context"""
+        context = Context(context)
+        return self.title_template.render(context), self.body_template.render(context)
+
+    def render_many(self, contexts):
+        """Render (title, body) for each context, reusing the compiled templates"""
+        return [self.render(context) for context in contexts]
+
+
+def _check_version():
+    global _version, _version_checked_at
+
+    now = time.monotonic()
+    if now - _version_checked_at < VERSION_CHECK_INTERVAL:
+        return
+    _version_checked_at = now
+
+    version = cache.get(TEMPLATE_CACHE_VERSION_KEY)
+    if version != _version:
+        _compiled.clear()
+        _version = version
+
+
+def get_template(notification_type: str, recipient_type: str = 'ALL'):
+    """Return the compiled active template for a type and recipient, or None"""
+    from .models import NotificationTemplate
+
+    _check_version()
+
+    key = (notification_type, recipient_type)
+    # A concurrent invalidate may clear the dict: read it once and keep the local
+    compiled = _compiled.get(key, _MISSING)
+    if compiled is _MISSING:
+        recipient_types = ['ALL'] if recipient_type == 'ALL' else ['ALL', recipient_type]
+        template = NotificationTemplate.objects.filter(
+            notification_type=notification_type,
+            recipient_type__in=recipient_types,
+            is_active=True
+        ).first()
+
+        try:
+            compiled = CompiledNotificationTemplate(template) if template else None
+        except Exception as e:
+            logger.error(f'Invalid notification template {template.pk}: {str(e)}')
+            compiled = None
+        _compiled[key] = compiled
+
+    return compiled
+
+
+def invalidate_templates():
+    """Drop compiled templates in this worker and bump the shared version"""
+    global _version, _version_checked_at
+
+    _compiled.clear()
+    _version = time.time_ns()
+    _version_checked_at = time.monotonic()
+    cache.set(TEMPLATE_CACHE_VERSION_KEY, _version, None)
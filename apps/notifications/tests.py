@@ -1,3 +1,572 @@
-from django.test import TestCase
+import gzip
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-# Create your tests here.
+from apps.candidates.models import Candidate
+from . import template_cache
+from .coalescing import coalesce_many, flush_digest, flush_due_digests
+from .models import (
+    NotificationCounter, NotificationDigest, NotificationLog, NotificationRetentionRun, NotificationTemplate,
+    NotificationDailyStats, ProfileStepReminder, UserNotification
+)
+from .realtime import InProcessBroker, NotificationBroker, _publish_notifications
+from .retention import count_expired, run_retention
+from .services import WorkfinaFCMService
+from .stats import STATS_CACHE_KEY, compute_notification_stats, get_notification_stats, rollup_notification_stats
+from .template_cache import get_template, invalidate_templates
+
+User = get_user_model()
+
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='c@example.com', password='x', role='candidate')
+        self.broker = InProcessBroker()
+
+    def _notify(self, count):
+        return [
+            UserNotification.objects.create(user=self.user, title=f'Title {index}', body='Body')
+            for index in range(count)
+        ]
+
+    def test_broker_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            NotificationBroker()
+
+    def test_event_ids_are_notification_ids(self):
+        subscription = self.broker.subscribe(self.user.id)
+        notification = self._notify(1)[0]
+        with mock.patch('apps.notifications.realtime.get_broker', return_value=self.broker):
+            _publish_notifications([notification])
+
+        event_id, event, data = subscription.get(timeout=1)
+        self.assertEqual((event_id, event), (str(notification.id), 'notification'))
+        subscription.close()
+
+    def test_replay_from_database_after_reconnect(self):
+        first, second, third = self._notify(3)
+
+        # A fresh broker stands in for another worker or a restarted one
+        replayed = InProcessBroker().replay(self.user.id, str(first.id))
+        self.assertEqual([event_id for event_id, _, _ in replayed], [str(second.id), str(third.id)])
+        self.assertEqual(InProcessBroker().replay(self.user.id, str(third.id)), [])
+
+    def test_unknown_or_foreign_event_id_needs_resync(self):
+        other = User.objects.create_user(email='o@example.com', password='x', role='candidate')
+        foreign = UserNotification.objects.create(user=other, title='Title', body='Body')
+
+        self.assertIsNone(self.broker.replay(self.user.id, 'not-an-id'))
+        self.assertIsNone(self.broker.replay(self.user.id, str(foreign.id)))
+
+
+class NotificationCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='c@example.com', password='x', role='candidate')
+
+    def _notify(self, **kwargs):
+        return UserNotification.objects.create(user=self.user, title='Title', body='Body', **kwargs)
+
+    def test_seeded_from_inbox_on_first_use(self):
+        # Created before the counter row exists, so their deltas were skipped
+        self._notify()
+        self._notify(read_at=timezone.now())
+
+        counter = NotificationCounter.for_user(self.user)
+        self.assertEqual((counter.total_count, counter.unread_count), (2, 1))
+
+    def test_deltas_applied_once_seeded(self):
+        NotificationCounter.for_user(self.user)
+        notification = self._notify()
+        notification.mark_as_read()
+        notification.mark_as_read()
+
+        counter = NotificationCounter.for_user(self.user)
+        self.assertEqual((counter.total_count, counter.unread_count), (1, 0))
+
+    def test_insert_racing_the_seed_is_counted_after_commit(self):
+        original_recount = NotificationCounter.recount.__func__
+        raced = []
+
+        def recount(cls, user_id):
+            original_recount(cls, user_id)
+            # Another request's notification, whose delta reached no row yet
+            if not raced:
+                raced.append(UserNotification.objects.bulk_create([
+                    UserNotification(user=self.user, title='Title', body='Body')
+                ]))
+
+        with mock.patch.object(NotificationCounter, 'recount', classmethod(recount)):
+            with self.captureOnCommitCallbacks(execute=True):
+                NotificationCounter.for_user(self.user)
+
+        counter = NotificationCounter.for_user(self.user)
+        self.assertEqual((counter.total_count, counter.unread_count), (1, 1))
+
+
+class NotificationStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='c@example.com', password='x', role='candidate', fcm_token='device-1')
+        template = NotificationTemplate.objects.create(
+            name='General', notification_type='GENERAL', recipient_type='ALL', title='Title', body='Body'
+        )
+        for status in ('SENT', 'SENT', 'READ', 'FAILED'):
+            UserNotification.objects.create(user=self.user, template=template, title='Title', body='Body', status=status)
+        old = UserNotification.objects.create(user=self.user, title='Title', body='Body', status='SENT')
+        UserNotification.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+
+    def test_one_aggregate_query_per_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            stats = compute_notification_stats()
+        self.assertEqual(len(queries.captured_queries), 3)
+
+        self.assertEqual((stats['total_notifications'], stats['notifications_last_30_days']), (5, 4))
+        self.assertEqual((stats['sent_notifications'], stats['read_notifications'], stats['failed_notifications']), (3, 1, 1))
+        self.assertEqual(stats['notification_types']['GENERAL'], 4)
+        self.assertEqual(stats['notification_types']['WELCOME'], 0)
+        self.assertEqual((stats['active_templates'], stats['users_with_fcm_tokens']), (1, 1))
+
+    def test_cached_then_refreshed_in_background_when_stale(self):
+        stats = get_notification_stats()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_notification_stats(), stats)
+
+        cached = cache.get(STATS_CACHE_KEY)
+        cache.set(STATS_CACHE_KEY, dict(cached, computed_at=cached['computed_at'] - 3600))
+        with mock.patch('apps.notifications.stats.threading.Thread') as thread:
+            with self.assertNumQueries(0):
+                self.assertEqual(get_notification_stats(), stats)
+            get_notification_stats()
+        # Stale copy served while a single refresh runs
+        thread.assert_called_once()
+
+    def test_rollup_counts_one_day(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        UserNotification.objects.filter(status='FAILED').update(created_at=timezone.now() - timedelta(days=1))
+
+        rollup_notification_stats()
+        rollup = rollup_notification_stats()
+        self.assertEqual(NotificationDailyStats.objects.get(), rollup)
+        self.assertEqual(rollup.date, yesterday)
+        self.assertEqual((rollup.total_count, rollup.failed_count, rollup.sent_count), (1, 1, 0))
+        self.assertEqual(rollup.type_counts['GENERAL'], 1)
+
+
+class DedupeKeyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='c@example.com', password='x', role='candidate')
+        NotificationCounter.for_user(self.user)
+
+    def _notification(self, dedupe_key=None):
+        return UserNotification(user=self.user, title='Title', body='Body', dedupe_key=dedupe_key)
+
+    def test_taken_and_repeated_keys_skipped(self):
+        UserNotification.create_if_absent([self._notification('expiry:1')])
+
+        inserted = UserNotification.create_if_absent([
+            self._notification('expiry:1'),
+            self._notification('expiry:2'),
+            self._notification('expiry:2'),
+            self._notification(),
+            self._notification(),
+        ])
+        self.assertEqual([n.dedupe_key for n in inserted], ['expiry:2', None, None])
+        self.assertEqual(UserNotification.objects.count(), 4)
+        self.assertEqual(NotificationCounter.for_user(self.user).total_count, 4)
+
+    def test_insert_lost_to_concurrent_writer_not_returned(self):
+        original_bulk_create = UserNotification.objects.bulk_create
+
+        def bulk_create(objs, *args, **kwargs):
+            # Another worker inserts the same key after the existence check
+            original_bulk_create([self._notification('expiry:1')])
+            return original_bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(UserNotification.objects, 'bulk_create', bulk_create):
+            inserted = UserNotification.create_if_absent([self._notification('expiry:1'), self._notification('expiry:2')])
+        self.assertEqual([n.dedupe_key for n in inserted], ['expiry:2'])
+        self.assertEqual(UserNotification.objects.count(), 2)
+        # Only this call's insert is counted (the other writer's bulk_create skipped the counters)
+        self.assertEqual(NotificationCounter.for_user(self.user).total_count, 1)
+
+
+@mock.patch('server.scheduler.run_in_background')
+class ProfileReminderScheduleTests(TestCase):
+    def _reminder(self, index, hours_since_step):
+        user = User.objects.create_user(email=f'c{index}@example.com', password='x', role='candidate')
+        reminder = user.step_reminder
+        reminder.last_step_completed_at = timezone.now() - timedelta(hours=hours_since_step)
+        reminder.save()
+        return reminder
+
+    def test_schedule_follows_reminders_sent(self, run_in_background):
+        reminder = self._reminder(0, 0)
+        self.assertEqual(reminder.next_reminder_type, 'first')
+        self.assertEqual(reminder.next_reminder_at, reminder.last_step_completed_at + timedelta(hours=24))
+
+        reminder.first_reminder_sent = True
+        reminder.save(update_fields=['first_reminder_sent'])
+        reminder.refresh_from_db()
+        self.assertEqual(reminder.next_reminder_type, 'second')
+
+        reminder.is_profile_completed = True
+        reminder.save()
+        self.assertIsNone(reminder.next_reminder_at)
+
+    def test_only_due_reminders_sent(self, run_in_background):
+        due = self._reminder(0, 25)
+        self._reminder(1, 1)
+
+        with mock.patch.object(WorkfinaFCMService, 'send_to_user', return_value={'success': True}) as send_to_user:
+            with CaptureQueriesContext(connection) as queries:
+                result = WorkfinaFCMService.check_and_send_profile_reminders()
+        self.assertEqual(result, {'sent_count': 1, 'due_count': 1})
+        self.assertEqual(send_to_user.call_args.kwargs['user'], due.user)
+        # Due rows are picked by the schedule column, not by scanning every reminder
+        self.assertIn('next_reminder_at', queries.captured_queries[0]['sql'])
+
+        due.refresh_from_db()
+        self.assertTrue(due.first_reminder_sent)
+        self.assertEqual(due.next_reminder_type, 'second')
+        self.assertEqual(WorkfinaFCMService.check_and_send_profile_reminders()['due_count'], 0)
+
+    def test_stale_schedule_recomputed_without_sending(self, run_in_background):
+        reminder = self._reminder(0, 25)
+        # Written by a queryset update, which skips save()
+        ProfileStepReminder.objects.filter(pk=reminder.pk).update(is_profile_completed=True)
+
+        with mock.patch.object(WorkfinaFCMService, 'send_to_user') as send_to_user:
+            result = WorkfinaFCMService.check_and_send_profile_reminders()
+        send_to_user.assert_not_called()
+        self.assertEqual(result['sent_count'], 0)
+        reminder.refresh_from_db()
+        self.assertIsNone(reminder.next_reminder_at)
+
+
+@override_settings(AVAILABILITY_REMINDER_BATCH_SIZE=2)
+class AvailabilityReminderTests(TestCase):
+    def setUp(self):
+        self.addCleanup(invalidate_templates)
+        patcher = mock.patch('server.scheduler.run_in_background')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for index in range(4):
+            # The last one has no device to push to
+            user = User.objects.create_user(
+                email=f'c{index}@example.com', password='x', role='candidate',
+                fcm_token=f'device-{index}' if index < 3 else None
+            )
+            Candidate.objects.create(
+                user=user, first_name='Test', last_name=f'Candidate{index}', masked_name=f'T*** C{index}',
+                phone='9999999999', age=25, experience_years=2, street_address='Street',
+                is_profile_completed=True
+            )
+
+    def test_dry_run_sends_nothing(self):
+        result = WorkfinaFCMService.send_daily_availability_reminder(dry_run=True, spread_minutes=30)
+        self.assertEqual((result['recipient_count'], result['batch_count']), (3, 2))
+        self.assertEqual(result['batch_interval_seconds'], 900)
+        self.assertFalse(UserNotification.objects.exists())
+
+    def test_batches_spread_over_window(self):
+        with mock.patch('server.scheduler.schedule_availability_reminder_batch') as schedule_batch:
+            result = WorkfinaFCMService.send_daily_availability_reminder(spread_minutes=30)
+        self.assertEqual(result, {'scheduled_count': 3, 'batch_count': 2})
+
+        (first_ids, first_at), (second_ids, second_at) = [call.args for call in schedule_batch.call_args_list]
+        self.assertEqual((len(first_ids), len(second_ids)), (2, 1))
+        self.assertEqual(second_at - first_at, timedelta(minutes=15))
+        self.assertFalse(UserNotification.objects.exists())
+
+    def test_unspread_batches_sent_now(self):
+        with mock.patch('server.fcm_utils.SimpleFCM.send_each', side_effect=fcm_batch_result) as send_each:
+            result = WorkfinaFCMService.send_daily_availability_reminder(spread_minutes=0)
+        self.assertEqual(result, {'success_count': 3, 'failure_count': 0})
+        self.assertEqual(send_each.call_count, 2)
+        self.assertEqual(UserNotification.objects.filter(status='SENT').count(), 3)
+
+    def test_rendered_from_the_compiled_template(self):
+        template = NotificationTemplate.objects.create(
+            name='Availability', notification_type='AVAILABILITY_REMINDER', recipient_type='CANDIDATE',
+            title='Still looking, {{ user_name }}?', body='You are marked {{ current_status }}'
+        )
+        with mock.patch('server.fcm_utils.SimpleFCM.send_each', side_effect=fcm_batch_result):
+            WorkfinaFCMService.send_daily_availability_reminder(spread_minutes=0)
+
+        notification = UserNotification.objects.get(user__email='c0@example.com')
+        self.assertEqual(notification.template, template)
+        self.assertEqual(notification.title, 'Still looking, c0@example.com?')
+        self.assertEqual(notification.body, 'You are marked Available')
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='c@example.com', password='x', role='candidate')
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        settings_override = override_settings(NOTIFICATION_ARCHIVE_DIR=archive_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _template(self, notification_type):
+        return NotificationTemplate.objects.create(
+            name=notification_type, notification_type=notification_type, recipient_type='ALL',
+            title='Title', body='Body'
+        )
+
+    def _notify(self, days_old, read=False, template=None):
+        notification = UserNotification.objects.create(
+            user=self.user, template=template, title='Title', body='Body',
+            read_at=timezone.now() if read else None
+        )
+        UserNotification.objects.filter(pk=notification.pk).update(
+            created_at=timezone.now() - timedelta(days=days_old)
+        )
+        return notification
+
+    def test_policy_chosen_by_template_type(self):
+        reminder = self._template('AVAILABILITY_REMINDER')
+        general = self._template('GENERAL')
+        self._notify(20, read=True, template=reminder)
+        self._notify(20, read=True, template=general)
+        self._notify(100, read=True, template=general)
+        # No template: only the '*' policy can remove it
+        self._notify(100, read=True)
+
+        counts = count_expired()
+        self.assertEqual(counts['AVAILABILITY_REMINDER'], 1)
+        self.assertEqual(counts['PROFILE_STEP_REMINDER'], 0)
+        self.assertEqual(counts['*'], 2)
+
+    def test_read_and_unread_cutoffs(self):
+        kept = [self._notify(80, read=True), self._notify(100)]
+        self._notify(100, read=True)
+        self._notify(200)
+
+        run = run_retention(pause_seconds=0)
+        self.assertEqual(run.status, 'COMPLETED')
+        self.assertEqual(run.deleted_notifications, 2)
+        self.assertEqual(
+            set(UserNotification.objects.values_list('id', flat=True)),
+            {notification.id for notification in kept}
+        )
+
+    def test_batch_limit_pauses_and_next_run_resumes(self):
+        for _ in range(3):
+            self._notify(200)
+
+        run = run_retention(batch_size=1, pause_seconds=0, max_batches=2)
+        self.assertEqual((run.status, run.deleted_notifications), ('PAUSED', 2))
+
+        resumed = run_retention(batch_size=1, pause_seconds=0)
+        self.assertEqual(resumed.pk, run.pk)
+        self.assertEqual((resumed.status, resumed.deleted_notifications, resumed.batches), ('COMPLETED', 3, 3))
+        self.assertEqual(resumed.progress, {'*': 3})
+        self.assertFalse(UserNotification.objects.exists())
+
+    def test_counters_decremented(self):
+        NotificationCounter.for_user(self.user)
+        self._notify(1)
+        self._notify(100, read=True)
+        self._notify(200)
+
+        run_retention(pause_seconds=0)
+        counter = NotificationCounter.for_user(self.user)
+        self.assertEqual((counter.total_count, counter.unread_count), (1, 1))
+
+    def test_rows_archived_before_delete(self):
+        notification = self._notify(200)
+
+        with mock.patch.object(NotificationCounter, 'record_created', side_effect=RuntimeError('lost connection')):
+            with self.assertRaises(RuntimeError):
+                run_retention(pause_seconds=0, archive=True)
+        run = NotificationRetentionRun.objects.get()
+        self.assertEqual(run.status, 'FAILED')
+        # The delete rolled back, but the batch already reached the archive
+        self.assertTrue(UserNotification.objects.filter(pk=notification.pk).exists())
+        with gzip.open(run.archive_path, 'rt') as archive:
+            self.assertIn(str(notification.id), archive.read())
+
+        run = run_retention(pause_seconds=0, archive=True)
+        self.assertEqual((run.status, run.archived_notifications), ('COMPLETED', 1))
+        self.assertFalse(UserNotification.objects.exists())
+
+
+@override_settings(NOTIFICATION_COALESCE_DEFAULTS={'CREDIT_UPDATE': {'window_minutes': 5, 'max_items': 3}})
+class CoalescingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='hr@example.com', password='x', role='hr')
+        patcher = mock.patch('apps.notifications.coalescing.schedule_digest_flush')
+        self.schedule_flush = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(WorkfinaFCMService, 'send_notification', return_value={'success': True})
+        self.send_notification = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _coalesce(self, body='Body'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return coalesce_many('CREDIT_UPDATE', [(self.user, 'Title', body, {'amount': 10})])
+
+    def _end_window(self):
+        NotificationDigest.objects.update(window_ends_at=timezone.now() - timedelta(seconds=1))
+
+    def test_first_sent_then_held_until_flush(self):
+        self.assertEqual(len(self._coalesce('First')), 1)
+        digest = NotificationDigest.objects.get()
+        self.schedule_flush.assert_called_once_with(digest.id, digest.window_ends_at)
+
+        self.assertEqual(self._coalesce('Second'), [])
+        self.assertEqual(self._coalesce('Third'), [])
+        digest.refresh_from_db()
+        self.assertEqual(digest.item_count, 2)
+        self.assertFalse(UserNotification.objects.exists())
+
+        flush_digest(digest.id)
+        notification = UserNotification.objects.get()
+        self.assertEqual(notification.title, 'Credit Update: 2 new updates')
+        self.assertEqual(notification.body, 'Third • Second')
+        self.assertEqual(len(notification.data_payload['items']), 2)
+        # The push leaves the items out
+        push_data = self.send_notification.call_args.kwargs['data']
+        self.assertEqual(push_data['count'], 2)
+        self.assertNotIn('items', push_data)
+
+        self.assertIsNone(flush_digest(digest.id))
+        self.assertEqual(UserNotification.objects.count(), 1)
+
+    def test_overdue_digest_flushed(self):
+        self._coalesce()
+        self._coalesce()
+        self._end_window()
+        digest = NotificationDigest.objects.get()
+
+        # Its scheduled flush was lost: the next notification flushes it at once
+        self.schedule_flush.reset_mock()
+        self.assertEqual(self._coalesce(), [])
+        self.schedule_flush.assert_called_once_with(digest.id)
+
+        self.assertEqual(flush_due_digests(), 1)
+        self.assertEqual(UserNotification.objects.get().data_payload['count'], 2)
+
+    def test_full_digest_flushed_early(self):
+        self._coalesce()
+        digest = NotificationDigest.objects.get()
+        self.schedule_flush.reset_mock()
+
+        self._coalesce()
+        self._coalesce()
+        self.schedule_flush.assert_not_called()
+        self._coalesce()
+        self.schedule_flush.assert_called_once_with(digest.id)
+
+    def test_empty_window_reopened(self):
+        self._coalesce()
+        self._end_window()
+
+        self.assertEqual(len(self._coalesce()), 1)
+        closed = NotificationDigest.objects.get(is_flushed=True)
+        self.assertEqual(closed.item_count, 0)
+        self.assertGreater(NotificationDigest.objects.get(is_flushed=False).window_ends_at, timezone.now())
+        self.assertFalse(UserNotification.objects.exists())
+
+    def test_long_digest_body_truncated(self):
+        self._coalesce()
+        self._coalesce('a' * 400)
+        self._coalesce('b' * 400)
+
+        flush_digest(NotificationDigest.objects.get().id)
+        body = UserNotification.objects.get().body
+        self.assertEqual(len(body), 500)
+        self.assertTrue(body.startswith('b' * 400))
+        self.assertTrue(body.endswith('…'))
+
+
+class TemplateCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Compiled templates outlive the test's rolled-back rows
+        self.addCleanup(invalidate_templates)
+        NotificationTemplate.objects.create(
+            name='Hired', notification_type='CANDIDATE_HIRED', recipient_type='HR',
+            title='{{ name }} hired', body='Hi {{ name }}'
+        )
+
+    def test_compiled_once_and_rendered(self):
+        template = get_template('CANDIDATE_HIRED', 'HR')
+        with self.assertNumQueries(0):
+            self.assertIs(get_template('CANDIDATE_HIRED', 'HR'), template)
+        self.assertEqual(template.render({'name': 'Asha'}), ('Asha hired', 'Hi Asha'))
+        self.assertIsNone(get_template('CANDIDATE_HIRED', 'CANDIDATE'))
+
+    def test_invalidation_during_lookup_does_not_raise(self):
+        class ClearedAfterStore(dict):
+            # Another thread drops the compiled templates right after this one stores its entry
+            def __setitem__(self, key, value):
+                super().__setitem__(key, value)
+                self.clear()
+
+        with mock.patch.object(template_cache, '_compiled', ClearedAfterStore()):
+            template = get_template('CANDIDATE_HIRED', 'HR')
+        self.assertEqual(template.render({'name': 'Asha'})[0], 'Asha hired')
+
+
+def fcm_batch_result(messages, failed_tokens=()):
+    """SimpleFCM.send_each result for messages, failing those sent to failed_tokens"""
+    responses = [
+        mock.Mock(success=token not in failed_tokens, message_id=f'msg-{index}', exception='Unregistered')
+        for index, (token, _, _, _) in enumerate(messages)
+    ]
+    return {'responses': responses}
+
+
+class FanoutPushTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(email=f'hr{index}@example.com', password='x', role='hr', fcm_token=f'device-{index}')
+            for index in range(3)
+        ]
+
+    def test_each_push_carries_its_notification_id(self):
+        data = {'candidate_id': 'c1', 'action': 'candidate_unavailable'}
+        with mock.patch('server.fcm_utils.SimpleFCM.send_each', side_effect=lambda messages: fcm_batch_result(
+            messages, failed_tokens={'device-2'}
+        )) as send_each:
+            result = WorkfinaFCMService.send_fanout(
+                'CANDIDATE_UNAVAILABLE',
+                [(user, 'Title', 'Body', data) for user in self.users]
+            )
+        self.assertEqual((result['success_count'], result['failure_count']), (2, 1))
+
+        messages = send_each.call_args.args[0]
+        notifications = {str(n.id): n for n in UserNotification.objects.all()}
+        pushed_ids = [message[3]['notification_id'] for message in messages]
+        self.assertEqual(sorted(pushed_ids), sorted(notifications))
+        for token, _, _, push_data in messages:
+            notification = notifications[push_data['notification_id']]
+            self.assertEqual(notification.user.fcm_token, token)
+            self.assertEqual(push_data['candidate_id'], 'c1')
+
+        sent = UserNotification.objects.filter(status='SENT')
+        self.assertEqual(sent.count(), 2)
+        self.assertTrue(all(n.fcm_message_id.startswith('msg-') for n in sent))
+        failed = UserNotification.objects.get(status='FAILED')
+        self.assertEqual(failed.user, self.users[2])
+        self.assertEqual(NotificationLog.objects.filter(log_type='FCM_ERROR').count(), 1)
+
+    def test_recipient_without_token_recorded_as_failed(self):
+        User.objects.filter(pk=self.users[0].pk).update(fcm_token=None)
+        self.users[0].refresh_from_db()
+
+        with mock.patch('server.fcm_utils.SimpleFCM.send_each', side_effect=fcm_batch_result) as send_each:
+            WorkfinaFCMService.send_fanout('CANDIDATE_UNAVAILABLE', [(self.users[0], 'Title', 'Body', {})])
+        send_each.assert_not_called()
+        self.assertEqual(UserNotification.objects.get().error_message, 'User has no FCM token')
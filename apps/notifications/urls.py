@@ -4,6 +4,7 @@ from .views import (
     mark_notification_read,
     mark_all_notifications_read,
     get_notification_count,
+    notification_stream,
     send_test_notification,
     trigger_profile_reminder,
     get_notification_settings,
@@ -20,6 +21,7 @@ urlpatterns = [
     # User notification endpoints
     path('', UserNotificationListView.as_view(), name='user-notifications'),
     path('count/', get_notification_count, name='notification-count'),
+    path('stream/', notification_stream, name='notification-stream'),
     path('<uuid:notification_id>/read/', mark_notification_read, name='mark-notification-read'),
     path('mark-all-read/', mark_all_notifications_read, name='mark-all-read'),
     
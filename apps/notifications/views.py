@@ -1,15 +1,21 @@
-from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import status, generics, renderers
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Q
 from datetime import timedelta
+import json
+import threading
 
-from .models import UserNotification, NotificationTemplate, ProfileStepReminder
+from .models import UserNotification, NotificationTemplate, ProfileStepReminder, NotificationCounter, NotificationDailyStats
 from .services import WorkfinaFCMService
+from .acks import queue_delivered_ack
+from .realtime import get_broker, NotificationEventStream, publish_unread_count
+from .stats import get_notification_stats
 from .serializers import UserNotificationSerializer, NotificationTemplateSerializer
 
 
@@ -26,8 +32,8 @@ class UserNotificationListView(generics.ListAPIView):
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
         
-        # Mark notifications as delivered when user opens the list
-        queryset.filter(status='SENT').update(status='DELIVERED')
+        # Mark notifications as delivered when user opens the list (batched in the background)
+        queue_delivered_ack(request.user.id)
         
         # Pagination
         page = self.paginate_queryset(queryset)
@@ -49,6 +55,7 @@ def mark_notification_read(request, notification_id):
             user=request.user
         )
         notification.mark_as_read()
+        publish_unread_count(request.user.id)
         
         return Response({
             'success': True,
@@ -71,6 +78,8 @@ def mark_all_notifications_read(request):
         read_at=timezone.now(),
         status='READ'
     )
+    NotificationCounter.adjust([request.user.id], unread=-count)
+    publish_unread_count(request.user.id)
     
     return Response({
         'success': True,
@@ -82,17 +91,76 @@ def mark_all_notifications_read(request):
 @permission_classes([IsAuthenticated])
 def get_notification_count(request):
     """Get unread notification count"""
-    unread_count = UserNotification.objects.filter(
-        user=request.user,
-        read_at__isnull=True
-    ).count()
+    counter = NotificationCounter.for_user(request.user)
     
     return Response({
-        'unread_count': unread_count,
-        'total_count': UserNotification.objects.filter(user=request.user).count()
+        'unread_count': max(counter.unread_count, 0),
+        'total_count': max(counter.total_count, 0)
     })
 
 
+class EventStreamRenderer(renderers.BaseRenderer):
+    """Lets clients negotiate text/event-stream; error bodies are rendered as JSON"""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data) if data is not None else ''
+
+
+# Per-worker cap on concurrently open notification streams
+_stream_slots = threading.BoundedSemaphore(
+    getattr(settings, 'NOTIFICATION_STREAM_MAX_CONNECTIONS', 100)
+)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([renderers.JSONRenderer, EventStreamRenderer])
+def notification_stream(request):
+    """Server-Sent Events stream of new notifications and unread count changes"""
+    if not _stream_slots.acquire(blocking=False):
+        response = Response({
+            'error': 'Too many open notification streams, please retry later'
+        }, status=503)
+        response['Retry-After'] = '30'
+        return response
+
+    broker = get_broker()
+    subscription = broker.subscribe(request.user.id)
+
+    try:
+        # Resume from Last-Event-ID (a notification id) with the notifications missed since
+        last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+        replayed = broker.replay(request.user.id, last_event_id) if last_event_id else None
+
+        # Current counts follow; resync asks the client to reload when the gap could not be replayed
+        counter = NotificationCounter.for_user(request.user)
+        initial_events = (replayed or []) + [(None, 'unread_count', {
+            'unread_count': max(counter.unread_count, 0),
+            'total_count': max(counter.total_count, 0),
+            'resync': bool(last_event_id) and replayed is None
+        })]
+    except Exception:
+        subscription.close()
+        _stream_slots.release()
+        raise
+
+    stream = NotificationEventStream(
+        subscription,
+        initial_events,
+        release=_stream_slots.release,
+        heartbeat_seconds=getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT_SECONDS', 15),
+        max_duration_seconds=getattr(settings, 'NOTIFICATION_STREAM_MAX_DURATION_SECONDS', 300)
+    )
+
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def send_test_notification(request):
@@ -269,30 +337,24 @@ def notification_stats(request):
             'error': 'Only staff users can access stats'
         }, status=403)
     
-    # Last 30 days stats
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    
-    stats = {
-        'total_notifications': UserNotification.objects.count(),
-        'notifications_last_30_days': UserNotification.objects.filter(
-            created_at__gte=thirty_days_ago
-        ).count(),
-        'sent_notifications': UserNotification.objects.filter(status='SENT').count(),
-        'delivered_notifications': UserNotification.objects.filter(status='DELIVERED').count(),
-        'read_notifications': UserNotification.objects.filter(status='READ').count(),
-        'failed_notifications': UserNotification.objects.filter(status='FAILED').count(),
-        'active_templates': NotificationTemplate.objects.filter(is_active=True).count(),
-        'users_with_fcm_tokens': User.objects.filter(fcm_token__isnull=False).exclude(fcm_token='').count()
-    }
-    
-    # Notification types breakdown
-    type_stats = {}
-    for choice in NotificationTemplate.NOTIFICATION_TYPES:
-        type_stats[choice[0]] = UserNotification.objects.filter(
-            template__notification_type=choice[0]
-        ).count()
-    
-    stats['notification_types'] = type_stats
+    stats = dict(get_notification_stats())
+
+    # Optional history from the daily rollup, e.g. ?days=30
+    days = request.query_params.get('days')
+    if days:
+        try:
+            days = min(int(days), 365)
+        except ValueError:
+            return Response({'error': 'days must be a number'}, status=400)
+
+        stats['daily'] = list(
+            NotificationDailyStats.objects.filter(
+                date__gte=timezone.localdate() - timedelta(days=days)
+            ).order_by('date').values(
+                'date', 'total_count', 'sent_count', 'delivered_count',
+                'read_count', 'failed_count', 'type_counts'
+            )
+        )
     
     return Response(stats)
 
@@ -1,79 +1,32 @@
-from django.db.models.signals import pre_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save
 from django.dispatch import receiver
-from .models import HRProfile, Company
-from apps.notifications.models import UserNotification
-from server.fcm_utils import SimpleFCM
+from .models import Company
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 @receiver(pre_save, sender=Company)
-def send_verification_notification(sender, instance, **kwargs):
-    """Send notification when Company is verified by admin"""
-    if not instance.pk:
+def detect_company_verification(sender, instance, **kwargs):
+    """Remember whether this save verifies the company (is_verified False -> True)"""
+    instance._just_verified = False
+    if not instance.pk or not instance.is_verified:
         return
 
-    try:
-        old_instance = Company.objects.get(pk=instance.pk)
+    was_verified = Company.objects.filter(pk=instance.pk).values_list('is_verified', flat=True).first()
+    instance._just_verified = was_verified is False
 
-        # Check if is_verified changed from False to True
-        if not old_instance.is_verified and instance.is_verified:
-            # Notify all recruiters from this company
-            hr_profiles = HRProfile.objects.filter(company=instance).select_related('user')
 
-            for hr_profile in hr_profiles:
-                user = hr_profile.user
-
-                title = "Company Verified! 🎉"
-                body = (
-                    f"Congratulations {hr_profile.full_name or 'Recruiter'}! "
-                    f"Your company {instance.name} has been verified successfully. "
-                    "You can now browse and connect with qualified candidates. "
-                    "Start exploring talent today!"
-                )
-
-                # Create notification record
-                notification = UserNotification.objects.create(
-                    user=user,
-                    title=title,
-                    body=body,
-                    data_payload={
-                        'type': 'COMPANY_VERIFIED',
-                        'action': 'VIEW_CANDIDATES',
-                        'company_id': str(instance.id)
-                    },
-                    status='PENDING'
-                )
-
-                # Send FCM notification if user has fcm_token
-                if hasattr(user, 'fcm_token') and user.fcm_token:
-                    result = SimpleFCM.send_to_token(
-                        token=user.fcm_token,
-                        title=title,
-                        body=body,
-                        data={
-                            'type': 'COMPANY_VERIFIED',
-                            'action': 'VIEW_CANDIDATES',
-                            'company_id': str(instance.id),
-                            'notification_id': str(notification.id)
-                        }
-                    )
-
-                    if result.get('success'):
-                        notification.status = 'SENT'
-                        notification.fcm_message_id = result.get('message_id')
-                        logger.info(f"Verification notification sent to {user.email}")
-                    else:
-                        notification.status = 'FAILED'
-                        notification.error_message = result.get('error', 'Unknown error')
-                        logger.error(f"Failed to send verification notification to {user.email}")
+@receiver(post_save, sender=Company)
+def send_verification_notification(sender, instance, created, **kwargs):
+    """Notify the company's recruiters in the background once the verification is committed"""
+    if created or not getattr(instance, '_just_verified', False):
+        return
 
-                    notification.save()
-                else:
-                    logger.warning(f"No FCM token for user {user.email}, notification saved but not sent via FCM")
+    from apps.notifications.services import WorkfinaFCMService
+    from server.scheduler import run_in_background
 
-    except Company.DoesNotExist:
-        pass
-    except Exception as e:
-        logger.error(f"Error sending verification notification: {e}")
\ No newline at end of file
+    instance._just_verified = False
+    company_id = instance.pk
+    transaction.on_commit(lambda: run_in_background(WorkfinaFCMService.notify_company_verified, company_id))
@@ -1,3 +1,59 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from apps.notifications.models import UserNotification
+from .models import Company
+
+User = get_user_model()
+
+
+class CompanyVerifiedNotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='Acme')
+        self.users = []
+        for index in range(2):
+            user = User.objects.create_user(
+                email=f'hr{index}@example.com', password='x', role='hr', fcm_token=f'device-{index}'
+            )
+            user.hr_profile.company = self.company
+            user.hr_profile.save()
+            self.users.append(user)
+
+    def _verify(self, send_each):
+        run_now = lambda func, *args, **kwargs: func(*args)
+        with mock.patch('server.scheduler.run_in_background', side_effect=run_now), \
+                mock.patch('server.fcm_utils.SimpleFCM.send_each', side_effect=send_each):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.company.is_verified = True
+                self.company.save()
+
+    def test_push_links_to_inbox_row(self):
+        pushed = []
+
+        def send_each(messages):
+            pushed.extend(messages)
+            return {'responses': [mock.Mock(success=True, message_id=f'msg-{data["notification_id"]}')
+                                  for _, _, _, data in messages]}
+
+        self._verify(send_each)
+
+        notifications = UserNotification.objects.filter(user__in=self.users)
+        self.assertEqual(notifications.count(), 2)
+        self.assertEqual(
+            sorted(data['notification_id'] for _, _, _, data in pushed),
+            sorted(str(notification.id) for notification in notifications)
+        )
+        for notification in notifications:
+            self.assertEqual(notification.status, 'SENT')
+            self.assertEqual(notification.fcm_message_id, f'msg-{notification.id}')
+
+    def test_only_sent_when_verification_changes(self):
+        send_each = mock.Mock(return_value={'responses': []})
+        self._verify(send_each)
+        send_each.reset_mock()
+
+        self._verify(send_each)
+        send_each.assert_not_called()
@@ -7,6 +7,7 @@ from .models import HRProfile, Company
 from .serializers import HRRegistrationSerializer, HRProfileSerializer
 from apps.candidates.models import Candidate, UnlockHistory, FilterCategory, FilterOption
 from apps.candidates.serializers import MaskedCandidateSerializer, FullCandidateSerializer
+from server.conditional import conditional_get
 
 class HRRegistrationView(generics.CreateAPIView):
     serializer_class = HRRegistrationSerializer
@@ -264,7 +265,7 @@ def filter_candidates(request):
     
     # Get unlocked candidate IDs
     unlocked_ids = set(UnlockHistory.objects.filter(
-        hr_user=request.user.hr_profile
+        hr_user_id=request.user.hr_profile_id
     ).values_list('candidate_id', flat=True))
     
     # Filter to show only locked candidates if requested
@@ -676,6 +677,7 @@ def add_custom_location(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(['filter_taxonomy'], public=True)
 def search_countries(request):
     """
     Search countries for autocomplete/autosuggest
@@ -731,6 +733,7 @@ def search_countries(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(['filter_taxonomy'], public=True)
 def search_states(request):
     """
     Search states for autocomplete/autosuggest
@@ -796,6 +799,7 @@ def search_states(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(['filter_taxonomy'], public=True)
 def search_cities(request):
     """
     Search cities for autocomplete/autosuggest
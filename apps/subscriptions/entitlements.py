@@ -0,0 +1,157 @@
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Per-HR counter bumped on every wallet or subscription write for that HR
+HR_VERSION_KEY = 'entitlements_version:{}'
+
+# Counter bumped on plan writes, which can change every subscriber's entitlements at once
+PLANS_VERSION_KEY = 'entitlements_plans_version'
+
+
+def _hr_profile_id(hr_profile):
+    return getattr(hr_profile, 'pk', hr_profile)
+
+
+def _versions(hr_profile_id):
+    """Current (hr, plans) version stamps, fetched in one cache round trip"""
+    hr_key = HR_VERSION_KEY.format(hr_profile_id)
+    found = cache.get_many([hr_key, PLANS_VERSION_KEY])
+
+    # A missing counter (never set, or evicted) restarts from the clock,
+    # so it cannot come back at a value an older snapshot was stored under
+    for key in (hr_key, PLANS_VERSION_KEY):
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return found[hr_key], found[PLANS_VERSION_KEY]
+
+
+def _bump(key):
+    cache.add(key, time.time_ns(), None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr: any fresh value invalidates old snapshots
+        cache.set(key, time.time_ns(), None)
+
+
+def compute_entitlements(hr_profile_id):
+    """Build the entitlement snapshot from the database (two queries)"""
+    from apps.wallet.models import Wallet
+    from .models import CompanySubscription
+
+    wallet = Wallet.objects.filter(hr_profile_id=hr_profile_id).values('id', 'balance').first()
+    subscription = CompanySubscription.objects.filter(
+        hr_profile_id=hr_profile_id,
+        status='ACTIVE'
+    ).select_related('plan').order_by('-created_at').first()
+
+    entitlements = {
+        'hr_profile_id': str(hr_profile_id),
+        'wallet_id': wallet['id'] if wallet else None,
+        'balance': wallet['balance'] if wallet else 0,
+        'subscription_id': None,
+        'plan': None,
+        'plan_type': None,
+        'is_unlimited': False,
+        'credits_used': 0,
+        'credits_limit': None,
+        'subscription_credits_remaining': 0,
+        'expires_at': None,
+    }
+
+    if subscription:
+        plan = subscription.plan
+        credits_limit = plan.credits_limit
+        entitlements.update({
+            'subscription_id': str(subscription.id),
+            'plan': plan.name,
+            'plan_type': plan.get_plan_type_display(),
+            'is_unlimited': plan.is_unlimited,
+            'credits_used': subscription.credits_used,
+            'credits_limit': credits_limit,
+            'subscription_credits_remaining': max((credits_limit or 0) - subscription.credits_used, 0),
+            'expires_at': subscription.end_date,
+        })
+
+    return entitlements
+
+
+def get_entitlements(hr_profile):
+    """
+    Entitlement snapshot for an HR profile (or its id): wallet balance, active plan,
+    unlimited flag, remaining subscription credits and expiry.
+    Served from the cache under the current version stamps, computed on a miss.
+    """
+    hr_profile_id = _hr_profile_id(hr_profile)
+    hr_version, plans_version = _versions(hr_profile_id)
+    key = f'entitlements:{hr_profile_id}:{hr_version}:{plans_version}'
+
+    entitlements = cache.get(key)
+    if entitlements is None:
+        entitlements = compute_entitlements(hr_profile_id)
+        entitlements['version'] = f'{hr_version}.{plans_version}'
+        cache.set(key, entitlements, getattr(settings, 'ENTITLEMENTS_CACHE_SECONDS', 300))
+    return entitlements
+
+
+def has_active_subscription(entitlements, now=None):
+    """Whether the snapshot's subscription is still running (checked against expiry, never writes)"""
+    if not entitlements['subscription_id']:
+        return False
+    expires_at = entitlements['expires_at']
+    return expires_at is None or (now or timezone.now()) <= expires_at
+
+
+def has_unlimited_credits(entitlements):
+    return has_active_subscription(entitlements) and entitlements['is_unlimited']
+
+
+def can_use_subscription_credits(entitlements, amount):
+    """Whether the active subscription alone covers amount credits"""
+    if not has_active_subscription(entitlements):
+        return False
+    return entitlements['is_unlimited'] or entitlements['subscription_credits_remaining'] >= amount
+
+
+def can_unlock(entitlements, credits_required):
+    """Unlock decision: subscription first, then wallet balance"""
+    return can_use_subscription_credits(entitlements, credits_required) or entitlements['balance'] >= credits_required
+
+
+def days_remaining(entitlements):
+    """Whole days left on the active subscription, like CompanySubscription.days_until_expiry"""
+    if not entitlements['subscription_id'] or not entitlements['expires_at']:
+        return None
+    delta = entitlements['expires_at'] - timezone.now()
+    return delta.days if delta.days > 0 else 0
+
+
+def invalidate_entitlements(hr_profile):
+    """Retire the cached snapshot of one HR profile"""
+    _bump(HR_VERSION_KEY.format(_hr_profile_id(hr_profile)))
+
+
+def refresh_entitlements(hr_profile):
+    """
+    Snapshot recomputed from the database, replacing the cached one. A denial is only
+    final on current data: call this before refusing on a cached snapshot.
+    """
+    invalidate_entitlements(hr_profile)
+    return get_entitlements(hr_profile)
+
+
+def invalidate_entitlements_many(hr_profiles):
+    """Retire the cached snapshots of several HR profiles (after bulk UPDATEs)"""
+    for hr_profile in hr_profiles:
+        invalidate_entitlements(hr_profile)
+
+
+def invalidate_all_entitlements():
+    """Retire every cached snapshot (plan changes)"""
+    _bump(PLANS_VERSION_KEY)
@@ -7,7 +7,10 @@ from apps.subscriptions.utils import (
 
 
 class Command(BaseCommand):
-    help = 'Check subscription expiry and send notifications'
+    help = (
+        'Check subscription expiry and send notifications. '
+        'Without a `manage.py run_scheduler` process, schedule `check_subscriptions --all` in cron (at least daily).'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
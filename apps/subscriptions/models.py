@@ -6,6 +6,20 @@ from apps.recruiters.models import HRProfile
 import uuid
 
 
+def expiry_warning_level(days):
+    """Warning level for a subscription expiring in days (None when it does not expire)"""
+    if days is None:
+        return None
+
+    if days <= 3:
+        return 'CRITICAL'
+    elif days <= 7:
+        return 'HIGH'
+    elif days <= 15:
+        return 'MEDIUM'
+    return 'LOW'
+
+
 class SubscriptionPlan(models.Model):
     """
     Subscription plans that admin can create and manage
@@ -187,13 +201,15 @@ class CompanySubscription(models.Model):
         )
 
     def is_active(self):
-        """Check if subscription is currently active"""
+        """
+        Check if subscription is currently active
+        Read-only: a passed end date counts as inactive here and the scheduled
+        expiry job (utils.expire_old_subscriptions) flips the status
+        """
         if self.status != 'ACTIVE':
             return False
 
         if self.end_date and timezone.now() > self.end_date:
-            # Auto-expire if end date passed
-            self.mark_expired()
             return False
 
         return True
@@ -216,12 +232,18 @@ class CompanySubscription(models.Model):
         return False
 
     def use_credits(self, amount):
-        """Use credits from subscription"""
-        if self.can_use_credits(amount):
-            self.credits_used += amount
-            self.save()
-            return True
-        return False
+        """Use credits from subscription (conditional UPDATE, safe against concurrent use)"""
+        if not self.can_use_credits(amount):
+            return False
+
+        from apps.wallet.ledger import consume_subscription_credits
+        if not consume_subscription_credits(self.pk, amount):
+            return False
+
+        self.refresh_from_db(fields=['credits_used'])
+        from .entitlements import invalidate_entitlements
+        invalidate_entitlements(self.hr_profile_id)
+        return True
 
     def days_until_expiry(self):
         """Get number of days until subscription expires"""
@@ -233,17 +255,7 @@ class CompanySubscription(models.Model):
 
     def get_expiry_warning_level(self):
         """Get warning level for expiry notification"""
-        days = self.days_until_expiry()
-        if days is None:
-            return None
-
-        if days <= 3:
-            return 'CRITICAL'
-        elif days <= 7:
-            return 'HIGH'
-        elif days <= 15:
-            return 'MEDIUM'
-        return 'LOW'
+        return expiry_warning_level(self.days_until_expiry())
 
 
 class SubscriptionHistory(models.Model):
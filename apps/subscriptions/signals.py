@@ -1,8 +1,10 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from datetime import timedelta
-from .models import CompanySubscription, SubscriptionHistory
+from .entitlements import invalidate_all_entitlements, invalidate_entitlements
+from .models import CompanySubscription, SubscriptionHistory, SubscriptionPlan
 
 
 @receiver(post_save, sender=CompanySubscription)
@@ -191,26 +193,21 @@ def auto_expire_subscriptions(sender, instance, **kwargs):
 
             # Send notification at 7, 3, and 1 day before expiry
             if days_remaining in [7, 3, 1]:
-                # Check if notification already sent for this milestone today
-                notification_exists = UserNotification.objects.filter(
+                # Insert only if this milestone has not been notified yet
+                created = UserNotification.create_if_absent([UserNotification(
                     user=instance.hr_profile.user,
-                    data_payload__subscription_id=str(instance.id),
-                    data_payload__days_remaining=days_remaining,
-                    created_at__date=now.date()
-                ).exists()
-
-                if not notification_exists:
-                    notif = UserNotification.objects.create(
-                        user=instance.hr_profile.user,
-                        title='Subscription Expiring Soon',
-                        body=f'Your {instance.plan.name} subscription will expire in {days_remaining} day{"s" if days_remaining > 1 else ""} on {instance.end_date.strftime("%d %b %Y")}. Please renew to continue.',
-                        data_payload={
-                            'type': 'subscription',
-                            'action': 'expiring',
-                            'subscription_id': str(instance.id),
-                            'days_remaining': days_remaining
-                        }
-                    )
+                    title='Subscription Expiring Soon',
+                    body=f'Your {instance.plan.name} subscription will expire in {days_remaining} day{"s" if days_remaining > 1 else ""} on {instance.end_date.strftime("%d %b %Y")}. Please renew to continue.',
+                    data_payload={
+                        'type': 'subscription',
+                        'action': 'expiring',
+                        'subscription_id': str(instance.id),
+                        'days_remaining': days_remaining
+                    },
+                    dedupe_key=f'subscription_expiring:{instance.id}:{days_remaining}'
+                )])
+
+                for notif in created:
                     # Send FCM notification
                     try:
                         from apps.notifications.services import WorkfinaFCMService
@@ -219,3 +216,25 @@ def auto_expire_subscriptions(sender, instance, **kwargs):
                         pass
 
 
+def _invalidate(invalidate, *args):
+    """Retire cached entitlements now and again after commit, so a concurrent request cannot re-cache stale data"""
+    invalidate(*args)
+    transaction.on_commit(lambda: invalidate(*args))
+
+
+@receiver(post_save, sender=CompanySubscription)
+@receiver(post_delete, sender=CompanySubscription)
+def invalidate_subscription_entitlements(sender, instance, **kwargs):
+    _invalidate(invalidate_entitlements, instance.hr_profile_id)
+
+
+@receiver(post_save, sender='wallet.Wallet')
+@receiver(post_delete, sender='wallet.Wallet')
+def invalidate_wallet_entitlements(sender, instance, **kwargs):
+    _invalidate(invalidate_entitlements, instance.hr_profile_id)
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+@receiver(post_delete, sender=SubscriptionPlan)
+def invalidate_plan_entitlements(sender, instance, **kwargs):
+    _invalidate(invalidate_all_entitlements)
@@ -0,0 +1,101 @@
+from datetime import datetime, time, timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.notifications.models import UserNotification
+from server.scheduler import SCHEDULER_LOCK_KEY
+from .entitlements import get_entitlements
+from .models import CompanySubscription, SubscriptionHistory, SubscriptionPlan
+from .utils import check_expiring_subscriptions, expire_old_subscriptions
+
+User = get_user_model()
+
+
+class SubscriptionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('server.scheduler.run_in_background')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.plan = SubscriptionPlan.objects.create(name='Pro', price=100, is_unlimited=True)
+
+    def _subscribe(self, index, end_date):
+        user = User.objects.create_user(email=f'hr{index}@example.com', password='x', role='hr')
+        subscription = CompanySubscription.objects.create(
+            hr_profile=user.hr_profile,
+            plan=self.plan,
+            status='ACTIVE',
+            start_date=timezone.now() - timedelta(days=30),
+            end_date=timezone.now() + timedelta(days=20)
+        )
+        # Saving a passed end date expires it at once, so move it without save()
+        CompanySubscription.objects.filter(pk=subscription.pk).update(end_date=end_date)
+        subscription.refresh_from_db()
+        return subscription
+
+
+class SubscriptionExpiryTests(SubscriptionTestCase):
+    def test_expired_in_batches(self):
+        expired = [self._subscribe(index, timezone.now() - timedelta(hours=index + 1)) for index in range(2)]
+        current = self._subscribe(2, timezone.now() + timedelta(days=20))
+        self.assertTrue(get_entitlements(expired[0].hr_profile)['subscription_id'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expire_old_subscriptions(batch_size=1), 2)
+
+        self.assertEqual(
+            set(CompanySubscription.objects.filter(status='EXPIRED').values_list('id', flat=True)),
+            {subscription.id for subscription in expired}
+        )
+        current.refresh_from_db()
+        self.assertEqual(current.status, 'ACTIVE')
+        self.assertEqual(SubscriptionHistory.objects.filter(action='EXPIRED').count(), 2)
+        self.assertEqual(UserNotification.objects.filter(title='Subscription Expired').count(), 2)
+        # The bulk UPDATE skips post_save, so the cached snapshot is retired explicitly
+        self.assertIsNone(get_entitlements(expired[0].hr_profile)['subscription_id'])
+
+        self.assertEqual(expire_old_subscriptions(), 0)
+
+    def test_second_scheduler_process_refused(self):
+        cache.set(SCHEDULER_LOCK_KEY, 'other-host:1')
+        with self.assertRaises(CommandError):
+            call_command('run_scheduler')
+
+
+class ExpiryWarningTests(SubscriptionTestCase):
+    def _expiring_in(self, index, days, at=time(12)):
+        day = timezone.localdate() + timedelta(days=days)
+        return self._subscribe(index, timezone.make_aware(datetime.combine(day, at)))
+
+    def test_one_windowed_query_for_every_milestone(self):
+        for index, days in enumerate((1, 3, 5, 7, 10)):
+            self._expiring_in(index, days)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(check_expiring_subscriptions(), 3)
+        self.assertEqual(len([q for q in queries.captured_queries if 'subscriptions_companysubscription' in q['sql']]), 1)
+        self.assertEqual(
+            sorted(UserNotification.objects.filter(title='Subscription Expiring Soon').values_list(
+                'data_payload__days_remaining', flat=True
+            )),
+            [1, 3, 7]
+        )
+
+        # Milestones already notified are skipped
+        self.assertEqual(check_expiring_subscriptions(), 0)
+
+    def test_days_counted_in_project_timezone(self):
+        # Just after local midnight, which is still the previous day in UTC
+        subscription = self._expiring_in(0, 3, at=time(0, 30))
+
+        self.assertEqual(check_expiring_subscriptions(), 1)
+        notification = UserNotification.objects.get(title='Subscription Expiring Soon')
+        self.assertEqual(notification.data_payload['days_remaining'], 3)
+        self.assertIn(timezone.localtime(subscription.end_date).strftime('%d %b %Y'), notification.body)
@@ -1,69 +1,116 @@
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 from .models import CompanySubscription
 
+# Days before expiry at which HRs are warned
+EXPIRY_WARNING_DAYS = (7, 3, 1)
 
-def check_expiring_subscriptions():
+# Expired subscriptions locked and processed per transaction
+EXPIRY_BATCH_SIZE = 500
+
+
+def check_expiring_subscriptions(warning_days=EXPIRY_WARNING_DAYS):
     """
     Check for subscriptions expiring soon and send notifications
-    Should be run daily via cron job or celery task
+    One windowed query finds every subscription due for any warning, the milestone is
+    worked out in Python, and the notifications are deduplicated and inserted in bulk
+    Runs daily from the scheduler
     """
     from apps.notifications.models import UserNotification
 
-    now = timezone.now()
-    warning_days = [7, 3, 1]  # Send notifications at 7, 3, and 1 day before expiry
-    count = 0
-
-    for days in warning_days:
-        expiry_date = now + timedelta(days=days)
-        # Find subscriptions expiring in exactly N days
-        expiring_subscriptions = CompanySubscription.objects.filter(
-            status='ACTIVE',
-            end_date__date=expiry_date.date()
-        )
+    today = timezone.localdate()
+    window_start = timezone.make_aware(datetime.combine(today + timedelta(days=min(warning_days)), time.min))
+    window_end = timezone.make_aware(datetime.combine(today + timedelta(days=max(warning_days) + 1), time.min))
 
-        for subscription in expiring_subscriptions:
-            # Check if notification already sent for this milestone
-            existing = UserNotification.objects.filter(
-                user=subscription.hr_profile.user,
-                data_payload__subscription_id=str(subscription.id),
-                data_payload__days_remaining=days,
-                created_at__date=now.date()
-            ).exists()
-
-            if not existing:
-                UserNotification.objects.create(
-                    user=subscription.hr_profile.user,
-                    title='Subscription Expiring Soon',
-                    body=f'Your {subscription.plan.name} subscription will expire in {days} day{"s" if days > 1 else ""} on {subscription.end_date.strftime("%d %b %Y")}. Please renew to continue.',
-                    data_payload={
-                        'type': 'subscription',
-                        'action': 'expiring',
-                        'subscription_id': str(subscription.id),
-                        'days_remaining': days
-                    }
-                )
-                count += 1
+    expiring_subscriptions = CompanySubscription.objects.filter(
+        status='ACTIVE',
+        end_date__gte=window_start,
+        end_date__lt=window_end
+    ).select_related('hr_profile__user', 'plan')
+
+    notifications = []
+    for subscription in expiring_subscriptions:
+        # Calendar days until the expiry date, as seen in the project timezone
+        end_date = timezone.localtime(subscription.end_date)
+        days = (end_date.date() - today).days
+        if days not in warning_days:
+            continue
+
+        notifications.append(UserNotification(
+            user=subscription.hr_profile.user,
+            title='Subscription Expiring Soon',
+            body=f'Your {subscription.plan.name} subscription will expire in {days} day{"s" if days > 1 else ""} on {end_date.strftime("%d %b %Y")}. Please renew to continue.',
+            data_payload={
+                'type': 'subscription',
+                'action': 'expiring',
+                'subscription_id': str(subscription.id),
+                'days_remaining': days
+            },
+            dedupe_key=f'subscription_expiring:{subscription.id}:{days}'
+        ))
 
-    return count
+    # Skip milestones already notified, checked for the whole batch at once
+    return len(UserNotification.create_if_absent(notifications))
 
 
-def expire_old_subscriptions():
+def expire_old_subscriptions(batch_size=EXPIRY_BATCH_SIZE):
     """
     Mark subscriptions as expired if their end date has passed
-    Should be run daily via cron job or celery task
+    Runs as a scheduled job: each batch is locked, flipped with one conditional UPDATE
+    and gets its history rows and notifications bulk-inserted
     """
-    now = timezone.now()
-
-    expired_subscriptions = CompanySubscription.objects.filter(
-        status='ACTIVE',
-        end_date__lt=now
-    )
+    from django.db import transaction
+    from apps.notifications.services import WorkfinaFCMService
+    from .entitlements import invalidate_entitlements_many
+    from .models import SubscriptionHistory
 
     count = 0
-    for subscription in expired_subscriptions:
-        subscription.mark_expired()
-        count += 1
+
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            subscriptions = list(
+                CompanySubscription.objects.select_for_update(of=('self',)).filter(
+                    status='ACTIVE',
+                    end_date__lt=now
+                ).select_related('plan', 'hr_profile__user').order_by('end_date')[:batch_size]
+            )
+            if not subscriptions:
+                break
+
+            CompanySubscription.objects.filter(
+                id__in=[subscription.id for subscription in subscriptions],
+                status='ACTIVE'
+            ).update(status='EXPIRED', updated_at=now)
+
+            SubscriptionHistory.objects.bulk_create([
+                SubscriptionHistory(
+                    subscription=subscription,
+                    action='EXPIRED',
+                    details={
+                        'old_status': 'ACTIVE',
+                        'new_status': 'EXPIRED',
+                        'changed_at': now.isoformat()
+                    },
+                    notes='Status changed from ACTIVE to EXPIRED'
+                )
+                for subscription in subscriptions
+            ])
+
+            # The UPDATE skipped post_save, so retire the cached entitlements here
+            hr_profile_ids = {subscription.hr_profile_id for subscription in subscriptions}
+            transaction.on_commit(lambda ids=hr_profile_ids: invalidate_entitlements_many(ids))
+
+        WorkfinaFCMService.send_fanout('SUBSCRIPTION_EXPIRED', [
+            (
+                subscription.hr_profile.user,
+                'Subscription Expired',
+                f"Your {subscription.plan.name} subscription has expired. Please renew to continue using unlimited credits.",
+                {'type': 'subscription', 'action': 'expired', 'subscription_id': str(subscription.id)}
+            )
+            for subscription in subscriptions
+        ])
+        count += len(subscriptions)
 
     return count
 
@@ -86,10 +133,8 @@ def has_unlimited_credits(hr_profile):
     """
     Check if HR profile has unlimited credits via active subscription
     """
-    subscription = get_active_subscription(hr_profile)
-    if subscription:
-        return subscription.has_unlimited_credits()
-    return False
+    from .entitlements import get_entitlements, has_unlimited_credits as entitlements_unlimited
+    return entitlements_unlimited(get_entitlements(hr_profile))
 
 
 def can_use_credits(hr_profile, amount=1):
@@ -97,10 +142,11 @@ def can_use_credits(hr_profile, amount=1):
     Check if HR profile can use credits
     Returns (can_use, reason)
     """
-    subscription = get_active_subscription(hr_profile)
+    from .entitlements import get_entitlements, has_active_subscription, can_use_subscription_credits
+    entitlements = get_entitlements(hr_profile)
 
-    if subscription:
-        if subscription.can_use_credits(amount):
+    if has_active_subscription(entitlements):
+        if can_use_subscription_credits(entitlements, amount):
             return (True, "Subscription active")
         else:
             return (False, "Subscription credit limit reached")
@@ -112,10 +158,13 @@ def can_use_credits(hr_profile, amount=1):
 def get_subscription_status(hr_profile):
     """
     Get comprehensive subscription status for HR profile
+    Built from the cached entitlement snapshot
     """
-    subscription = get_active_subscription(hr_profile)
+    from .entitlements import get_entitlements, days_remaining
+    from .models import expiry_warning_level
+    entitlements = get_entitlements(hr_profile)
 
-    if not subscription:
+    if not entitlements['subscription_id']:
         return {
             'has_subscription': False,
             'status': None,
@@ -127,17 +176,18 @@ def get_subscription_status(hr_profile):
             'credits_limit': None
         }
 
+    days = days_remaining(entitlements)
     return {
         'has_subscription': True,
-        'status': subscription.status,
-        'plan': subscription.plan.name,
-        'plan_type': subscription.plan.get_plan_type_display(),
-        'expires_at': subscription.end_date,
-        'days_remaining': subscription.days_until_expiry(),
-        'is_unlimited': subscription.plan.is_unlimited,
-        'credits_used': subscription.credits_used,
-        'credits_limit': subscription.plan.credits_limit,
-        'warning_level': subscription.get_expiry_warning_level()
+        'status': 'ACTIVE',
+        'plan': entitlements['plan'],
+        'plan_type': entitlements['plan_type'],
+        'expires_at': entitlements['expires_at'],
+        'days_remaining': days,
+        'is_unlimited': entitlements['is_unlimited'],
+        'credits_used': entitlements['credits_used'],
+        'credits_limit': entitlements['credits_limit'],
+        'warning_level': expiry_warning_level(days)
     }
 
 
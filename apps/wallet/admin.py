@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Wallet, WalletTransaction, CreditSettings
+from .models import Wallet, WalletTransaction, WalletBalanceSnapshot, CreditSettings
 
 @admin.register(CreditSettings)
 class CreditSettingsAdmin(admin.ModelAdmin):
@@ -31,7 +31,22 @@ class WalletAdmin(admin.ModelAdmin):
 
 @admin.register(WalletTransaction)
 class WalletTransactionAdmin(admin.ModelAdmin):
-    list_display = ['wallet', 'transaction_type', 'credits_added', 'credits_used', 'created_at']
-    list_filter = ['transaction_type', 'created_at']
+    list_display = ['wallet', 'transaction_type', 'credits_added', 'credits_used', 'funded_by', 'created_at']
+    list_filter = ['transaction_type', 'funded_by', 'created_at']
     search_fields = ['wallet__hr_profile__company_name', 'reference_id']
-    readonly_fields = ['created_at']
\ No newline at end of file
+    readonly_fields = ['created_at']
+
+@admin.register(WalletBalanceSnapshot)
+class WalletBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['wallet', 'balance', 'ledger_balance', 'is_consistent', 'last_transaction_id', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['wallet__hr_profile__user__email']
+    readonly_fields = ['wallet', 'balance', 'ledger_balance', 'last_transaction_id', 'created_at']
+
+    @admin.display(boolean=True)
+    def is_consistent(self, obj):
+        return obj.is_consistent
+
+    def has_add_permission(self, request):
+        # Snapshots are only taken by the scheduled job
+        return False
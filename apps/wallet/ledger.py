@@ -0,0 +1,234 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Wallets locked and snapshotted per transaction by the snapshot job
+SNAPSHOT_BATCH_SIZE = 500
+
+
+def _invalidate_entitlements(hr_profile_id):
+    """Conditional UPDATEs skip post_save, so retire the entitlement snapshot here"""
+    from apps.subscriptions.entitlements import invalidate_entitlements
+
+    invalidate_entitlements(hr_profile_id)
+    transaction.on_commit(lambda: invalidate_entitlements(hr_profile_id))
+
+
+def consume_subscription_credits(subscription_id, amount):
+    """
+    Atomically add amount to a subscription's credits_used, only while it is active and
+    either unlimited or its plan limit still covers it. Returns True if the credits were
+    taken: the database decides, never the cached entitlement snapshot.
+
+    The plan terms are read first so the UPDATE filters on the subscription row alone:
+    a guard on a joined table is compiled into a subquery, which PostgreSQL does not
+    re-check after waiting on the row lock of a concurrent unlock.
+    """
+    from apps.subscriptions.models import CompanySubscription
+
+    plan = CompanySubscription.objects.filter(pk=subscription_id).values(
+        'plan__is_unlimited', 'plan__credits_limit'
+    ).first()
+    if plan is None:
+        return False
+
+    guard = Q(end_date__isnull=True) | Q(end_date__gt=timezone.now())
+    if not plan['plan__is_unlimited']:
+        if plan['plan__credits_limit'] is None:
+            return False
+        guard &= Q(credits_used__lte=plan['plan__credits_limit'] - amount)
+
+    return CompanySubscription.objects.filter(
+        guard,
+        pk=subscription_id,
+        status='ACTIVE'
+    ).update(credits_used=F('credits_used') + amount) == 1
+
+
+def debit_credits(wallet, amount, transaction_type='UNLOCK', description='', reference_id=''):
+    """
+    Spend amount credits for wallet: an active subscription first, then the wallet balance.
+    The deduction is a conditional UPDATE and its WalletTransaction is written in the
+    same transaction, so concurrent unlocks neither overdraw nor lose updates.
+    Joins the caller's transaction when there is one (no savepoint).
+    Returns the WalletTransaction, or None when there are not enough credits.
+    """
+    entries = debit_credits_many(wallet, amount, [description], transaction_type, reference_id)
+    return entries[0] if entries else None
+
+
+def debit_credits_many(wallet, amount, descriptions, transaction_type='UNLOCK', reference_id=''):
+    """
+    Spend amount credits once per description with a single conditional UPDATE for the
+    total, and bulk-insert one WalletTransaction per description. All or nothing:
+    returns the WalletTransactions, or None when the total is not covered.
+    """
+    from apps.subscriptions.entitlements import get_entitlements, has_active_subscription
+    from .models import Wallet, WalletTransaction
+
+    total = amount * len(descriptions)
+    entitlements = get_entitlements(wallet.hr_profile_id)
+    subscription_active = has_active_subscription(entitlements)
+
+    with transaction.atomic(savepoint=False):
+        funded_by = None
+
+        # The snapshot only picks which subscription to try; the conditional UPDATE grants
+        if subscription_active and consume_subscription_credits(entitlements['subscription_id'], total):
+            funded_by = 'SUBSCRIPTION'
+
+        if funded_by:
+            Wallet.objects.filter(pk=wallet.pk).update(total_spent=F('total_spent') + total)
+        elif Wallet.objects.filter(pk=wallet.pk, balance__gte=total).update(
+            balance=F('balance') - total,
+            total_spent=F('total_spent') + total
+        ):
+            funded_by = 'WALLET'
+        else:
+            return None
+
+        entries = WalletTransaction.objects.bulk_create([
+            WalletTransaction(
+                wallet=wallet,
+                transaction_type=transaction_type,
+                credits_used=amount,
+                funded_by=funded_by,
+                reference_id=reference_id,
+                description=description
+            )
+            for description in descriptions
+        ])
+        wallet.refresh_from_db(fields=['balance', 'total_spent'])
+        _invalidate_entitlements(wallet.hr_profile_id)
+
+    return entries
+
+
+def credit_wallet(wallet, amount, transaction_type='RECHARGE', description='', reference_id=''):
+    """Add amount credits to wallet and record the WalletTransaction in the same transaction"""
+    from .models import Wallet, WalletTransaction
+
+    with transaction.atomic(savepoint=False):
+        Wallet.objects.filter(pk=wallet.pk).update(balance=F('balance') + amount)
+        entry = WalletTransaction.objects.create(
+            wallet=wallet,
+            transaction_type=transaction_type,
+            credits_added=amount,
+            funded_by='WALLET',
+            reference_id=reference_id,
+            description=description
+        )
+        wallet.refresh_from_db(fields=['balance', 'total_spent'])
+        _invalidate_entitlements(wallet.hr_profile_id)
+
+    return entry
+
+
+def _with_ledger_balance(queryset):
+    """
+    Annotate wallets with ledger_balance (last snapshot + WALLET entries since) and
+    last_transaction_id, so a whole batch is reconciled in one query
+    """
+    from .models import WalletBalanceSnapshot, WalletTransaction
+
+    latest = WalletBalanceSnapshot.objects.filter(wallet=OuterRef('pk')).order_by('-id')
+    queryset = queryset.annotate(
+        snapshot_balance=Subquery(latest.values('balance')[:1]),
+        snapshot_transaction_id=Coalesce(
+            Subquery(latest.values('last_transaction_id')[:1]), Value(0)
+        )
+    )
+
+    recent = WalletTransaction.objects.filter(
+        wallet=OuterRef('pk'),
+        id__gt=OuterRef('snapshot_transaction_id')
+    ).values('wallet')
+    return queryset.annotate(
+        ledger_delta=Coalesce(
+            Subquery(
+                recent.filter(funded_by='WALLET').annotate(
+                    net=Sum(F('credits_added') - F('credits_used'))
+                ).values('net')[:1],
+                output_field=IntegerField()
+            ),
+            Value(0)
+        ),
+        last_transaction_id=Coalesce(
+            Subquery(recent.annotate(last=Max('id')).values('last')[:1]),
+            F('snapshot_transaction_id')
+        )
+    )
+
+
+def _ledger_balance(row):
+    if row['snapshot_balance'] is None:
+        # Nothing to replay from yet: the first snapshot becomes the baseline
+        return row['balance']
+    return row['snapshot_balance'] + row['ledger_delta']
+
+
+def reconcile_wallet(wallet):
+    """Return (ledger_balance, balance) for wallet; they differ if the balance was changed outside the ledger"""
+    from .models import Wallet
+
+    row = _with_ledger_balance(Wallet.objects.filter(pk=wallet.pk)).values(
+        'balance', 'snapshot_balance', 'ledger_delta'
+    ).get()
+    return _ledger_balance(row), row['balance']
+
+
+def snapshot_balances(batch_size=SNAPSHOT_BATCH_SIZE):
+    """
+    Checkpoint every wallet's balance and flag wallets whose balance no longer matches
+    the ledger. Wallets are locked per batch so no debit commits mid-snapshot.
+    Old snapshots beyond WALLET_SNAPSHOT_RETENTION_DAYS are deleted.
+    """
+    from .models import Wallet, WalletBalanceSnapshot
+
+    created = mismatched = 0
+    last_id = 0
+
+    while True:
+        with transaction.atomic():
+            wallets = list(
+                _with_ledger_balance(
+                    Wallet.objects.select_for_update().filter(id__gt=last_id).order_by('id')
+                ).values(
+                    'id', 'balance', 'snapshot_balance', 'ledger_delta', 'last_transaction_id'
+                )[:batch_size]
+            )
+            if not wallets:
+                break
+
+            snapshots = []
+            for row in wallets:
+                ledger_balance = _ledger_balance(row)
+                if ledger_balance != row['balance']:
+                    mismatched += 1
+                    logger.warning(
+                        f"Wallet {row['id']} balance {row['balance']} does not match ledger balance {ledger_balance}"
+                    )
+
+                snapshots.append(WalletBalanceSnapshot(
+                    wallet_id=row['id'],
+                    balance=row['balance'],
+                    ledger_balance=ledger_balance,
+                    last_transaction_id=row['last_transaction_id']
+                ))
+
+            WalletBalanceSnapshot.objects.bulk_create(snapshots)
+            created += len(snapshots)
+            last_id = wallets[-1]['id']
+
+    # Every wallet just got a newer snapshot, so old ones are no longer needed to reconcile
+    days = getattr(settings, 'WALLET_SNAPSHOT_RETENTION_DAYS', 90)
+    WalletBalanceSnapshot.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+
+    logger.info(f'Wallet balance snapshots: {created} taken, {mismatched} mismatched')
+    return {'created': created, 'mismatched': mismatched}
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.27 on 2026-10-19 03:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0002_creditsettings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='funded_by',
+            field=models.CharField(choices=[('WALLET', 'Wallet Balance'), ('SUBSCRIPTION', 'Subscription')], default='WALLET', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='WalletBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.PositiveIntegerField(help_text='Wallet balance when the snapshot was taken')),
+                ('ledger_balance', models.IntegerField(help_text='Balance derived from the previous snapshot and the ledger')),
+                ('last_transaction_id', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='wallet.wallet')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['wallet', '-id'], name='wallet_wall_wallet__c2e514_idx')],
+            },
+        ),
+    ]
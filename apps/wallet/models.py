@@ -30,9 +30,9 @@ class CreditSettings(models.Model):
 
     @classmethod
     def get_settings(cls):
-        """Get or create the singleton settings instance"""
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
+        """Get or create the singleton settings instance (served from the runtime config cache)"""
+        from server.runtime_config import get_config
+        return get_config('credit_settings')
 
     def __str__(self):
         return f"1 Credit = ₹{self.price_per_credit} | Unlock = {self.unlock_credits_required} credits"
@@ -47,11 +47,16 @@ class Wallet(models.Model):
     def __str__(self):
         return f"{self.hr_profile} - Balance: {self.balance}"
 
+    def get_entitlements(self):
+        """Cached entitlement snapshot (subscription + balance) of this wallet's HR profile"""
+        from apps.subscriptions.entitlements import get_entitlements
+        return get_entitlements(self.hr_profile_id)
+
     def has_active_subscription(self):
         """Check if HR profile has an active subscription with unlimited credits"""
         try:
-            from apps.subscriptions.utils import has_unlimited_credits
-            return has_unlimited_credits(self.hr_profile)
+            from apps.subscriptions.entitlements import has_unlimited_credits
+            return has_unlimited_credits(self.get_entitlements())
         except ImportError:
             return False
 
@@ -59,56 +64,27 @@ class Wallet(models.Model):
         """Get subscription status information"""
         try:
             from apps.subscriptions.utils import get_subscription_status
-            return get_subscription_status(self.hr_profile)
+            return get_subscription_status(self.hr_profile_id)
         except ImportError:
             return None
 
     def can_unlock(self, credits_required=10):
         """
         Check if user can unlock a profile
-        First checks for active subscription with unlimited credits
+        First checks for an active subscription covering the credits
         Then checks wallet balance
         """
-        # Check if has active unlimited subscription
-        if self.has_active_subscription():
-            return True
-
-        # Otherwise check wallet balance
-        return self.balance >= credits_required
+        from apps.subscriptions.entitlements import can_unlock
+        return can_unlock(self.get_entitlements(), credits_required)
 
-    def deduct_credits(self, amount):
+    def deduct_credits(self, amount, description=''):
         """
         Deduct credits from wallet
-        If user has active unlimited subscription, don't deduct from balance
-        Otherwise deduct from wallet balance
+        If user has an active subscription covering the credits, don't deduct from balance
+        Otherwise deduct from wallet balance (see apps.wallet.ledger.debit_credits)
         """
-        # Check for active unlimited subscription
-        if self.has_active_subscription():
-            # Track usage in subscription but don't deduct from wallet
-            try:
-                from apps.subscriptions.utils import get_active_subscription
-                subscription = get_active_subscription(self.hr_profile)
-                if subscription and subscription.plan.is_unlimited:
-                    # For unlimited plans, just track in total_spent
-                    self.total_spent += amount
-                    self.save()
-                    return True
-                elif subscription:
-                    # For limited subscription plans, use subscription credits
-                    if subscription.use_credits(amount):
-                        self.total_spent += amount
-                        self.save()
-                        return True
-            except ImportError:
-                pass
-
-        # No subscription or subscription credits exhausted, use wallet balance
-        if self.balance >= amount:
-            self.balance -= amount
-            self.total_spent += amount
-            self.save()
-            return True
-        return False
+        from .ledger import debit_credits
+        return debit_credits(self, amount, description=description) is not None
 
 class WalletTransaction(models.Model):
     TRANSACTION_TYPES = [
@@ -117,10 +93,17 @@ class WalletTransaction(models.Model):
         ('REFUND', 'Refund'),
     ]
     
+    FUNDING_SOURCES = [
+        ('WALLET', 'Wallet Balance'),
+        ('SUBSCRIPTION', 'Subscription'),
+    ]
+
     wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE)
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
     credits_added = models.PositiveIntegerField(default=0)
     credits_used = models.PositiveIntegerField(default=0)
+    # Only WALLET entries move the balance; SUBSCRIPTION entries are usage records
+    funded_by = models.CharField(max_length=20, choices=FUNDING_SOURCES, default='WALLET')
     reference_id = models.CharField(max_length=100, blank=True)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -129,4 +112,30 @@ class WalletTransaction(models.Model):
         ordering = ['-created_at']
         
     def __str__(self):
-        return f"{self.wallet.hr_profile} - {self.transaction_type}"
\ No newline at end of file
+        return f"{self.wallet.hr_profile} - {self.transaction_type}"
+
+
+class WalletBalanceSnapshot(models.Model):
+    """
+    Periodic checkpoint of a wallet's balance. Reconciliation replays only the
+    ledger entries after last_transaction_id instead of the wallet's full history.
+    """
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='snapshots')
+    balance = models.PositiveIntegerField(help_text="Wallet balance when the snapshot was taken")
+    ledger_balance = models.IntegerField(help_text="Balance derived from the previous snapshot and the ledger")
+    last_transaction_id = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['wallet', '-id']),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet.hr_profile} - {self.balance} at {self.created_at}"
+
+    @property
+    def is_consistent(self):
+        return self.balance == self.ledger_balance
+
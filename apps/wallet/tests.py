@@ -1,3 +1,125 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-# Create your tests here.
+from apps.subscriptions.entitlements import get_entitlements
+from apps.subscriptions.models import CompanySubscription, SubscriptionPlan
+from .ledger import consume_subscription_credits, credit_wallet, debit_credits, debit_credits_many, reconcile_wallet, snapshot_balances
+from .models import Wallet, WalletBalanceSnapshot, WalletTransaction
+
+User = get_user_model()
+
+
+@mock.patch('server.scheduler.run_in_background')
+class LedgerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(email='hr@example.com', password='x', role='hr')
+        self.hr_profile = user.hr_profile
+        self.wallet = Wallet.objects.create(hr_profile=self.hr_profile, balance=30)
+
+    def _subscribe(self, is_unlimited=True, credits_limit=None):
+        plan = SubscriptionPlan.objects.create(
+            name='Plan', price=100, is_unlimited=is_unlimited, credits_limit=credits_limit
+        )
+        return CompanySubscription.objects.create(
+            hr_profile=self.hr_profile,
+            plan=plan,
+            status='ACTIVE',
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=30)
+        )
+
+    def test_debit_from_wallet(self, run_in_background):
+        entry = debit_credits(self.wallet, 10, description='unlock')
+
+        self.assertEqual(entry.funded_by, 'WALLET')
+        self.assertEqual(self.wallet.balance, 20)
+        self.assertEqual(self.wallet.total_spent, 10)
+
+    def test_insufficient_balance_writes_nothing(self, run_in_background):
+        self.assertIsNone(debit_credits(self.wallet, 40))
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, 30)
+        self.assertFalse(WalletTransaction.objects.exists())
+
+    def test_stale_instance_does_not_lose_updates(self, run_in_background):
+        stale = Wallet.objects.get(pk=self.wallet.pk)
+        debit_credits(self.wallet, 10)
+        debit_credits(stale, 10)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, 10)
+        self.assertEqual(self.wallet.total_spent, 20)
+
+    def test_bulk_debit_is_all_or_nothing(self, run_in_background):
+        self.assertIsNone(debit_credits_many(self.wallet, 10, ['a', 'b', 'c', 'd']))
+        self.assertFalse(WalletTransaction.objects.exists())
+
+        entries = debit_credits_many(self.wallet, 10, ['a', 'b', 'c'])
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(self.wallet.balance, 0)
+
+    def test_unlimited_subscription_funds_unlock(self, run_in_background):
+        subscription = self._subscribe()
+        entry = debit_credits(self.wallet, 10)
+
+        self.assertEqual(entry.funded_by, 'SUBSCRIPTION')
+        self.assertEqual(self.wallet.balance, 30)
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.credits_used, 10)
+
+    def test_cancelled_subscription_not_granted_from_stale_snapshot(self, run_in_background):
+        subscription = self._subscribe()
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=0)
+        self.wallet.refresh_from_db()
+        get_entitlements(self.hr_profile)
+
+        # Cancelled by a write that skips invalidation (e.g. another worker's cache)
+        CompanySubscription.objects.filter(pk=subscription.pk).update(status='CANCELLED')
+        self.assertTrue(get_entitlements(self.hr_profile)['is_unlimited'])
+
+        self.assertIsNone(debit_credits(self.wallet, 10))
+        self.assertFalse(WalletTransaction.objects.exists())
+
+    def test_limited_subscription_falls_back_to_wallet(self, run_in_background):
+        subscription = self._subscribe(is_unlimited=False, credits_limit=15)
+
+        self.assertEqual(debit_credits(self.wallet, 10).funded_by, 'SUBSCRIPTION')
+        self.assertEqual(debit_credits(self.wallet, 10).funded_by, 'WALLET')
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.credits_used, 10)
+        self.assertEqual(self.wallet.balance, 20)
+
+    def test_credit_limit_guard_is_on_the_locked_row(self, run_in_background):
+        subscription = self._subscribe(is_unlimited=False, credits_limit=15)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(consume_subscription_credits(subscription.pk, 10))
+        update = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(update), 1)
+        # A subquery or join would not be re-evaluated after a row lock wait
+        self.assertNotIn('SELECT', update[0])
+        self.assertNotIn('subscriptionplan', update[0])
+
+        self.assertFalse(consume_subscription_credits(subscription.pk, 10))
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.credits_used, 10)
+
+    def test_reconcile_and_snapshot_detect_drift(self, run_in_background):
+        credit_wallet(self.wallet, 20)
+        debit_credits(self.wallet, 10)
+        snapshot_balances()
+        self.assertEqual(reconcile_wallet(self.wallet), (40, 40))
+
+        # Changed outside the ledger
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=100)
+        self.assertEqual(reconcile_wallet(self.wallet), (40, 100))
+        self.assertEqual(snapshot_balances()['mismatched'], 1)
+        self.assertFalse(WalletBalanceSnapshot.objects.order_by('-id').first().is_consistent)
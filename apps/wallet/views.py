@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from .models import Wallet, WalletTransaction, CreditSettings
+from .ledger import credit_wallet
 from .serializers import WalletSerializer, WalletTransactionSerializer, RechargeWalletSerializer, CreditSettingsSerializer
 from apps.recruiters.models import HRProfile
 
@@ -35,15 +36,10 @@ def recharge_wallet(request):
             credits = serializer.validated_data['credits']
             payment_reference = serializer.validated_data.get('payment_reference', '')
             
-            # Add credits to wallet
-            wallet.balance += credits
-            wallet.save()
-            
-            # Create transaction record
-            WalletTransaction.objects.create(
-                wallet=wallet,
-                transaction_type='RECHARGE',
-                credits_added=credits,
+            # Add credits to wallet and record the transaction atomically
+            credit_wallet(
+                wallet,
+                credits,
                 reference_id=payment_reference,
                 description=f'Wallet recharged with {credits} credits'
             )
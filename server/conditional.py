@@ -0,0 +1,73 @@
+import hashlib
+import logging
+from functools import wraps
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.http import http_date
+from rest_framework import status
+from .runtime_config import get_generations, get_modified_times
+
+logger = logging.getLogger(__name__)
+
+
+def _etag(request, generations, public):
+    """Hash of the generations plus everything else the payload depends on"""
+    parts = [
+        request.get_host(),
+        request.get_full_path(),
+        request.headers.get('Accept', ''),
+        request.headers.get('Accept-Encoding', ''),
+    ]
+    parts.extend(f'{name}={generation}' for name, generation in sorted(generations.items()))
+    if not public:
+        parts.append(str(request.user.pk))
+    return quote_etag(hashlib.sha256('|'.join(parts).encode()).hexdigest()[:32])
+
+
+def conditional_get(stamps, public=False):
+    """
+    Decorator for DRF views: GET responses carry an ETag and Last-Modified derived from
+    the runtime config generations named in stamps (server/runtime_config.py), and a
+    client whose copy is still current gets 304 Not Modified without the view running.
+    stamps is a list of names or a callable(request) returning one.
+
+    public responses are the same for every user and may be stored by shared caches
+    for PUBLIC_CACHE_MAX_AGE_SECONDS; the rest are private and revalidated on each use.
+    Place it below @api_view/@permission_classes (or wrap APIView.get with
+    method_decorator) so only authorised requests are answered.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            names = stamps(request) if callable(stamps) else stamps
+            generations = get_generations(names)
+            etag = _etag(request, generations, public)
+            modified_times = [t for t in get_modified_times(names).values() if t]
+            last_modified = int(max(modified_times)) if modified_times else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                # Errors are not cacheable, so they get no validators
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+            elif response.status_code != status.HTTP_304_NOT_MODIFIED:
+                return response
+
+            response.headers['ETag'] = etag
+            if last_modified:
+                response.headers['Last-Modified'] = http_date(last_modified)
+            if public:
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=getattr(settings, 'PUBLIC_CACHE_MAX_AGE_SECONDS', 300)
+                )
+            else:
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapped
+    return decorator
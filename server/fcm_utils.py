@@ -8,6 +8,7 @@ logger = logging.getLogger(__name__)
 
 class SimpleFCM:
     _app = None
+    TOPIC_BATCH_SIZE = 1000
     
     @classmethod
     def initialize(cls):
@@ -134,7 +135,9 @@ class SimpleFCM:
                 tokens=tokens,
             )
 
-            response = messaging.send_multicast(message)
+            # send_multicast was removed in newer firebase-admin releases
+            send = getattr(messaging, 'send_each_for_multicast', None) or messaging.send_multicast
+            response = send(message)
             logger.info(f"FCM multicast sent: {response.success_count}/{len(tokens)} successful")
             
             return {
@@ -151,4 +154,139 @@ class SimpleFCM:
                 'error': str(e),
                 'success_count': 0,
                 'failure_count': len(tokens)
-            }
\ No newline at end of file
+            }
+
+    @classmethod
+    def send_each(cls, messages, play_sound=True):
+        """
+        Send (token, title, body, data) messages that differ per recipient in one batch
+        request (at most 500). Returns the per-message responses in the same order.
+        """
+        cls.initialize()
+
+        try:
+            android_config = messaging.AndroidConfig(
+                priority='high',
+                notification=messaging.AndroidNotification(
+                    sound='default' if play_sound else None,
+                    channel_id='workfina_notifications'
+                )
+            )
+            apns_config = messaging.APNSConfig(
+                payload=messaging.APNSPayload(
+                    aps=messaging.Aps(
+                        sound='default' if play_sound else None,
+                        badge=1
+                    )
+                )
+            )
+
+            response = messaging.send_each([
+                messaging.Message(
+                    notification=messaging.Notification(title=title, body=body),
+                    android=android_config,
+                    apns=apns_config,
+                    # Convert all data values to strings (FCM requirement)
+                    data={k: str(v) for k, v in (data or {}).items()},
+                    token=token,
+                )
+                for token, title, body, data in messages
+            ])
+            logger.info(f"FCM batch sent: {response.success_count}/{len(messages)} successful")
+
+            return {
+                'success': response.success_count > 0,
+                'success_count': response.success_count,
+                'failure_count': response.failure_count,
+                'responses': response.responses
+            }
+
+        except Exception as e:
+            logger.error(f"FCM batch send failed: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'success_count': 0,
+                'failure_count': len(messages)
+            }
+
+    @classmethod
+    def send_to_topic(cls, topic=None, title='', body='', data=None, play_sound=True, condition=None):
+        """Send one notification to every device subscribed to a topic (or matching a topic condition)"""
+        cls.initialize()
+
+        try:
+            # Android notification config with sound
+            android_config = messaging.AndroidConfig(
+                priority='high',
+                notification=messaging.AndroidNotification(
+                    sound='default' if play_sound else None,
+                    channel_id='workfina_notifications'
+                )
+            )
+
+            # iOS/APNs notification config with sound
+            apns_config = messaging.APNSConfig(
+                payload=messaging.APNSPayload(
+                    aps=messaging.Aps(
+                        sound='default' if play_sound else None,
+                        badge=1
+                    )
+                )
+            )
+
+            # Convert all data values to strings (FCM requirement)
+            string_data = {k: str(v) for k, v in (data or {}).items()}
+
+            message = messaging.Message(
+                notification=messaging.Notification(
+                    title=title,
+                    body=body,
+                ),
+                android=android_config,
+                apns=apns_config,
+                data=string_data,
+                topic=topic,
+                condition=condition,
+            )
+
+            response = messaging.send(message)
+            logger.info(f"FCM topic message sent to {topic or condition}: {response}")
+
+            return {'success': True, 'message_id': response}
+
+        except Exception as e:
+            logger.error(f"FCM topic send failed: {e}", exc_info=True)
+            return {'success': False, 'error': str(e)}
+
+    @classmethod
+    def _manage_topic(cls, tokens, topic, subscribe):
+        cls.initialize()
+
+        success_count = 0
+        failure_count = 0
+        # FCM accepts at most 1000 tokens per topic management request
+        for start in range(0, len(tokens), cls.TOPIC_BATCH_SIZE):
+            batch = tokens[start:start + cls.TOPIC_BATCH_SIZE]
+            try:
+                if subscribe:
+                    response = messaging.subscribe_to_topic(batch, topic)
+                else:
+                    response = messaging.unsubscribe_from_topic(batch, topic)
+                success_count += response.success_count
+                failure_count += response.failure_count
+            except Exception as e:
+                logger.error(f"FCM topic {'subscribe' if subscribe else 'unsubscribe'} failed for {topic}: {e}")
+                failure_count += len(batch)
+
+        return {'success': failure_count == 0, 'success_count': success_count, 'failure_count': failure_count}
+
+    @classmethod
+    def subscribe_to_topic(cls, tokens, topic):
+        """Subscribe tokens to a topic in batches of 1000"""
+        return cls._manage_topic(list(tokens), topic, subscribe=True)
+
+    @classmethod
+    def unsubscribe_from_topic(cls, tokens, topic):
+        """Unsubscribe tokens from a topic in batches of 1000"""
+        return cls._manage_topic(list(tokens), topic, subscribe=False)
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import logging
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# How long an in-flight request holds its key before a retry may run it again
+IDEMPOTENCY_LOCK_SECONDS = 30
+
+# 4xx statuses that depend on timing rather than on the request, so a retry may succeed
+TRANSIENT_STATUSES = {
+    status.HTTP_408_REQUEST_TIMEOUT,
+    status.HTTP_409_CONFLICT,
+    status.HTTP_423_LOCKED,
+    status.HTTP_425_TOO_EARLY,
+    status.HTTP_429_TOO_MANY_REQUESTS,
+}
+
+
+def _fingerprint(request):
+    """Method, path and body of the request, so a key cannot be reused for a different call"""
+    try:
+        body = json.dumps(request.data, sort_keys=True, default=str)
+    except Exception:
+        body = ''
+    return hashlib.sha256(f'{request.method}:{request.path}:{body}'.encode()).hexdigest()
+
+
+def is_final(response):
+    """
+    Whether a response is the settled outcome of the request and may be replayed:
+    2xx, or a 4xx that is neither a transient status nor marked 'retryable' in its data
+    (e.g. a deduction that lost a race with a concurrent spend)
+    """
+    if not hasattr(response, 'data'):
+        return False
+    if status.is_success(response.status_code):
+        return True
+    if not status.is_client_error(response.status_code) or response.status_code in TRANSIENT_STATUSES:
+        return False
+    return not (isinstance(response.data, dict) and response.data.get('retryable'))
+
+
+def idempotent(scope):
+    """
+    Decorator for DRF function views: a request carrying an Idempotency-Key header
+    runs once per user and key, and retries get the stored response replayed
+    (with an Idempotent-Replayed header). Only final responses are stored (is_final):
+    5xx, conflicts and retryable failures are not, so the same key can be retried.
+    Place it below @api_view/@permission_classes so the user is authenticated.
+
+    The lock and the stored responses live in the default cache, which must be shared
+    by every worker (the Redis CACHES entry in settings); with a per-process cache a
+    retry landing on another worker would run the view again.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view(request, *args, **kwargs)
+
+            if len(key) > 255:
+                return Response({
+                    'error': f'{IDEMPOTENCY_HEADER} must be at most 255 characters'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            digest = hashlib.sha256(key.encode()).hexdigest()
+            cache_key = f'idempotency:{scope}:{request.user.pk}:{digest}'
+            lock_key = f'{cache_key}:lock'
+            fingerprint = _fingerprint(request)
+
+            stored = cache.get(cache_key)
+            if stored is None:
+                if not cache.add(lock_key, True, IDEMPOTENCY_LOCK_SECONDS):
+                    return Response({
+                        'error': 'A request with this Idempotency-Key is already being processed'
+                    }, status=status.HTTP_409_CONFLICT)
+
+                try:
+                    # Another request may have finished between the get and taking the lock
+                    stored = cache.get(cache_key)
+                    if stored is None:
+                        response = view(request, *args, **kwargs)
+                        if is_final(response):
+                            cache.set(cache_key, {
+                                'fingerprint': fingerprint,
+                                'status': response.status_code,
+                                'data': response.data,
+                            }, getattr(settings, 'IDEMPOTENCY_KEY_TTL_SECONDS', 86400))
+                        return response
+                finally:
+                    cache.delete(lock_key)
+
+            if stored['fingerprint'] != fingerprint:
+                return Response({
+                    'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'
+                }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+            logger.info(f'Replaying {scope} response for user {request.user.pk}')
+            response = Response(stored['data'], status=stored['status'])
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        return wrapped
+    return decorator
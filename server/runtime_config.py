@@ -0,0 +1,210 @@
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'runtime_config_generation:{}'
+
+# When the generation last moved (epoch seconds), used as Last-Modified by server/conditional.py
+MODIFIED_KEY = 'runtime_config_modified:{}'
+
+
+def get_generations(names):
+    """Current generation of each name, fetched in one cache round trip"""
+    keys = {name: GENERATION_KEY.format(name) for name in names}
+    found = cache.get_many(list(keys.values()))
+
+    generations = {}
+    for name, key in keys.items():
+        if key not in found:
+            # Starting from the clock means an evicted counter cannot repeat an old value
+            cache.add(key, time.time_ns(), None)
+            cache.add(MODIFIED_KEY.format(name), time.time(), None)
+            found[key] = cache.get(key)
+        generations[name] = found[key]
+    return generations
+
+
+def get_generation(name):
+    return get_generations([name])[name]
+
+
+def get_modified_times(names):
+    """Epoch seconds each name last changed (or was first seen by the cache)"""
+    keys = {name: MODIFIED_KEY.format(name) for name in names}
+    found = cache.get_many(list(keys.values()))
+    return {name: found.get(key) for name, key in keys.items()}
+
+
+def bump_generation(name):
+    key = GENERATION_KEY.format(name)
+    cache.add(key, time.time_ns(), None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+    cache.set(MODIFIED_KEY.format(name), time.time(), None)
+
+
+def bump_on_commit(name):
+    """Bump now and again after commit: a reader mid-transaction would otherwise cache the old rows"""
+    bump_generation(name)
+    transaction.on_commit(lambda: bump_generation(name))
+
+
+def track(name, models):
+    """Bump the generation of name whenever a row of one of models is saved or deleted"""
+    def on_write(**kwargs):
+        bump_on_commit(name)
+
+    for model in models:
+        post_save.connect(on_write, sender=model, weak=False, dispatch_uid=f'runtime_config_{name}_{model}_save')
+        post_delete.connect(on_write, sender=model, weak=False, dispatch_uid=f'runtime_config_{name}_{model}_delete')
+
+
+class RuntimeConfig:
+    """
+    Admin-managed rows read on many requests, kept in process memory.
+    Writes to any of the source models bump a generation counter in the shared
+    cache (settings.CACHES); every worker compares it on access and reloads only
+    when it moved. A loaded value is also reloaded after RUNTIME_CONFIG_MAX_AGE_SECONDS,
+    which bounds staleness from writes that skip signals or a lost cache.
+    """
+
+    def __init__(self, name, loader, models):
+        self.name = name
+        self.loader = loader
+        self.models = models
+        self._lock = threading.Lock()
+        # (generation, value, loaded_at) replaced as a whole, so readers never see a half update
+        self._loaded = None
+
+    def _is_current(self, loaded, generation):
+        max_age = getattr(settings, 'RUNTIME_CONFIG_MAX_AGE_SECONDS', 300)
+        return (
+            loaded is not None
+            and loaded[0] == generation
+            and time.monotonic() - loaded[2] < max_age
+        )
+
+    def get(self):
+        generation = get_generation(self.name)
+        loaded = self._loaded
+        if self._is_current(loaded, generation):
+            return loaded[1]
+
+        with self._lock:
+            loaded = self._loaded
+            if not self._is_current(loaded, generation):
+                loaded = (generation, self.loader(), time.monotonic())
+                self._loaded = loaded
+        return loaded[1]
+
+    def invalidate(self):
+        bump_generation(self.name)
+
+
+_registry = {}
+
+
+def register(name, models):
+    """Decorator registering loader() as the runtime config entry name, reloaded when models change"""
+    def decorator(loader):
+        entry = RuntimeConfig(name, loader, models)
+        track(name, models)
+        _registry[name] = entry
+        return entry
+    return decorator
+
+
+def get_config(name):
+    return _registry[name].get()
+
+
+def invalidate_all():
+    for entry in _registry.values():
+        entry.invalidate()
+
+
+@register('credit_settings', ['wallet.CreditSettings'])
+def load_credit_settings():
+    from apps.wallet.models import CreditSettings
+    obj, created = CreditSettings.objects.get_or_create(pk=1)
+    return obj
+
+
+@register('hiring_availability_ui', ['candidates.HiringAvailabilityUI'])
+def load_hiring_availability_ui():
+    """The active configuration row (image URLs are made absolute per request)"""
+    from apps.candidates.models import HiringAvailabilityUI
+    return HiringAvailabilityUI.objects.filter(is_active=True).first()
+
+
+@register('dashboard_content', ['content.DashboardContent'])
+def load_dashboard_content():
+    """Serialized active content per screen"""
+    from apps.content.models import DashboardContent
+    from apps.content.serializers import DashboardContentSerializer
+    return {
+        content.screen: DashboardContentSerializer(content).data
+        for content in DashboardContent.objects.filter(is_active=True)
+    }
+
+
+@register('active_banner', ['banners.Banner'])
+def load_active_banner():
+    from apps.banners.models import Banner
+    return Banner.objects.filter(is_active=True).first()
+
+
+@register('recruiter_banners', ['banners.RecruiterBanner'])
+def load_recruiter_banners():
+    from apps.banners.models import RecruiterBanner
+    return list(RecruiterBanner.objects.filter(is_active=True))
+
+
+@register('profile_tips', ['candidates.ProfileTip'])
+def load_profile_tips():
+    from apps.candidates.models import ProfileTip
+    return [
+        {
+            'id': str(tip.id),
+            'title': tip.title,
+            'subtitle': tip.subtitle,
+            'icon_type': tip.icon_type,
+            'instructions': tip.instructions,
+            'display_order': tip.display_order
+        }
+        for tip in ProfileTip.objects.filter(is_active=True).order_by('display_order')
+    ]
+
+
+@register('latest_app_versions', ['app_version.AppVersion'])
+def load_latest_app_versions():
+    """Latest active AppVersion row per platform (BOTH rows count for each)"""
+    from apps.app_version.models import AppVersion
+    return {
+        platform: AppVersion.objects.filter(
+            platform__in=[platform, 'BOTH'],
+            is_active=True
+        ).order_by('-version_code').first()
+        for platform in ('ANDROID', 'IOS')
+    }
+
+
+
+@register('taxonomy_snapshot', ['candidates.TaxonomySnapshot'])
+def load_taxonomy_snapshot():
+    """Latest compressed taxonomy snapshot (apps/candidates/taxonomy.py)"""
+    from apps.candidates.taxonomy import latest_snapshot
+    return latest_snapshot()
+
+
+# Generations without a cached value of their own: version stamps for server/conditional.py
+track('filter_taxonomy', ['candidates.FilterCategory', 'candidates.FilterOption'])
+track('candidates', ['candidates.Candidate'])
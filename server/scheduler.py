@@ -1,14 +1,23 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.memory import MemoryJobStore
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 import logging
+import os
+import socket
 
 logger = logging.getLogger(__name__)
 
 # Global scheduler instance
 scheduler = None
 
+# Held in the shared cache by the one process running the daily jobs (manage.py run_scheduler)
+SCHEDULER_LOCK_KEY = 'scheduler_lock'
+
+# The lock outlives a crashed holder by at most this long
+SCHEDULER_LOCK_SECONDS = 60
+
 
 def get_scheduler():
     """Get or create the global scheduler instance"""
@@ -23,6 +32,21 @@ def get_scheduler():
     return scheduler
 
 
+def run_in_background(func, *args, job_id=None):
+    """Run func(*args) on the scheduler's worker threads as soon as possible"""
+    sched = get_scheduler()
+
+    sched.add_job(
+        func,
+        'date',
+        run_date=timezone.now(),
+        args=list(args),
+        id=job_id,
+        replace_existing=job_id is not None,
+        misfire_grace_time=None
+    )
+
+
 def send_followup_notification(followup_id):
     """Send notification for a specific followup"""
     from apps.candidates.models import CandidateFollowup
@@ -45,8 +69,8 @@ def send_followup_notification(followup_id):
         title = "Follow-up Reminder"
         body = f"Reminder: Follow-up with {candidate_name} in 5 minutes at {followup_time}"
 
-        # Create notification record
-        notification = UserNotification.objects.create(
+        # Create notification record, unless this followup was already notified
+        created = UserNotification.create_if_absent([UserNotification(
             user=hr_user,
             title=title,
             body=body,
@@ -56,8 +80,13 @@ def send_followup_notification(followup_id):
                 'candidate_id': str(followup.candidate.id),
                 'candidate_name': candidate_name
             },
-            status='PENDING'
-        )
+            status='PENDING',
+            dedupe_key=f"followup_reminder:{followup.id}"
+        )])
+        if not created:
+            logger.info(f"Followup {followup_id} already notified")
+            return
+        notification = created[0]
 
         # Send FCM push notification
         if hasattr(hr_user, 'fcm_token') and hr_user.fcm_token:
@@ -155,6 +184,167 @@ def send_daily_availability_reminder():
         logger.error(f"Error in daily availability reminder: {e}")
 
 
+def send_availability_reminder_batch(candidate_ids):
+    """Send one spread-out batch of the daily availability reminder"""
+    from apps.notifications.services import WorkfinaFCMService
+
+    try:
+        result = WorkfinaFCMService.send_availability_reminder_batch(candidate_ids)
+        logger.info(f"Availability reminder batch completed: {result}")
+    except Exception as e:
+        logger.error(f"Error in availability reminder batch: {e}")
+
+
+def schedule_availability_reminder_batch(candidate_ids, run_date):
+    """Schedule a batch of availability reminders at the given time"""
+    sched = get_scheduler()
+
+    sched.add_job(
+        send_availability_reminder_batch,
+        'date',
+        run_date=run_date,
+        args=[candidate_ids],
+        id=f"availability_reminder_{candidate_ids[0]}",
+        replace_existing=True,
+        misfire_grace_time=None
+    )
+
+
+def rollup_notification_stats():
+    """Store yesterday's notification totals for historical charts"""
+    from apps.notifications.stats import rollup_notification_stats as rollup
+
+    try:
+        rollup()
+        logger.info("Notification stats rollup completed")
+    except Exception as e:
+        logger.error(f"Error in notification stats rollup: {e}")
+
+
+def purge_expired_notifications():
+    """Delete or archive notifications past their retention policy"""
+    from apps.notifications.retention import run_retention
+
+    try:
+        run = run_retention()
+        logger.info(f"Notification retention completed: {run.deleted_notifications} notifications, {run.deleted_logs} logs")
+    except Exception as e:
+        logger.error(f"Error in notification retention: {e}")
+
+
+def flush_notification_digests():
+    """Send coalesced notification digests whose window has ended"""
+    from apps.notifications.coalescing import flush_due_digests
+
+    try:
+        flushed = flush_due_digests()
+        if flushed:
+            logger.info(f"Flushed {flushed} notification digests")
+    except Exception as e:
+        logger.error(f"Error flushing notification digests: {e}")
+
+
+def purge_sent_emails():
+    """Delete sent emails from the outbox once past retention"""
+    from apps.authentication.email_outbox import purge_sent_emails as purge
+
+    try:
+        logger.info(f"Purged {purge()} sent emails from the outbox")
+    except Exception as e:
+        logger.error(f"Error purging email outbox: {e}")
+
+
+def purge_expired_otps():
+    """Delete expired signup OTPs in batches"""
+    from apps.authentication.otp_store import purge_expired_otps as purge
+
+    try:
+        purge()
+    except Exception as e:
+        logger.error(f"Error purging expired OTPs: {e}")
+
+
+def purge_expired_tokens():
+    """Delete expired outstanding/blacklisted JWTs in batches"""
+    from apps.authentication.token_blacklist import purge_expired_tokens as purge
+
+    try:
+        purge()
+    except Exception as e:
+        logger.error(f"Error purging expired tokens: {e}")
+
+
+def rebuild_token_blacklist_filter():
+    """Rebuild this process's Bloom filter of blacklisted token JTIs"""
+    from apps.authentication.token_blacklist import blacklist_filter
+
+    try:
+        blacklist_filter.rebuild()
+    except Exception as e:
+        logger.error(f"Error rebuilding token blacklist filter: {e}")
+
+
+def snapshot_wallet_balances():
+    """Checkpoint wallet balances and flag any that drifted from the ledger"""
+    from apps.wallet.ledger import snapshot_balances
+
+    try:
+        snapshot_balances()
+    except Exception as e:
+        logger.error(f"Error taking wallet balance snapshots: {e}")
+
+
+def expire_subscriptions():
+    """Flip ACTIVE subscriptions past their end date to EXPIRED"""
+    from apps.subscriptions.utils import expire_old_subscriptions
+
+    try:
+        count = expire_old_subscriptions()
+        if count:
+            logger.info(f"Expired {count} subscriptions")
+    except Exception as e:
+        logger.error(f"Error expiring subscriptions: {e}")
+
+
+def notify_expiring_subscriptions():
+    """Send 7/3/1-day expiry warnings for active subscriptions"""
+    from apps.subscriptions.utils import check_expiring_subscriptions
+
+    try:
+        check_expiring_subscriptions()
+    except Exception as e:
+        logger.error(f"Error sending subscription expiry warnings: {e}")
+
+
+def scheduler_lock_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_scheduler_lock():
+    """Take the daily jobs lock; False while another live process holds it"""
+    from django.core.cache import cache
+
+    owner = scheduler_lock_owner()
+    return cache.add(SCHEDULER_LOCK_KEY, owner, SCHEDULER_LOCK_SECONDS) or cache.get(SCHEDULER_LOCK_KEY) == owner
+
+
+def renew_scheduler_lock():
+    """Heartbeat of the lock holder; takes the lock back if it expired during a stall"""
+    from django.core.cache import cache
+
+    if acquire_scheduler_lock():
+        cache.set(SCHEDULER_LOCK_KEY, scheduler_lock_owner(), SCHEDULER_LOCK_SECONDS)
+    else:
+        logger.error("Scheduler lock was taken by another process; daily jobs may run twice")
+
+
+def release_scheduler_lock():
+    from django.core.cache import cache
+
+    if cache.get(SCHEDULER_LOCK_KEY) == scheduler_lock_owner():
+        cache.delete(SCHEDULER_LOCK_KEY)
+
+
 def start_daily_jobs():
     """Start all daily scheduled jobs"""
     sched = get_scheduler()
@@ -170,4 +360,111 @@ def start_daily_jobs():
         timezone='Asia/Kolkata'
     )
 
-    logger.info("Daily jobs scheduled: availability reminder at 8 AM IST")
+    # Daily notification stats rollup shortly after midnight
+    sched.add_job(
+        rollup_notification_stats,
+        'cron',
+        hour=0,
+        minute=15,
+        id='notification_stats_rollup',
+        replace_existing=True,
+        timezone='Asia/Kolkata'
+    )
+
+    # Nightly notification retention, after the stats rollup has counted yesterday
+    sched.add_job(
+        purge_expired_notifications,
+        'cron',
+        hour=3,
+        minute=0,
+        id='notification_retention',
+        replace_existing=True,
+        timezone='Asia/Kolkata'
+    )
+
+    # Safety net for digest flushes lost when the process restarted mid-window
+    sched.add_job(
+        flush_notification_digests,
+        'interval',
+        minutes=1,
+        id='notification_digest_sweeper',
+        replace_existing=True
+    )
+
+    # Sent outbox emails are only kept for a few days
+    sched.add_job(
+        purge_sent_emails,
+        'cron',
+        hour=3,
+        minute=30,
+        id='email_outbox_purge',
+        replace_existing=True,
+        timezone='Asia/Kolkata'
+    )
+
+    # Hourly sweep of expired OTPs
+    sched.add_job(
+        purge_expired_otps,
+        'interval',
+        hours=1,
+        id='otp_expiry_sweeper',
+        replace_existing=True
+    )
+
+    # Nightly purge of expired JWTs from the blacklist tables
+    sched.add_job(
+        purge_expired_tokens,
+        'cron',
+        hour=4,
+        minute=0,
+        id='token_blacklist_purge',
+        replace_existing=True,
+        timezone='Asia/Kolkata'
+    )
+
+    # Periodic rebuild drops expired JTIs from the blacklist filter
+    sched.add_job(
+        rebuild_token_blacklist_filter,
+        'interval',
+        minutes=getattr(settings, 'TOKEN_BLACKLIST_FILTER_REBUILD_MINUTES', 10),
+        id='token_blacklist_filter_rebuild',
+        replace_existing=True
+    )
+
+    # Nightly wallet balance checkpoint for ledger reconciliation
+    sched.add_job(
+        snapshot_wallet_balances,
+        'cron',
+        hour=2,
+        minute=0,
+        id='wallet_balance_snapshots',
+        replace_existing=True,
+        timezone='Asia/Kolkata'
+    )
+
+    # Hourly subscription expiry (reads already treat a passed end_date as inactive)
+    sched.add_job(
+        expire_subscriptions,
+        'interval',
+        hours=1,
+        id='subscription_expiry',
+        replace_existing=True,
+        next_run_time=timezone.now()
+    )
+
+    # Daily subscription expiry warnings
+    sched.add_job(
+        notify_expiring_subscriptions,
+        'cron',
+        hour=10,
+        minute=0,
+        id='subscription_expiry_warnings',
+        replace_existing=True,
+        timezone='Asia/Kolkata'
+    )
+
+    # Pick up emails left in the outbox by the previous process
+    from apps.authentication.email_outbox import wake_sender
+    run_in_background(wake_sender)
+
+    logger.info("Daily jobs scheduled: availability reminder at 8 AM IST, notification stats rollup at 00:15 IST, notification retention at 3 AM IST, email outbox purge at 3:30 AM IST, digest sweeper every minute, OTP sweeper hourly, token blacklist purge at 4 AM IST, wallet snapshots at 2 AM IST, subscription expiry hourly, expiry warnings at 10 AM IST")
@@ -73,7 +73,6 @@ MIDDLEWARE = [
     'apps.api_logs.middleware.APILoggingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'apps.subscriptions.middleware.SubscriptionCheckMiddleware',
 ]
 
 ROOT_URLCONF = 'server.urls'
@@ -157,7 +156,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -188,6 +187,59 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# Cache shared by every worker: version counters (runtime config, entitlements, token
+# blacklist), idempotency keys and OTPs must be seen by all processes, so anything but
+# a single-process DEBUG server needs Redis. Set REDIS_URL in the environment.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL or not DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL or 'redis://127.0.0.1:6379/1',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a worker keeps a runtime config value (server/runtime_config.py) before reloading
+# it even if its generation did not move
+RUNTIME_CONFIG_MAX_AGE_SECONDS = 300
+
+# Seconds a user's identity (id, role, is_active, password digest) is cached by CachedJWTAuthentication
+AUTH_USER_CACHE_SECONDS = 60
+
+# In-memory Bloom filter of blacklisted refresh token JTIs (apps/authentication/token_blacklist.py).
+# Only used with a shared cache (Redis); unset TOKEN_BLACKLIST_FILTER_ENABLED means "when CACHES is not locmem"
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = 0.001
+TOKEN_BLACKLIST_FILTER_REBUILD_MINUTES = 10
+
+# Seconds a per-HR entitlement snapshot is cached (apps/subscriptions/entitlements.py);
+# wallet, subscription and plan writes retire it earlier
+ENTITLEMENTS_CACHE_SECONDS = 300
+
+# Days of nightly wallet balance snapshots kept for ledger reconciliation (apps/wallet/ledger.py)
+WALLET_SNAPSHOT_RETENTION_DAYS = 90
+
+# Seconds a response is kept for replay to retries with the same Idempotency-Key (server/idempotency.py)
+IDEMPOTENCY_KEY_TTL_SECONDS = 86400
+
+# Most candidates one POST /api/candidates/unlock/bulk/ call may unlock
+BULK_UNLOCK_MAX_CANDIDATES = 50
+
+# Seconds shared caches may reuse public responses before revalidating their ETag (server/conditional.py)
+PUBLIC_CACHE_MAX_AGE_SECONDS = 300
+
+# Taxonomy snapshots for offline filtering (apps/candidates/taxonomy.py): seconds of filter
+# category/option writes collected before a rebuild, versions kept for delta syncs, and
+# seconds a precomputed delta stays cached
+TAXONOMY_SNAPSHOT_DELAY_SECONDS = 5
+TAXONOMY_SNAPSHOT_RETENTION = 50
+TAXONOMY_DELTA_CACHE_SECONDS = 86400
+
 # CORS Settings - FIXED FOR MOBILE DEVICE
 CORS_ALLOW_ALL_ORIGINS = True  # Allow all origins for development
 CORS_ALLOW_CREDENTIALS = True
@@ -211,13 +263,31 @@ AUTH_USER_MODEL = 'authentication.User'
 
 
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Use django.core.mail.backends.filebased.EmailBackend with EMAIL_FILE_PATH for local testing
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=os.path.join(BASE_DIR, 'sent_emails'))
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = 'WorkFina <{}>'.format(EMAIL_HOST_USER)
+EMAIL_TIMEOUT = 20
+
+# Email outbox (apps/authentication/email_outbox.py): one background sender per process
+# reusing a single SMTP connection; set EMAIL_OUTBOX_ASYNC=False to send inline after commit
+EMAIL_OUTBOX_ASYNC = config('EMAIL_OUTBOX_ASYNC', default=True, cast=bool)
+EMAIL_OUTBOX_POLL_SECONDS = 15
+EMAIL_OUTBOX_IDLE_SECONDS = 60
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_BACKOFF_SECONDS = 30
+EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = 3600
+EMAIL_OUTBOX_RETENTION_DAYS = 7
+
+# Signup OTPs: 'apps.authentication.otp_store.CacheOTPStore' keeps them out of the database
+# (needs a cache shared by all workers). Verified OTPs count for account creation this long.
+OTP_STORE = config('OTP_STORE', default='apps.authentication.otp_store.DatabaseOTPStore')
+OTP_VERIFIED_TTL_HOURS = 24
 
 
 LOGGING = {
@@ -243,3 +313,28 @@ FIREBASE_SERVICE_ACCOUNT_KEY = os.path.join(BASE_DIR, 'firebase-service-account.
 
 # Notification API key for scheduled tasks (use environment variable in production)
 NOTIFICATION_API_KEY = os.environ.get('NOTIFICATION_API_KEY', 'workfina-secret-api-key-2024')
+
+# Daily availability reminder: candidates per batch, and window (in minutes) to spread batches over
+AVAILABILITY_REMINDER_BATCH_SIZE = int(os.environ.get('AVAILABILITY_REMINDER_BATCH_SIZE', 500))
+AVAILABILITY_REMINDER_SPREAD_MINUTES = int(os.environ.get('AVAILABILITY_REMINDER_SPREAD_MINUTES', 0))
+
+# Notification SSE stream (/api/notifications/stream/)
+NOTIFICATION_STREAM_BROKER = 'apps.notifications.realtime.InProcessBroker'
+NOTIFICATION_STREAM_MAX_CONNECTIONS = int(os.environ.get('NOTIFICATION_STREAM_MAX_CONNECTIONS', 100))  # per worker
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = 15
+NOTIFICATION_STREAM_MAX_DURATION_SECONDS = 300
+
+# Notification retention (see apps/notifications/retention.py for default per-type policies)
+NOTIFICATION_RETENTION_POLICIES = {}
+NOTIFICATION_LOG_RETENTION_DAYS = 90
+NOTIFICATION_RETENTION_BATCH_SIZE = 1000
+NOTIFICATION_RETENTION_PAUSE_SECONDS = 0.5
+NOTIFICATION_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archives', 'notifications')
+
+# Per-user notification coalescing for types whose template has no window set
+# (see NotificationTemplate.coalesce_window_minutes / coalesce_max_items)
+NOTIFICATION_COALESCE_DEFAULTS = {
+    'CANDIDATE_UNAVAILABLE': {'window_minutes': 5, 'max_items': 20},
+    'CANDIDATE_HIRED': {'window_minutes': 5, 'max_items': 20},
+    'CREDIT_UPDATE': {'window_minutes': 2, 'max_items': 10},
+}